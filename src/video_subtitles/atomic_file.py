@@ -0,0 +1,65 @@
+"""
+Output files that appear under their final name only once complete.
+"""
+
+import itertools
+import os
+from contextlib import contextmanager
+from typing import Iterator, TextIO
+
+_COUNTER = itertools.count()
+
+
+def get_temp_path(path: str) -> str:
+    """A hidden, unique temporary name next to path, so the rename stays on one filesystem."""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.{next(_COUNTER)}.tmp")
+
+
+class AtomicFile:
+    """A text file written to a temporary name and renamed over path by commit().
+
+    Readers never see a half written file and a failed write leaves any
+    previous file in place. Not fsynced: this guards readers, not against
+    power loss.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.write_path = get_temp_path(path)
+        self.file: TextIO = open(  # pylint: disable=consider-using-with
+            self.write_path, encoding="utf-8", mode="w"
+        )
+
+    def write(self, text: str) -> None:
+        """Write text."""
+        self.file.write(text)
+
+    def writelines(self, lines: Iterator[str]) -> None:
+        """Write every piece of text."""
+        self.file.writelines(lines)
+
+    def commit(self) -> None:
+        """Close the file and move it to path."""
+        self.file.close()
+        os.replace(self.write_path, self.path)
+
+    def discard(self) -> None:
+        """Close and delete the file."""
+        self.file.close()
+        try:
+            os.remove(self.write_path)
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def atomic_open(path: str) -> Iterator[AtomicFile]:
+    """Open a text file for writing, moved to path when the with block succeeds."""
+    file = AtomicFile(path)
+    try:
+        yield file
+    except BaseException:
+        file.discard()
+        raise
+    file.commit()
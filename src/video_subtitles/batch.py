@@ -0,0 +1,374 @@
+"""
+Batch mode: subtitles for many files, transcribing and translating in a pipeline.
+"""
+
+import argparse
+import concurrent.futures
+import glob
+import json
+import os
+import time
+import traceback
+from dataclasses import asdict, dataclass
+
+from video_subtitles.gpu_scheduler import GpuScheduler
+from video_subtitles.metrics import add_metrics_argument, metrics_to
+from video_subtitles.subtitle_formats import parse_formats
+from video_subtitles.tracing import add_trace_argument, span, trace_to
+from video_subtitles.util import (
+    add_transcription_arguments,
+    cached_cuda_video_cards,
+    check_workers,
+)
+
+MEDIA_EXTENSIONS = {
+    ".aac",
+    ".avi",
+    ".flac",
+    ".m4a",
+    ".m4v",
+    ".mkv",
+    ".mov",
+    ".mp3",
+    ".mp4",
+    ".mpeg",
+    ".mpg",
+    ".ogg",
+    ".opus",
+    ".wav",
+    ".webm",
+    ".wmv",
+}
+
+DEFAULT_STATUS_FILE = "videosubtitles-status.json"
+
+
+@dataclass
+class FileStatus:
+    """The outcome of one file in a batch."""
+
+    file: str
+    status: str = "pending"
+    outdir: str | None = None
+    error: str | None = None
+    transcribe_seconds: float = 0.0
+    translate_seconds: float = 0.0
+
+
+def is_media_file(path: str) -> bool:
+    """True if the file extension is a known audio or video format."""
+    return os.path.splitext(path)[1].lower() in MEDIA_EXTENSIONS
+
+
+def read_manifest(manifest: str) -> list[str]:
+    """Read a manifest of one path or glob per line, # starts a comment.
+
+    Relative paths are relative to the manifest.
+    """
+    base = os.path.dirname(os.path.abspath(manifest))
+    entries: list[str] = []
+    with open(manifest, encoding="utf-8", mode="r") as file:
+        for line in file:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                entries.append(os.path.join(base, os.path.expanduser(line)))
+    return entries
+
+
+def collect_inputs(paths: list[str], manifest: str | None = None) -> list[str]:
+    """Expand files, directories and globs into a list of media files.
+
+    Directories are searched recursively for media files, files named
+    explicitly are kept whatever their extension. Duplicates are dropped
+    and the order of the arguments is kept.
+    """
+    entries = list(paths)
+    if manifest:
+        entries += read_manifest(manifest)
+    found: dict[str, None] = {}
+    for entry in entries:
+        if os.path.isdir(entry):
+            for root, dirs, files in os.walk(entry):
+                dirs.sort()
+                for name in sorted(files):
+                    if is_media_file(name):
+                        found[os.path.abspath(os.path.join(root, name))] = None
+        elif os.path.isfile(entry):
+            found[os.path.abspath(entry)] = None
+        else:
+            matches = sorted(glob.glob(entry, recursive=True))
+            if not matches:
+                raise FileNotFoundError(f"No files match: {entry}")
+            for match in matches:
+                if os.path.isfile(match) and is_media_file(match):
+                    found[os.path.abspath(match)] = None
+    return list(found)
+
+
+def assign_output_names(files: list[str], output_root: str | None = None) -> dict[str, str]:
+    """Name the text_<name> output folder of every file so no two are shared.
+
+    A file keeps its name without extension unless an earlier file already
+    writes to that folder, then _2, _3 and so on is added.
+    """
+    root = os.path.abspath(output_root or "")
+    taken: set[str] = set()
+    names: dict[str, str] = {}
+    for file in files:
+        stem = os.path.splitext(os.path.basename(file))[0]
+        name = stem
+        number = 1
+        while os.path.normcase(os.path.join(root, f"text_{name}")) in taken:
+            number += 1
+            name = f"{stem}_{number}"
+        taken.add(os.path.normcase(os.path.join(root, f"text_{name}")))
+        names[file] = name
+    return names
+
+
+def run_batch(  # pylint: disable=too-many-arguments,too-many-locals
+    files: list[str],
+    deepl_api_key: str | None,
+    out_languages: list[str],
+    model: str,
+    formats: list[str],
+    output_root: str | None = None,
+    transcription_workers: int | None = None,
+    file_workers: int = 2,
+    translation_workers: int | None = None,
+    device: str | None = None,
+) -> list[FileStatus]:
+    """Generate subtitles for every file.
+
+    Transcription and translation are separate stages: while one file is
+    translated the next one is already being transcribed. On cuda the
+    transcriptions are packed onto the video cards by the memory the model
+    needs, and transcription_workers defaults to as many as fit; otherwise
+    it defaults to one. Unless given, the computing device is probed once
+    for the whole batch. Files with the same name get their own output
+    folders. A failed file is recorded and the rest of the batch carries on.
+    """
+    from video_subtitles.run import (  # pylint: disable=import-outside-toplevel
+        transcribe_file,
+        translate_transcript,
+    )
+
+    if device is None:
+        from transcribe_anything.util import (  # pylint: disable=import-outside-toplevel
+            get_computing_device,
+        )
+
+        device = get_computing_device()
+    scheduler: GpuScheduler | None = None
+    cards = cached_cuda_video_cards() if device == "cuda" else []
+    if cards:
+        scheduler = GpuScheduler(cards)
+        print(f"Scheduling transcriptions on video cards: {scheduler.status()}")
+    if transcription_workers is None:
+        transcription_workers = max(1, scheduler.capacity(model)) if scheduler else 1
+    statuses = [FileStatus(file=file) for file in files]
+    output_names = assign_output_names(files, output_root)
+
+    def transcribe_stage(status: FileStatus):
+        start = time.monotonic()
+        try:
+            with span("batch_transcribe", file=status.file):
+                return transcribe_file(
+                    file=status.file,
+                    model=model,
+                    device=device,
+                    output_root=output_root,
+                    scheduler=scheduler,
+                    output_name=output_names[status.file],
+                )
+        finally:
+            status.transcribe_seconds = time.monotonic() - start
+
+    def translate_stage(status: FileStatus, transcript) -> str:
+        start = time.monotonic()
+        try:
+            with span("batch_translate", file=status.file):
+                return translate_transcript(
+                    transcript,
+                    deepl_api_key,
+                    out_languages,
+                    formats,
+                    translation_workers,
+                )
+        finally:
+            status.translate_seconds = time.monotonic() - start
+
+    def record_failure(status: FileStatus, err: BaseException) -> None:
+        status.status = "failed"
+        status.error = str(err) or type(err).__name__
+        print(f"Failed: {status.file}: {status.error}")
+        traceback.print_exception(type(err), err, err.__traceback__)
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=transcription_workers
+    ) as transcribers, concurrent.futures.ThreadPoolExecutor(
+        max_workers=file_workers
+    ) as translators:
+        pending: dict[concurrent.futures.Future, FileStatus] = {}
+        for status in statuses:
+            status.status = "transcribing"
+            pending[transcribers.submit(transcribe_stage, status)] = status
+        try:
+            while pending:
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    status = pending.pop(future)
+                    err = future.exception()
+                    if err is not None:
+                        record_failure(status, err)
+                    elif status.status == "transcribing":
+                        status.status = "translating"
+                        transcript = future.result()
+                        pending[
+                            translators.submit(translate_stage, status, transcript)
+                        ] = status
+                    else:
+                        status.status = "ok"
+                        status.outdir = future.result()
+        except KeyboardInterrupt:
+            print("Keyboard interrupt detected, cancelling batch...")
+            transcribers.shutdown(wait=False, cancel_futures=True)
+            translators.shutdown(wait=False, cancel_futures=True)
+            raise
+    return statuses
+
+
+def format_summary(statuses: list[FileStatus]) -> str:
+    """Format a table with one line per file."""
+    lines = [f"{'STATUS':<8} {'TRANSCRIBE':>10} {'TRANSLATE':>10}  FILE"]
+    for status in statuses:
+        line = (
+            f"{status.status:<8} {status.transcribe_seconds:>9.1f}s "
+            f"{status.translate_seconds:>9.1f}s  {status.file}"
+        )
+        if status.error:
+            line += f"\n{'':<32}{status.error}"
+        lines.append(line)
+    failed = sum(1 for status in statuses if status.status != "ok")
+    lines.append(f"{len(statuses) - failed} succeeded, {failed} failed")
+    return "\n".join(lines)
+
+
+def write_status_file(path: str, statuses: list[FileStatus]) -> None:
+    """Write the per file status as JSON."""
+    with open(path, encoding="utf-8", mode="w") as file:
+        json.dump([asdict(status) for status in statuses], file, indent=2)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Video Subtitles batch mode")
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="Files, directories or glob patterns to process.",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help="File listing one path or glob per line.",
+    )
+    add_transcription_arguments(parser)
+    parser.add_argument(
+        "--formats",
+        type=parse_formats,
+        default=["srt"],
+        help="Output formats as a comma-separated list.",
+        metavar="{srt,vtt,ass,ttml,json}",
+    )
+    parser.add_argument("--api-key", default=None, help="Transcribe Anything API key.")
+    parser.add_argument(
+        "--output-dir",
+        default=None,
+        help="Folder the text_<name> folders are created in.",
+    )
+    parser.add_argument(
+        "--transcription-workers",
+        type=int,
+        default=None,
+        help="Number of files to transcribe at the same time, "
+        "defaults to as many as fit on the video cards.",
+    )
+    parser.add_argument(
+        "--file-workers",
+        type=int,
+        default=2,
+        help="Number of files to translate at the same time.",
+    )
+    parser.add_argument(
+        "--translation-workers",
+        type=int,
+        default=None,
+        help="Number of languages to translate at the same time per file.",
+    )
+    parser.add_argument(
+        "--status-file",
+        default=DEFAULT_STATUS_FILE,
+        help="Where to write the per file status as JSON.",
+    )
+    add_trace_argument(parser)
+    add_metrics_argument(parser)
+    args = parser.parse_args()
+    if not args.inputs and not args.manifest:
+        parser.error("You must provide inputs or a --manifest")
+    check_workers(
+        parser, args, ("transcription_workers", "file_workers", "translation_workers")
+    )
+    return args
+
+
+def main() -> int:
+    """Main entry point for batch mode."""
+    from video_subtitles.settings import (  # pylint: disable=import-outside-toplevel
+        Settings,
+    )
+    from video_subtitles.translation_backends import (  # pylint: disable=import-outside-toplevel
+        get_backend_name,
+    )
+
+    args = parse_args()
+    try:
+        files = collect_inputs(args.inputs, args.manifest)
+    except FileNotFoundError as err:
+        print(f"Error - {err}")
+        return 1
+    if not files:
+        print("Error - no media files found")
+        return 1
+    print(f"Found {len(files)} files")
+    settings = Settings()
+    api_key = settings.api_key(args.api_key)
+    translation_workers = args.translation_workers or settings.translation_workers(
+        get_backend_name(api_key)
+    )
+    try:
+        with trace_to(args.trace), metrics_to(args.metrics):
+            statuses = run_batch(
+                files=files,
+                deepl_api_key=api_key,
+                out_languages=args.languages,
+                model=args.model,
+                formats=args.formats,
+                output_root=args.output_dir,
+                transcription_workers=args.transcription_workers,
+                file_workers=args.file_workers,
+                translation_workers=translation_workers,
+            )
+    except KeyboardInterrupt:
+        print("Exiting due to keyboard interrupt.")
+        return 1
+    print(format_summary(statuses))
+    write_status_file(args.status_file, statuses)
+    print(f"Status written to {os.path.abspath(args.status_file)}")
+    return 0 if all(status.status == "ok" for status in statuses) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,151 @@
+"""
+Pool of long-lived headless browsers for the free DeepL translator.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+# A browser is replaced after this many requests or seconds, long sessions
+# of the web page slow down and leak memory.
+DEFAULT_MAX_USES = 200
+DEFAULT_MAX_AGE = 30 * 60
+
+
+def is_browser_alive(translator: Any) -> bool:
+    """Health check of a srtranslator DeeplTranslator, its browser answers and is on DeepL."""
+    try:
+        return "deepl.com" in translator.driver.current_url
+    except Exception:  # pylint: disable=broad-except
+        return False
+
+
+class PooledBrowser:  # pylint: disable=too-few-public-methods
+    """A browser and its usage."""
+
+    def __init__(self, browser: Any) -> None:
+        self.browser = browser
+        self.created = time.monotonic()
+        self.uses = 0
+
+
+class BrowserPool:  # pylint: disable=too-many-instance-attributes
+    """Leases browsers to one request at a time, launching at most max_size.
+
+    Idle browsers are health checked before they are handed out and
+    replaced when they fail the check, got too old or served max_uses
+    requests. A browser whose request raised is quit, the page may be in
+    any state. close() quits every browser, leased ones when returned.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        factory: Callable[[], Any],
+        max_size: int,
+        health_check: Callable[[Any], bool] = is_browser_alive,
+        max_uses: int = DEFAULT_MAX_USES,
+        max_age: float = DEFAULT_MAX_AGE,
+    ) -> None:
+        assert max_size > 0
+        self.factory = factory
+        self.max_size = max_size
+        self.health_check = health_check
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.idle: list[PooledBrowser] = []
+        self.size = 0
+        self.launched = 0
+        self.recycled = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def _quit(self, pooled: PooledBrowser) -> None:
+        try:
+            pooled.browser.quit()
+        except Exception as err:  # pylint: disable=broad-except
+            print(f"Error quitting browser: {err}")
+
+    def _usable(self, pooled: PooledBrowser) -> bool:
+        if pooled.uses >= self.max_uses:
+            return False
+        if time.monotonic() - pooled.created >= self.max_age:
+            return False
+        return self.health_check(pooled.browser)
+
+    def _take(self) -> PooledBrowser | None:
+        """Take a usable idle browser or reserve a slot to launch one."""
+        with self.condition:
+            while True:
+                if self.closed:
+                    raise RuntimeError("Browser pool is closed")
+                if self.idle:
+                    return self.idle.pop()
+                if self.size < self.max_size:
+                    self.size += 1
+                    return None
+                self.condition.wait()
+
+    def _discard(self, pooled: PooledBrowser | None) -> None:
+        if pooled is not None:
+            self._quit(pooled)
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def acquire(self) -> PooledBrowser:
+        """Lease a browser, waiting for one when max_size are in use."""
+        while True:
+            pooled = self._take()
+            if pooled is None:
+                try:
+                    pooled = PooledBrowser(self.factory())
+                except BaseException:
+                    self._discard(None)
+                    raise
+                with self.condition:
+                    self.launched += 1
+                return pooled
+            if self._usable(pooled):
+                return pooled
+            with self.condition:
+                self.recycled += 1
+            self._discard(pooled)
+
+    def release(self, pooled: PooledBrowser, healthy: bool = True) -> None:
+        """Return a leased browser, quitting it unless healthy."""
+        pooled.uses += 1
+        with self.condition:
+            if healthy and not self.closed:
+                self.idle.append(pooled)
+                self.condition.notify()
+                return
+        self._discard(pooled)
+
+    @contextmanager
+    def lease(self) -> Iterator[Any]:
+        """Lease a browser for a with block."""
+        pooled = self.acquire()
+        try:
+            yield pooled.browser
+        except BaseException:
+            self.release(pooled, healthy=False)
+            raise
+        self.release(pooled)
+
+    def close(self) -> None:
+        """Quit every idle browser, leased ones are quit when returned."""
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.condition.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def status(self) -> str:
+        """Pool counters, for logging."""
+        with self.condition:
+            return (
+                f"{self.size} browsers ({len(self.idle)} idle), "
+                f"{self.launched} launched, {self.recycled} recycled"
+            )
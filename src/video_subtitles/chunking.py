@@ -0,0 +1,180 @@
+"""
+Splits long audio at quiet points, transcribes the pieces in parallel and
+stitches their subtitles back together.
+"""
+
+import array
+import concurrent.futures
+import operator
+import os
+import sys
+import wave
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
+
+from video_subtitles.srt_cues import Cue, sort_and_reindex
+
+# Split points are searched for this far either side of every chunk boundary.
+DEFAULT_SEARCH_SECONDS = 30.0
+# Length of the windows whose energy is compared when looking for a quiet point.
+DEFAULT_WINDOW_MS = 50
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A piece of the audio and where it starts in the whole file."""
+
+    path: str
+    start_ms: int
+    end_ms: int
+
+
+def extract_audio(file: str, out_wav: str) -> None:
+    """Decode the audio of a media file to a mono 16 bit wav."""
+    import static_ffmpeg  # type: ignore  # pylint: disable=import-outside-toplevel
+    from transcribe_anything.audio import (  # pylint: disable=import-outside-toplevel
+        fetch_audio,
+    )
+
+    static_ffmpeg.add_paths()
+    fetch_audio(file, out_wav)
+
+
+def _read_samples(wav: wave.Wave_read, start_frame: int, num_frames: int) -> array.array:
+    """Read 16 bit frames from a wav, mixed down to the first channel."""
+    wav.setpos(start_frame)
+    samples = array.array("h", wav.readframes(num_frames))
+    if sys.byteorder == "big":
+        samples.byteswap()
+    channels = wav.getnchannels()
+    return samples[::channels] if channels > 1 else samples
+
+
+def find_quiet_point(
+    wav: wave.Wave_read,
+    target_frame: int,
+    search_frames: int,
+    window_frames: int,
+) -> int:
+    """Find the frame of the quietest window near target_frame.
+
+    Ties go to the window closest to the target, so silence anywhere in the
+    search range keeps the chunks close to the requested length.
+    """
+    start = max(0, target_frame - search_frames)
+    end = min(wav.getnframes(), target_frame + search_frames)
+    samples = _read_samples(wav, start, end - start)
+    best_frame = target_frame
+    best_key: tuple[int, int] | None = None
+    for offset in range(0, len(samples) - window_frames + 1, window_frames):
+        window = samples[offset : offset + window_frames]
+        energy = sum(map(operator.mul, window, window))
+        frame = start + offset + window_frames // 2
+        key = (energy, abs(frame - target_frame))
+        if best_key is None or key < best_key:
+            best_key = key
+            best_frame = frame
+    return best_frame
+
+
+def find_split_points(
+    wav_path: str,
+    chunk_seconds: float,
+    search_seconds: float = DEFAULT_SEARCH_SECONDS,
+    window_ms: int = DEFAULT_WINDOW_MS,
+) -> list[int]:
+    """Find frames to split a wav at, about chunk_seconds apart, in quiet spots.
+
+    Only the audio around each boundary is read, not the whole file.
+    """
+    with wave.open(wav_path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"Expected 16 bit audio in {wav_path}")
+        rate = wav.getframerate()
+        total = wav.getnframes()
+        chunk_frames = int(chunk_seconds * rate)
+        search_frames = min(int(search_seconds * rate), chunk_frames // 2)
+        window_frames = max(1, rate * window_ms // 1000)
+        points: list[int] = []
+        previous = 0
+        # The last chunk absorbs a remainder shorter than half a chunk.
+        while total - previous > chunk_frames * 1.5:
+            point = find_quiet_point(
+                wav, previous + chunk_frames, search_frames, window_frames
+            )
+            points.append(point)
+            previous = point
+        return points
+
+
+def split_wav(wav_path: str, points: list[int], out_dir: str) -> list[Chunk]:
+    """Write the pieces of a wav between split points to out_dir."""
+    chunks: list[Chunk] = []
+    with wave.open(wav_path, "rb") as wav:
+        rate = wav.getframerate()
+        bounds = [0] + points + [wav.getnframes()]
+        for i, (start, end) in enumerate(zip(bounds, bounds[1:])):
+            path = os.path.join(out_dir, f"chunk_{i:04d}.wav")
+            wav.setpos(start)
+            with wave.Wave_write(path) as out:
+                out.setparams(wav.getparams())
+                out.writeframes(wav.readframes(end - start))
+            chunks.append(Chunk(path, start * 1000 // rate, end * 1000 // rate))
+    return chunks
+
+
+def iter_stitched(
+    chunk_cues: Iterable[tuple[Chunk, list[Cue]]]
+) -> Iterator[list[Cue]]:
+    """Shift the cues of every chunk to the time of the whole file, a chunk at a time.
+
+    Cues running past the end of their chunk are cut off at it, so the
+    chunks do not overlap and numbering simply continues from one chunk to
+    the next.
+    """
+    numbered = 0
+    for chunk, chunk_cue_list in chunk_cues:
+        shifted = [
+            cue._replace(
+                start_ms=min(cue.start_ms + chunk.start_ms, chunk.end_ms),
+                end_ms=min(cue.end_ms + chunk.start_ms, chunk.end_ms),
+            )
+            for cue in chunk_cue_list
+        ]
+        segment = [
+            cue._replace(number=cue.number + numbered) for cue in sort_and_reindex(shifted)
+        ]
+        numbered += len(segment)
+        yield segment
+
+
+def stitch(chunk_cues: Iterable[tuple[Chunk, list[Cue]]]) -> list[Cue]:
+    """Shift the cues of every chunk to the time of the whole file and renumber."""
+    return [cue for segment in iter_stitched(chunk_cues) for cue in segment]
+
+
+def iter_transcribed_chunks(
+    chunks: list[Chunk],
+    transcribe_chunk: Callable[[Chunk], list[Cue]],
+    workers: int,
+) -> Iterator[list[Cue]]:
+    """Transcribe the chunks with up to workers at a time.
+
+    The stitched cues of each chunk are yielded in order as soon as that
+    chunk and the ones before it are done.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from iter_stitched(zip(chunks, executor.map(transcribe_chunk, chunks)))
+
+
+def transcribe_chunks(
+    chunks: list[Chunk],
+    transcribe_chunk: Callable[[Chunk], list[Cue]],
+    workers: int,
+) -> list[Cue]:
+    """Transcribe the chunks with up to workers at a time and stitch the results."""
+    return [
+        cue
+        for segment in iter_transcribed_chunks(chunks, transcribe_chunk, workers)
+        for cue in segment
+    ]
@@ -8,14 +8,17 @@ import sys
 import warnings
 
 from video_subtitles import __version__
-from video_subtitles.run import run
-from video_subtitles.say import say
-from video_subtitles.settings import Settings
-from video_subtitles.util import MODELS, parse_languages, query_cuda_video_cards
+from video_subtitles.gpu_scheduler import GpuScheduler
+from video_subtitles.metrics import add_metrics_argument, metrics_to
+from video_subtitles.subtitle_formats import parse_formats
+from video_subtitles.tracing import add_trace_argument, trace_to
+from video_subtitles.util import add_transcription_arguments, cached_cuda_video_cards
 
-HERE = os.path.dirname(os.path.abspath(__file__))
+# The transcription, translation and speech modules take a good fraction of
+# a second to import, so they are only imported once a run needs them.
+# pylint: disable=import-outside-toplevel
 
-settings = Settings()
+HERE = os.path.dirname(os.path.abspath(__file__))
 
 
 def parse_args() -> argparse.Namespace:
@@ -23,20 +26,7 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Video Subtitles")
     parser.add_argument("--version", action="version", version=f"{__version__}")
     parser.add_argument("file", type=str, help="File or URL to process.")
-    parser.add_argument(
-        "--languages",
-        type=parse_languages,
-        help="Output languages as a comma-separated list.",
-        metavar="{en,es,fr,de,it,ru,zh}",
-        required=True,
-    )
-    parser.add_argument(
-        "--model",
-        type=str,
-        help="Model to use.",
-        default="large",
-        choices=MODELS.keys(),
-    )
+    add_transcription_arguments(parser)
     parser.add_argument(
         "--quite",
         action="store_true",
@@ -47,14 +37,58 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Output WebVTT format.",
     )
+    parser.add_argument(
+        "--formats",
+        type=parse_formats,
+        default=None,
+        help="Output formats as a comma-separated list, overrides --webvtt.",
+        metavar="{srt,vtt,ass,ttml,json}",
+    )
     parser.add_argument("--api-key", default=None, help="Transcribe Anything API key.")
+    parser.add_argument(
+        "--translation-workers",
+        type=int,
+        default=None,
+        help="Number of languages to translate at the same time.",
+    )
+    parser.add_argument(
+        "--chunk-minutes",
+        type=float,
+        default=None,
+        help="Split long audio into pieces about this long and transcribe them in parallel.",
+    )
+    parser.add_argument(
+        "--chunk-workers",
+        type=int,
+        default=None,
+        help="Number of pieces to transcribe at the same time with --chunk-minutes.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Translate each chunk as soon as it is transcribed, see --chunk-minutes.",
+    )
+    parser.add_argument(
+        "--retranslate",
+        action="store_true",
+        help="Translate every subtitle again instead of reusing the previous "
+        "run's translations of unchanged subtitles.",
+    )
+    add_trace_argument(parser)
+    add_metrics_argument(parser)
     args = parser.parse_args()
     if not args.languages:
         parser.error("You must provide at least one --languages")
+    if args.translation_workers is not None and args.translation_workers < 1:
+        parser.error("--translation-workers must be at least 1")
+    if args.chunk_minutes is not None and args.chunk_minutes <= 0:
+        parser.error("--chunk-minutes must be positive")
+    if args.chunk_workers is not None and args.chunk_workers < 1:
+        parser.error("--chunk-workers must be at least 1")
     return args
 
 
-def validate_api_key() -> str | None:
+def validate_api_key(settings) -> str | None:
     """Validate the API key."""
     api_key = settings.deepl_key()
     if not api_key:
@@ -65,20 +99,23 @@ def validate_api_key() -> str | None:
     return api_key
 
 
-def main() -> int:
-    """Main entry point for the template_python_cmd package."""
-    print(f"videosubtitles version: {__version__}")
-    cuda_cards = query_cuda_video_cards()
+def print_cuda_video_cards() -> None:
+    """Print the video cards, from the cache when it is fresh."""
+    cuda_cards = cached_cuda_video_cards()
     if cuda_cards:
         print("Found the following Nvidia/CUDA video cards:")
         for card in cuda_cards:
             print(f"  [{card.idx}]: {card.name}, {card.memory_gb} GB")
     else:
         print("No Nvidia/CUDA video cards found. Expect degraded performance.")
+
+
+def main() -> int:
+    """Main entry point for the template_python_cmd package."""
+    print(f"videosubtitles version: {__version__}")
     if len(sys.argv) == 1:
-        from video_subtitles.gui import (  # pylint: disable=import-outside-toplevel
-            run_gui,
-        )
+        print_cuda_video_cards()
+        from video_subtitles.gui import run_gui
 
         run_gui()
         return 0
@@ -88,24 +125,44 @@ def main() -> int:
         if not os.path.exists(file):
             print(f"Error - file does not exist: {file}")
             return 1
+        print_cuda_video_cards()
+        from video_subtitles.run import run
+        from video_subtitles.say import say
+        from video_subtitles.settings import Settings
+        from video_subtitles.translation_backends import get_backend_name
+
+        settings = Settings()
         api_key: None | str = None
         if args.api_key:
             api_key = args.api_key
             if api_key == "free":
                 api_key = None
         else:
-            api_key = validate_api_key()
+            api_key = validate_api_key(settings)
         if api_key == "free":
             warnings.warn(
                 "Using free API key. Expect degraded results for large srt files"
             )
-        run(
-            file=file,
-            deepl_api_key=api_key,
-            out_languages=args.languages,
-            model=args.model,
-            convert_to_webvtt=args.webvtt,
-        )
+        translation_workers = args.translation_workers
+        if translation_workers is None:
+            translation_workers = settings.translation_workers(
+                get_backend_name(api_key)
+            )
+        with trace_to(args.trace), metrics_to(args.metrics):
+            run(
+                file=file,
+                deepl_api_key=api_key,
+                out_languages=args.languages,
+                model=args.model,
+                convert_to_webvtt=args.webvtt,
+                translation_workers=translation_workers,
+                formats=args.formats,
+                chunk_minutes=args.chunk_minutes,
+                chunk_workers=args.chunk_workers,
+                stream=args.stream,
+                reuse_translations=not args.retranslate,
+                scheduler=GpuScheduler(cached_cuda_video_cards()),
+            )
         if not args.quite:
             say(f"Finished generating srt files for {file}")
     except KeyboardInterrupt:
@@ -2,10 +2,11 @@
 Conversion to test to webvtt format.
 """
 
+from typing import Iterable, Iterator
 
-import webvtt  # pylint: disable=import-error
-
-from video_subtitles.util import read_utf8, write_utf8
+from video_subtitles.atomic_file import atomic_open
+from video_subtitles.srt_cues import Cue, format_timestamp, read_srt
+from video_subtitles.tracing import span
 
 STYLE_ELEMENT = """STYLE
 ::::cue {
@@ -15,11 +16,35 @@ STYLE_ELEMENT = """STYLE
 """
 
 
+def format_webvtt_cue(cue: Cue) -> str:
+    """Format the timing line and text of a WebVTT cue."""
+    return (
+        f"{format_timestamp(cue.start_ms, '.')} --> "
+        f"{format_timestamp(cue.end_ms, '.')}\n{cue.text}"
+    )
+
+
+def format_webvtt(cues: Iterable[Cue]) -> Iterator[str]:
+    """Yield a WebVTT file in pieces, laid out exactly as webvtt-py saved it
+    with STYLE_ELEMENT after the header."""
+    separator = f"\n\n{STYLE_ELEMENT}"
+    yield "WEBVTT"
+    for cue in cues:
+        if not cue.text:
+            continue
+        yield separator + format_webvtt_cue(cue)
+        separator = "\n\n"
+
+
+def write_webvtt(out_webvtt_file: str, cues: Iterable[Cue]) -> None:
+    """Write cues to a webvtt file in a single pass, replacing it once complete."""
+    with atomic_open(out_webvtt_file) as file:
+        file.writelines(format_webvtt(cues))
+
+
 def convert_to_webvtt(srt_file: str, out_webvtt_file: str) -> None:
     """Convert to webvtt format."""
     assert srt_file.endswith(".srt")
     assert out_webvtt_file.endswith(".vtt")
-    webvtt.from_srt(srt_file).save(out_webvtt_file)
-    content = read_utf8(out_webvtt_file)
-    content = content.replace("WEBVTT\n\n", f"WEBVTT\n\n{STYLE_ELEMENT}")
-    write_utf8(out_webvtt_file, content)
+    with span("convert_to_webvtt"):
+        write_webvtt(out_webvtt_file, read_srt(srt_file))
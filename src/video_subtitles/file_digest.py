@@ -0,0 +1,43 @@
+"""
+Content digests of media files, used to key the transcription cache.
+"""
+
+import hashlib
+import os
+
+from disklru import DiskLRUCache  # type: ignore
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """Stream the file through sha256 and return the hex digest."""
+    digest = hashlib.sha256()
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(path, mode="rb") as file:
+        while True:
+            size = file.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+    return digest.hexdigest()
+
+
+def file_digest(path: str, cache: DiskLRUCache | None = None) -> str:
+    """Return the content digest of a file.
+
+    If a cache is given then the digest is remembered against the size and
+    mtime of the file, so an unchanged file is not read again.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = f"digest-{path}-{stat.st_size}-{stat.st_mtime_ns}"
+    if cache is not None:
+        cached = cache.get(key)
+        if cached:
+            return cached
+    digest = hash_file(path)
+    if cache is not None:
+        cache.put(key, digest)
+    return digest
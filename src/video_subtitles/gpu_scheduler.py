@@ -0,0 +1,105 @@
+"""
+Packs concurrent transcription jobs onto the video cards by memory.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from video_subtitles.util import MODELS, GraphicsInfo
+
+# Left free on every card for the driver and the desktop.
+DEFAULT_RESERVE_GB = 0.5
+
+
+class GpuScheduler:
+    """Hands out video cards to transcription jobs by the memory their model needs.
+
+    A job goes to the card with the least free memory that still fits it,
+    so a big job later still finds a mostly empty card. Jobs that fit
+    nowhere right now wait until a running job releases its card.
+    """
+
+    def __init__(
+        self, cards: list[GraphicsInfo], reserve_gb: float = DEFAULT_RESERVE_GB
+    ) -> None:
+        self.cards = list(cards)
+        self.reserve_gb = reserve_gb
+        self.free_gb = {card.idx: card.memory_gb - reserve_gb for card in self.cards}
+        self.condition = threading.Condition()
+
+    @staticmethod
+    def required_gb(model: str) -> float:
+        """The memory a model needs."""
+        return MODELS[model]
+
+    def fits(self, model: str) -> bool:
+        """Whether a job of a model fits on any card, when that card is idle."""
+        need = self.required_gb(model)
+        return any(need <= card.memory_gb - self.reserve_gb for card in self.cards)
+
+    def capacity(self, model: str) -> int:
+        """How many jobs of a model fit on the idle cards at the same time."""
+        need = self.required_gb(model)
+        return sum(
+            int(free // need) for free in self.free_gb.values() if need <= free
+        )
+
+    def try_acquire(self, model: str) -> GraphicsInfo | None:
+        """Reserve a card for a job without waiting, None if nothing fits now."""
+        need = self.required_gb(model)
+        with self.condition:
+            fits = [card for card in self.cards if need <= self.free_gb[card.idx]]
+            if not fits:
+                return None
+            card = min(fits, key=lambda card: (self.free_gb[card.idx], card.idx))
+            self.free_gb[card.idx] -= need
+            return card
+
+    def acquire(
+        self, model: str, cancel_event: threading.Event | None = None
+    ) -> GraphicsInfo:
+        """Reserve a card for a job, waiting for one to free up.
+
+        Raises ValueError if the model fits on none of the cards, and
+        RuntimeError if cancel_event is set while waiting.
+        """
+        if not self.fits(model):
+            raise ValueError(
+                f"Model {model} needs {self.required_gb(model)} GB, more than any "
+                f"video card has free after the {self.reserve_gb} GB reserve"
+            )
+        with self.condition:
+            while True:
+                card = self.try_acquire(model)
+                if card is not None:
+                    return card
+                if cancel_event is not None and cancel_event.is_set():
+                    raise RuntimeError(f"Cancelled while waiting for a video card for {model}")
+                # Woken by release(), the timeout only rechecks cancel_event.
+                self.condition.wait(0.5 if cancel_event is not None else None)
+
+    def release(self, card: GraphicsInfo, model: str) -> None:
+        """Give back the memory a job reserved."""
+        with self.condition:
+            self.free_gb[card.idx] += self.required_gb(model)
+            self.condition.notify_all()
+
+    @contextmanager
+    def reserve(
+        self, model: str, cancel_event: threading.Event | None = None
+    ) -> Iterator[GraphicsInfo]:
+        """Hold a card for the duration of a with block."""
+        card = self.acquire(model, cancel_event)
+        try:
+            yield card
+        finally:
+            self.release(card, model)
+
+    def status(self) -> str:
+        """Free memory per card, for logging."""
+        with self.condition:
+            return ", ".join(
+                f"[{card.idx}] {self.free_gb[card.idx]:.1f}/{card.memory_gb:.1f} GB free"
+                for card in self.cards
+            )
@@ -8,7 +8,7 @@ import os
 import platform
 import subprocess
 import sys
-from threading import Thread
+from threading import Event
 
 from PyQt6 import QtCore  # type: ignore
 from PyQt6.QtCore import pyqtSignal  # type: ignore
@@ -26,11 +26,23 @@ from PyQt6.QtWidgets import (  # type: ignore
     QWidget,
 )
 
+from video_subtitles.gpu_scheduler import GpuScheduler
 from video_subtitles.run import run
 from video_subtitles.say import say
 from video_subtitles.settings import Settings
-from video_subtitles.thread_processor import ThreadProcessor
-from video_subtitles.util import LANGUAGE_CODES, MODELS, parse_languages
+from video_subtitles.thread_processor import (
+    DEFAULT_CONCURRENT_JOBS,
+    DONE,
+    Job,
+    ThreadProcessor,
+)
+from video_subtitles.translation_backends import get_backend_name
+from video_subtitles.util import (
+    LANGUAGE_CODES,
+    MODELS,
+    cached_cuda_video_cards,
+    parse_languages,
+)
 
 settings = Settings()
 
@@ -49,6 +61,7 @@ class MainWidget(QMainWindow):  # pylint: disable=too-many-instance-attributes
     """Main widget."""
 
     progress_signal = pyqtSignal(bool)
+    status_signal = pyqtSignal(str)
 
     def __init__(self, on_drop_callback):  # pylint: disable=too-many-statements
         super().__init__()
@@ -57,6 +70,7 @@ class MainWidget(QMainWindow):  # pylint: disable=too-many-instance-attributes
         self.resize(720, 480)
         self.setAcceptDrops(True)
         self.on_destroy = None
+        self.on_cancel = None
 
         deepl_api_key = settings.deepl_key()
 
@@ -138,6 +152,14 @@ class MainWidget(QMainWindow):  # pylint: disable=too-many-instance-attributes
         self.progress_bar = self.create_progress_bar()
         self.progress_signal.connect(self.progress_bar.setVisible)
         progress_bar_layout.addWidget(self.progress_bar)
+        self.status_label = QLabel(self)
+        self.status_signal.connect(self.status_label.setText)
+        progress_bar_layout.addWidget(self.status_label)
+        self.cancel_button = QPushButton("Cancel All")
+        self.cancel_button.clicked.connect(self.cancel_jobs)
+        self.progress_signal.connect(self.cancel_button.setVisible)
+        self.cancel_button.setVisible(False)
+        progress_bar_layout.addWidget(self.cancel_button)
 
         # Add the header pane and label widget to the main layout
         main_layout.addWidget(header_pane)
@@ -154,6 +176,11 @@ class MainWidget(QMainWindow):  # pylint: disable=too-many-instance-attributes
             self.on_destroy()
         super().closeEvent(event)
 
+    def cancel_jobs(self):
+        """Cancels every queued and running job."""
+        if self.on_cancel:
+            self.on_cancel()
+
     def show_help_dialog(self):
         """Shows a dialog with the language codes."""
         dialog = QMessageBox()
@@ -217,72 +244,92 @@ def run_gui() -> None:
     """Runs the gui."""
     app = QApplication(sys.argv)
 
-    thread_processor = ThreadProcessor()
+    # Transcriptions wait for room on a video card, so there is no harm in
+    # running enough jobs to fill every card.
+    scheduler = GpuScheduler(cached_cuda_video_cards())
+    thread_processor = ThreadProcessor(
+        max_workers=settings.concurrent_jobs()
+        or max(DEFAULT_CONCURRENT_JOBS, scheduler.capacity(settings.model()))
+    )
 
-    def callback(
+    def _generate_subtitles(  # pylint: disable=too-many-arguments
         videofile: str,
-        deepl_api_key: str | None,
+        deeply_api_key: str | None,
         languages: list[str],
         model: str,
         convert_to_webvtt: bool,
-    ):
-        # path, _ = os.path.splitext(videofile)
-        # os.makedirs(path, exist_ok=True)
-        # open_folder(path)
-        if not deepl_api_key:
-            deepl_api_key = None
+        cancel_event: Event,
+    ) -> str:
+        # The output goes next to the video. Jobs run side by side, so the
+        # process wide working directory is left alone.
+        print("Generating subtitles for", videofile)
+        return run(
+            file=videofile,
+            deepl_api_key=deeply_api_key,
+            out_languages=languages,
+            model=model,
+            convert_to_webvtt=convert_to_webvtt,
+            translation_workers=settings.translation_workers(
+                get_backend_name(deeply_api_key)
+            ),
+            output_root=os.path.dirname(videofile),
+            cancel_event=cancel_event,
+            scheduler=scheduler,
+        )
 
-        # Open folder in the OS
-        def _generate_subtitles(
-            videofile: str,
-            deeply_api_key: str | None,
-            languages: list[str],
-            model: str,
-            convert_to_webvtt: bool,
-        ):
-            # perform the actual work here
-            os.chdir(os.path.dirname(videofile))
-            videofile = os.path.basename(videofile)
-            try:
-                out = run(
-                    file=videofile,
-                    deepl_api_key=deeply_api_key,
-                    out_languages=languages,
-                    model=model,
-                    convert_to_webvtt=convert_to_webvtt,
-                )
-            except Exception as e:  # pylint: disable=broad-except
-                print(e)
-                say("Error: " + str(e))
-                return
-            open_folder(out)
-            print("Generating subtitles for", videofile)
-            voicename = os.path.basename(videofile).split(".")[0].replace("_", " ")
+    def on_done(job: Job) -> None:
+        videofile, convert_to_webvtt = job.args[0], job.args[4]
+        voicename = os.path.basename(videofile).split(".")[0].replace("_", " ")
+        if job.state == DONE:
+            open_folder(job.result)
             fmt = "WEBVTT" if convert_to_webvtt else "SRT"
             say(
                 f"Attention: {voicename} has completed subtitle generation in {fmt} format"
             )
+        elif job.error is not None:
+            print(job.error)
+            say("Error: " + str(job.error))
+        else:
+            print(f"Cancelled {videofile}")
 
-        thread = Thread(
-            target=_generate_subtitles,
-            args=(videofile, deepl_api_key, languages, model, convert_to_webvtt),
-            daemon=True,
+    def callback(
+        videofile: str,
+        deepl_api_key: str | None,
+        languages: list[str],
+        model: str,
+        convert_to_webvtt: bool,
+    ):
+        if not deepl_api_key:
+            deepl_api_key = None
+        videofile = os.path.abspath(videofile)
+        # Short videos first so they are not stuck behind long ones.
+        size = os.path.getsize(videofile) if os.path.exists(videofile) else 0
+        job = thread_processor.submit(
+            _generate_subtitles,
+            videofile,
+            deepl_api_key,
+            languages,
+            model,
+            convert_to_webvtt,
+            priority=-size,
+            name=videofile,
         )
-        thread_processor.add(thread)
+        thread_processor.add_done_callback(job, on_done)
 
     gui = MainWidget(callback)
     gui.show()
 
-    def update_function(val: bool):
+    def update_function(running: int, queued: int):
         """Updates the progress bar."""
         data = update_function.__dict__
-        data["last_value"] = data.get("last_value", False)
-        if val == data["last_value"]:
-            return
-        data["last_value"] = val
-        gui.progress_signal.emit(val)
+        busy = running + queued > 0
+        if busy != data.get("last_value", False):
+            data["last_value"] = busy
+            gui.progress_signal.emit(busy)
+        gui.status_signal.emit(f"{running} running, {queued} queued" if busy else "")
 
     gui.on_destroy = thread_processor.stop
+    gui.on_cancel = thread_processor.cancel_all
     thread_processor.set_status_callback(update_function)
     thread_processor.start()
     sys.exit(app.exec())
@@ -0,0 +1,112 @@
+"""
+Reuses the translations of a previous run for the cues a new transcript
+did not change.
+"""
+
+import json
+import os
+from typing import Sequence
+
+from video_subtitles.atomic_file import atomic_open
+from video_subtitles.srt_cues import Cue, clean_text
+from video_subtitles.translation_memory import normalize_text
+
+# Matching cues may start this far apart, re-transcribing shifts timings a bit.
+MAX_SHIFT_MS = 2000
+
+
+def get_sources_path(outdir: str, language: str) -> str:
+    """The file pairing the translations in outdir with the text they came from."""
+    return os.path.join(outdir, f"{language}.sources.json")
+
+
+def write_sources(
+    outdir: str, language: str, sources: Sequence[Cue], translated: Sequence[Cue]
+) -> None:
+    """Record what every translated cue was translated from.
+
+    Each entry holds both texts, so the file stays consistent with itself
+    even when the outputs around it come from different runs.
+    """
+    entries = [
+        {
+            "start_ms": source.start_ms,
+            "end_ms": source.end_ms,
+            "source": source.text,
+            "text": cue.text,
+        }
+        for source, cue in zip(sources, translated)
+    ]
+    with atomic_open(get_sources_path(outdir, language)) as file:
+        file.write(json.dumps(entries, ensure_ascii=False, indent=1))
+
+
+def read_sources(outdir: str, language: str) -> tuple[list[Cue], list[str]] | None:
+    """The source cues and their translations from write_sources(), None if there are none."""
+    path = get_sources_path(outdir, language)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8", mode="r") as file:
+            entries = json.load(file)
+        sources = [
+            Cue(pos, entry["start_ms"], entry["end_ms"], entry["source"])
+            for pos, entry in enumerate(entries, start=1)
+        ]
+        return sources, [str(entry["text"]) for entry in entries]
+    except (OSError, ValueError, TypeError, KeyError) as err:
+        print(f"Cannot read previous translations {path}: {err}")
+        return None
+
+
+def _key(text: str) -> str:
+    return normalize_text(clean_text(text))
+
+
+def align_cues(
+    old: Sequence[Cue], new: Sequence[Cue], max_shift_ms: int = MAX_SHIFT_MS
+) -> dict[int, int]:
+    """Map positions in new to positions in old of the cues with the same text.
+
+    Both lists are in time order. Every new cue takes the first unmatched
+    old cue after the previous match that has the same text and starts
+    within max_shift_ms of it, so the pairs stay in order and the work is
+    linear in the cues for a bounded shift, however often texts repeat.
+    """
+    old_keys = [_key(cue.text) for cue in old]
+    matches: dict[int, int] = {}
+    # Old cues before this one are matched or were passed over for good.
+    first = 0
+    for new_pos, new_cue in enumerate(new):
+        earliest = new_cue.start_ms - max_shift_ms
+        latest = new_cue.start_ms + max_shift_ms
+        while first < len(old) and old[first].start_ms < earliest:
+            first += 1
+        key = _key(new_cue.text)
+        old_pos = first
+        while old_pos < len(old) and old[old_pos].start_ms <= latest:
+            if old_keys[old_pos] == key:
+                matches[new_pos] = old_pos
+                first = old_pos + 1
+                break
+            old_pos += 1
+    return matches
+
+
+def previous_translations(
+    cues: Sequence[Cue], outdir: str, language: str
+) -> list[str | None]:
+    """The translation from the previous run in outdir of every unchanged cue.
+
+    Cues are matched against the text the previous translations were made
+    from, not against the english output, which a run that failed part way
+    may have replaced without replacing the translation.
+    """
+    unchanged: list[str | None] = [None] * len(cues)
+    previous = read_sources(outdir, language)
+    if not previous:
+        return unchanged
+    old_sources, old_translations = previous
+    for new_pos, old_pos in align_cues(old_sources, cues).items():
+        unchanged[new_pos] = old_translations[old_pos]
+    return unchanged
@@ -0,0 +1,276 @@
+"""
+Process wide counters, gauges and histograms in the Prometheus text format.
+"""
+
+import argparse
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from video_subtitles.atomic_file import atomic_open
+
+# Path the metrics are written to when metrics_to() ends, like --metrics.
+METRICS_ENV = "VIDEO_SUBTITLES_METRICS"
+
+# Seconds, from a single backend request up to a long transcription.
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0,
+)  # fmt: skip
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """A named metric with a value per combination of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.lock = threading.Lock()
+
+    def label_values(self, labels: dict[str, object]) -> LabelValues:
+        """The label values in labelnames order, every label must be given."""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {list(self.labelnames)}, got {sorted(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> list[str]:
+        """The sample lines of the exposition."""
+        raise NotImplementedError
+
+    def exposition(self) -> str:
+        """The HELP, TYPE and sample lines."""
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        """Add amount to the counter."""
+        if amount < 0:
+            raise ValueError("Counters only go up")
+        key = self.label_values(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels: object) -> float:
+        """The current value."""
+        with self.lock:
+            return self.values.get(self.label_values(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        with self.lock:
+            values = sorted(self.values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    """A value that goes up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: object) -> None:
+        """Set the gauge."""
+        key = self.label_values(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self.label_values(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        """Subtract amount from the gauge."""
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Counts observations in cumulative buckets, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: the count of every bucket, the +Inf one last, and the sum.
+        self.values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        """Record an observation."""
+        key = self.label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            if key not in self.values:
+                self.values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = self.values[key]
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        """Observe the seconds the with block takes."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: object) -> int:
+        """The number of observations."""
+        with self.lock:
+            entry = self.values.get(self.label_values(labels))
+            return sum(entry[0]) if entry else 0
+
+    def samples(self) -> list[str]:
+        with self.lock:
+            values = sorted(
+                (key, (list(counts), total[0])) for key, (counts, total) in self.values.items()
+            )
+        lines: list[str] = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, key, f'le="{_format_value(bound)}"'
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """The metrics of the process, by name."""
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric, or return the one already registered under its name."""
+        with self.lock:
+            existing = self.metrics.get(metric.name)
+            if existing is None:
+                self.metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+            raise ValueError(f"Metric {metric.name} is already registered differently")
+        return existing
+
+    def exposition(self) -> str:
+        """Every metric in the Prometheus text format."""
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        return "".join(metric.exposition() + "\n" for metric in metrics)
+
+    def write(self, path: str) -> None:
+        """Write the exposition to a file, replacing it in one step for scrapers."""
+        with atomic_open(path) as file:
+            file.write(self.exposition())
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    """Get or register a counter."""
+    return REGISTRY.register(Counter(name, documentation, labelnames))  # type: ignore
+
+
+def gauge(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+    """Get or register a gauge."""
+    return REGISTRY.register(Gauge(name, documentation, labelnames))  # type: ignore
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...] = (),
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """Get or register a histogram."""
+    return REGISTRY.register(  # type: ignore
+        Histogram(name, documentation, labelnames, buckets)
+    )
+
+
+def get_metrics_path(metrics: str | None = None) -> str | None:
+    """The metrics file from the command line, or else the environment."""
+    return metrics or os.environ.get(METRICS_ENV) or None
+
+
+def add_metrics_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the --metrics option read by metrics_to()."""
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        help="Write Prometheus metrics to this file when done, "
+        f"or set {METRICS_ENV}.",
+    )
+
+
+def write_metrics(path: str) -> None:
+    """Write every metric to a file."""
+    REGISTRY.write(path)
+    print(f"Metrics written to {os.path.abspath(path)}")
+
+
+@contextmanager
+def metrics_to(metrics: str | None = None) -> Iterator[None]:
+    """Write the metrics to the file from the command line or the environment
+    when the with block ends."""
+    path = get_metrics_path(metrics)
+    try:
+        yield
+    finally:
+        if path:
+            write_metrics(path)
@@ -0,0 +1,151 @@
+"""
+Adaptive rate limiting for the translation backends.
+
+Each backend gets a token bucket that bounds requests per second and an
+AIMD (additive increase, multiplicative decrease) limit on concurrent
+requests. Throttle responses halve both and honor any Retry-After, every
+success grows them back, so throughput settles just under the account limit.
+"""
+
+import random
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+THROTTLE_STATUS_CODES = (429, 503, 529)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full jitter exponential backoff delay for a retry attempt (0 based)."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def parse_retry_after(headers: Any) -> float | None:
+    """The seconds of a Retry-After header, None if missing or not a number."""
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_throttle_info(err: BaseException) -> tuple[bool, float | None]:
+    """Returns (is_throttled, retry_after_seconds) for an exception.
+
+    Understands the DeepL exceptions (http_status_code, TooManyRequests),
+    requests style exceptions carrying a response, and falls back to the
+    message text for the web backends.
+    """
+    status = getattr(err, "http_status_code", None)
+    retry_after: float | None = None
+    response = getattr(err, "response", None)
+    if response is not None:
+        status = getattr(response, "status_code", status)
+        retry_after = parse_retry_after(getattr(response, "headers", None) or {})
+    if status in THROTTLE_STATUS_CODES:
+        return True, retry_after
+    if "TooManyRequests" in type(err).__name__:
+        return True, retry_after
+    message = str(err).lower()
+    throttled = "too many requests" in message or "rate limit" in message
+    return throttled, retry_after
+
+
+class AdaptiveLimiter:  # pylint: disable=too-many-instance-attributes
+    """Token bucket plus AIMD concurrency limit for one backend."""
+
+    def __init__(
+        self,
+        rate: float,
+        max_concurrency: int,
+        min_rate: float = 0.1,
+        max_rate: float | None = None,
+        max_attempts: int = 6,
+    ) -> None:
+        self.lock = threading.Condition()
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate * 4
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(max_concurrency)
+        self.max_attempts = max_attempts
+        self.tokens = max(1.0, rate)
+        self.in_flight = 0
+        self.last_refill = time.monotonic()
+        self.paused_until = 0.0
+        self.throttled = 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(
+            max(1.0, self.rate), self.tokens + (now - self.last_refill) * self.rate
+        )
+        self.last_refill = now
+
+    def acquire(self) -> None:
+        """Blocks until a request may be sent."""
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.in_flight >= int(self.concurrency):
+                    wait = 1.0
+                elif self.tokens < 1.0:
+                    wait = (1.0 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1.0
+                    self.in_flight += 1
+                    return
+                self.lock.wait(wait)
+
+    def release(self, throttled: bool = False, retry_after: float | None = None) -> None:
+        """Reports the outcome of a request started with acquire()."""
+        with self.lock:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.concurrency = max(1.0, self.concurrency / 2)
+                if retry_after:
+                    self.paused_until = max(
+                        self.paused_until, time.monotonic() + retry_after
+                    )
+            else:
+                self.rate = min(self.max_rate, self.rate + 0.1)
+                self.concurrency = min(
+                    float(self.max_concurrency),
+                    self.concurrency + 1.0 / self.concurrency,
+                )
+            self.lock.notify_all()
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Calls func under the limiter, retrying only throttled attempts."""
+        for attempt in range(self.max_attempts):
+            self.acquire()
+            try:
+                out = func(*args, **kwargs)
+            except Exception as err:  # pylint: disable=broad-except
+                throttled, retry_after = get_throttle_info(err)
+                self.release(throttled, retry_after)
+                if not throttled or attempt == self.max_attempts - 1:
+                    raise
+                delay = retry_after or backoff_delay(attempt)
+                print(f"... Throttled ({err}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            self.release()
+            return out
+        raise AssertionError("unreachable")
+
+    def status(self) -> str:
+        """Current rate and concurrency, for progress output."""
+        with self.lock:
+            return (
+                f"{self.rate:.1f} req/s, {int(self.concurrency)} concurrent, "
+                f"{self.throttled} throttled"
+            )
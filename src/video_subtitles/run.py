@@ -5,31 +5,90 @@ Runs the program
 import atexit
 import concurrent.futures
 import os
+import queue
 import shutil
+import tempfile
+import threading
 import traceback
-from hashlib import md5
+from dataclasses import dataclass
+from typing import Iterator, Sequence
 
 from appdirs import user_config_dir  # type: ignore
 from disklru import DiskLRUCache  # type: ignore
 
-from video_subtitles.convert_to_webvtt import convert_to_webvtt as convert_webvtt
-from video_subtitles.translate import srt_wrap, translate
+from video_subtitles.chunking import (
+    Chunk,
+    extract_audio,
+    find_split_points,
+    iter_transcribed_chunks,
+    split_wav,
+)
+from video_subtitles.file_digest import file_digest
+from video_subtitles.gpu_scheduler import GpuScheduler
+from video_subtitles.incremental import previous_translations, write_sources
+from video_subtitles.metrics import counter, histogram
+from video_subtitles.rate_limit import backoff_delay
+from video_subtitles.srt_cues import (
+    Cue,
+    format_srt,
+    parse_srt,
+    read_srt,
+    sort_and_reindex,
+)
+from video_subtitles.subtitle_formats import SubtitleWriter, emit
+from video_subtitles.tracing import span
+from video_subtitles.translate import translate_cues, wrap_cues
+from video_subtitles.translation_backends import get_backend_name, get_default_workers
 from video_subtitles.util import read_utf8
 
-ALLOW_CONCURRENT_TRANSLATION = False
+CACHE_FILE = user_config_dir("video-subtitles", "cache", roaming=True)
+DIGEST_CACHE_FILE = CACHE_FILE + "-digests"
+# Granularity of streaming mode, the first chunk sets the time to the first
+# translated subtitle.
+DEFAULT_STREAM_CHUNK_MINUTES = 2.0
 
-CACHE_FILE = os.path.join(user_config_dir("video-subtitles", "cache", roaming=True))
+TRANSCRIPTION_CACHE = counter(
+    "videosubtitles_transcription_cache_total",
+    "Transcription cache lookups by result.",
+    ("result",),
+)
+TRANSCRIBE_SECONDS = histogram(
+    "videosubtitles_transcribe_seconds",
+    "Seconds spent transcribing a file that was not cached.",
+    ("model",),
+)
+TRANSLATE_SECONDS = histogram(
+    "videosubtitles_translate_seconds",
+    "Seconds spent on one attempt at translating cues to one language.",
+    ("backend",),
+)
+TRANSLATIONS = counter(
+    "videosubtitles_translations_total",
+    "Translations of a transcript to one language by result.",
+    ("backend", "result"),
+)
+REUSED_TRANSLATIONS = counter(
+    "videosubtitles_reused_translations_total",
+    "Cues whose translation was reused from the previous run, or translated.",
+    ("result",),
+)
+TRANSLATION_RETRIES = counter(
+    "videosubtitles_translation_retries_total",
+    "Translations retried after a failure.",
+    ("backend",),
+)
 
 
-def find_srt_files(folder: str) -> list[str]:
-    """Find srt files in a folder."""
-    files = []
-    # os walk
-    for root, _, filenames in os.walk(folder):
-        for filename in filenames:
-            if filename.endswith(".srt"):
-                files.append(os.path.join(root, filename))
-    return files
+def get_transcription_dir(
+    file: str, output_root: str | None = None, output_name: str | None = None
+) -> str:
+    """Get the folder the english transcription of a file is written to.
+
+    This is text_<name>/en under output_root, or the current directory,
+    where name is output_name or else the file name without extension.
+    """
+    name = output_name or os.path.splitext(os.path.basename(file))[0]
+    return os.path.abspath(os.path.join(output_root or "", f"text_{name}", "en"))
 
 
 def cleanup(file: str):
@@ -41,18 +100,158 @@ def cleanup(file: str):
             print(f"Error removing {file}: {err}")
 
 
-def run(  # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+# The web translators leave a geckodriver log in the working directory.
+atexit.register(cleanup, os.path.abspath("geckodriver.log"))
+
+
+@dataclass(frozen=True)
+class Transcript:
+    """The english transcription of a file."""
+
+    file: str
+    outdir: str
+    out_en_dir: str
+    cues: tuple[Cue, ...]
+
+
+def transcribe_on_device(  # pylint: disable=too-many-arguments
     file: str,
-    deepl_api_key: str | None,
-    out_languages: list[str],
+    output_dir: str,
     model: str,
-    convert_to_webvtt: bool,
+    device: str,
+    scheduler: GpuScheduler | None = None,
+    cancel_event: threading.Event | None = None,
 ) -> str:
-    """Run the program."""
+    """Transcribe a file to output_dir/out.srt, on a scheduled video card for cuda.
+
+    Returns the absolute output_dir.
+    """
     from transcribe_anything.api import (  # pylint: disable=import-outside-toplevel
         transcribe,
     )
-    from transcribe_anything.util import get_computing_device  # pylint: disable=import-outside-toplevel
+
+    scheduled = device == "cuda" and scheduler is not None and scheduler.fits(model)
+    if device == "cuda" and scheduler is not None and scheduler.cards and not scheduled:
+        print(f"Model {model} fits on no video card by itself, transcribing unscheduled")
+    if scheduler is None or not scheduled:
+        with span("whisper", file=file, model=model, device=device):
+            output_dir = transcribe(
+                url_or_file=file,
+                output_dir=output_dir,
+                device=device,
+                model=model,
+                language="en",
+            )
+        return os.path.abspath(output_dir)
+    with span("gpu_wait", model=model):
+        card = scheduler.acquire(model, cancel_event)
+    try:
+        print(f"Transcribing {file} on video card [{card.idx}]: {card.name}")
+        # Appended after transcribe_anything's own --device, so whisper
+        # uses the last one.
+        with span("whisper", file=file, model=model, device=f"cuda:{card.idx}"):
+            output_dir = transcribe(
+                url_or_file=file,
+                output_dir=output_dir,
+                device=device,
+                model=model,
+                language="en",
+                other_args=["--device", f"cuda:{card.idx}"],
+            )
+    finally:
+        scheduler.release(card, model)
+    return os.path.abspath(output_dir)
+
+
+def iter_transcribe_chunked(  # pylint: disable=too-many-arguments
+    file: str,
+    model: str,
+    device: str,
+    chunk_minutes: float,
+    chunk_workers: int | None = None,
+    scheduler: GpuScheduler | None = None,
+    cancel_event: threading.Event | None = None,
+) -> Iterator[list[Cue]]:
+    """Transcribe a file in pieces split at quiet points, in parallel.
+
+    The cues of every piece are yielded in order as soon as they are ready.
+    chunk_workers defaults to as many pieces as fit on the video cards, or
+    half the cpu cores without them.
+    """
+    if chunk_workers is None:
+        if scheduler is not None and scheduler.cards and device == "cuda":
+            chunk_workers = max(1, scheduler.capacity(model))
+        else:
+            chunk_workers = max(1, (os.cpu_count() or 2) // 2)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        wav_path = os.path.join(tmpdir, "audio.wav")
+        extract_audio(file, wav_path)
+        points = find_split_points(wav_path, chunk_minutes * 60)
+        chunks = split_wav(wav_path, points, tmpdir)
+        os.remove(wav_path)
+        print(
+            f"Transcribing {file} in {len(chunks)} chunks with {chunk_workers} workers"
+        )
+
+        def transcribe_chunk(chunk: Chunk) -> list[Cue]:
+            if cancel_event is not None and cancel_event.is_set():
+                raise RuntimeError(f"Cancelled: {file}")
+            chunk_dir = os.path.splitext(chunk.path)[0]
+            chunk_dir = transcribe_on_device(
+                chunk.path, chunk_dir, model, device, scheduler, cancel_event
+            )
+            return list(read_srt(os.path.join(chunk_dir, "out.srt")))
+
+        yield from iter_transcribed_chunks(chunks, transcribe_chunk, chunk_workers)
+
+
+def transcribe_chunked(  # pylint: disable=too-many-arguments
+    file: str,
+    model: str,
+    device: str,
+    chunk_minutes: float,
+    chunk_workers: int | None = None,
+    scheduler: GpuScheduler | None = None,
+    cancel_event: threading.Event | None = None,
+) -> list[Cue]:
+    """Transcribe a file in pieces split at quiet points, in parallel."""
+    segments = iter_transcribe_chunked(
+        file, model, device, chunk_minutes, chunk_workers, scheduler, cancel_event
+    )
+    return [cue for segment in segments for cue in segment]
+
+
+def get_transcription_key(file: str, model: str) -> str:
+    """The transcription cache key of a file and model."""
+    # Keyed on the file contents so that renamed or copied media hits the
+    # cache and media replaced in place is transcribed again.
+    with span("file_digest"):
+        digest = file_digest(file, DiskLRUCache(DIGEST_CACHE_FILE, 1024))
+    return f"{digest}-{model}"
+
+
+def transcribe_file(  # pylint: disable=too-many-arguments,too-many-locals
+    file: str,
+    model: str,
+    device: str | None = None,
+    output_root: str | None = None,
+    scheduler: GpuScheduler | None = None,
+    cancel_event: threading.Event | None = None,
+    chunk_minutes: float | None = None,
+    chunk_workers: int | None = None,
+    output_name: str | None = None,
+) -> Transcript:
+    """Transcribe a file to english, or fetch it from the transcription cache.
+
+    With a scheduler, cuda transcriptions wait for a video card with enough
+    free memory for the model and run pinned to it. With chunk_minutes the
+    audio is split at quiet points into pieces about that long, which are
+    transcribed chunk_workers at a time. output_name overrides the name of
+    the text_<name> output folder.
+    """
+    from transcribe_anything.util import (  # pylint: disable=import-outside-toplevel
+        get_computing_device,
+    )
 
     if file != file.strip():
         raise RuntimeError(
@@ -61,119 +260,440 @@ def run(  # pylint: disable=too-many-locals,too-many-branches,too-many-statement
     cache = DiskLRUCache(CACHE_FILE, 16)
     file = os.path.abspath(file)
     print("Running transcription")
-    out_languages = out_languages.copy()
-    print(f"Output languages: {out_languages}")
     print(f"Model: {model}")
     print(f"File: {file}")
-    print("Done running transcription")
-    if deepl_api_key == "free":
-        deepl_api_key = None
-    device = get_computing_device()
-    filemd5 = md5(file.encode("utf-8")).hexdigest()
-    key = f"{file}-{filemd5}-{model}"
-    cached_data = cache.get_json(key)
+    key = get_transcription_key(file, model)
+    out_en_dir = get_transcription_dir(file, output_root, output_name)
+    with span("transcription_cache"):
+        cached_data = cache.get_json(key)
+    TRANSCRIPTION_CACHE.inc(result="hit" if cached_data else "miss")
     if cached_data:
         print("Using cached data")
-        out_en_dir = cached_data["out_en_dir"]
-        os.makedirs(out_en_dir, exist_ok=True)
         srt_text = cached_data["srt_text"]
-        if not os.path.exists(os.path.join(out_en_dir, "out.srt")):
-            with open(os.path.join(out_en_dir, "out.srt"), "w", encoding="utf-8") as f:
-                f.write(srt_text)
     else:
-        out_en_dir = transcribe(
-            url_or_file=file, device=device, model=model, language="en"
-        )
-        out_en_dir = os.path.abspath(out_en_dir)
-        srt_text = read_utf8(os.path.join(out_en_dir, "out.srt"))
-        cache.put_json(key, {"out_en_dir": out_en_dir, "srt_text": srt_text})
-    print(f"Output directory: {out_en_dir}")
-    if not os.path.exists(out_en_dir):
-        raise RuntimeError(f"Error - folder does not exist: {out_en_dir}")
-    if "en" in out_languages:
-        out_languages.remove("en")
-    src_srt_file = os.path.join(out_en_dir, "out.srt")
-    assert os.path.exists(src_srt_file), f"Error - file does not exist: {src_srt_file}"
+        device = device or get_computing_device()
+        with span(
+            "transcribe", model=model, chunked=bool(chunk_minutes)
+        ), TRANSCRIBE_SECONDS.time(model=model):
+            if chunk_minutes:
+                chunk_cues = transcribe_chunked(
+                    file,
+                    model,
+                    device,
+                    chunk_minutes,
+                    chunk_workers,
+                    scheduler,
+                    cancel_event,
+                )
+                srt_text = "".join(format_srt(chunk_cues))
+            else:
+                out_en_dir = transcribe_on_device(
+                    file, out_en_dir, model, device, scheduler, cancel_event
+                )
+                srt_text = read_utf8(os.path.join(out_en_dir, "out.srt"))
+        print("Done running transcription")
+        cache.put_json(key, {"srt_text": srt_text})
     outdir = os.path.dirname(out_en_dir)
-    tasks: list = []
-    for language in out_languages:
-
-        def do_translation(language: str = language):
-            print(f"Translating to: {language}")
-            out_folder = os.path.join(outdir, language)
-            os.makedirs(out_folder, exist_ok=True)
-            out_file = os.path.join(out_folder, "out.srt")
-            attempts = 5
-            for i in range(attempts):
-                if i > 0:
-                    print("Retrying...")
-                try:
-                    if os.path.exists(out_file):
-                        os.remove(out_file)
-                    translate(
-                        api_key=deepl_api_key,
-                        in_srt=src_srt_file,
-                        out_srt=out_file,
-                        from_lang="EN",
-                        to_lang=language.upper(),
-                    )
-                    assert os.path.exists(
-                        out_file
-                    ), f"Error during translation of {language}: file does not exist: {out_file}"
-                    break
-                except Exception as err:  # pylint: disable=broad-except
-                    print(err)
-                    # print stack trace
-                    traceback.print_exc()
-                    if i == attempts - 1:
-                        raise
-            print(f"Translated: {src_srt_file} -> {out_file}")
-
-        tasks.append(do_translation)
-    exceptions = []
-    if not ALLOW_CONCURRENT_TRANSLATION or deepl_api_key is not None:
-        # This is super fast so just run all the tasks one at a time
-        for task in tasks:
-            try:
-                task()
-            except Exception as err:  # pylint: disable=broad-except
-                traceback.print_exc()
-                exceptions.append(err)
-    else:
-        # Free api version uses selenium and is slow so run in parallel.
+    print(f"Output directory: {outdir}")
+    os.makedirs(outdir, exist_ok=True)
+    # Parsed once and shared read-only by every language job.
+    with span("parse_transcript"):
+        cues = tuple(
+            sort_and_reindex(parse_srt(srt_text.splitlines(keepends=True)))
+        )
+    return Transcript(file=file, outdir=outdir, out_en_dir=out_en_dir, cues=cues)
+
+
+def translate_with_retries(  # pylint: disable=too-many-arguments
+    deepl_api_key: str | None,
+    cues: Sequence[Cue],
+    language: str,
+    cancel_event: threading.Event,
+    journal_path: str | None = None,
+    attempts: int = 5,
+) -> list[Cue]:
+    """Translate english cues to a language, retrying failures with backoff."""
+    backend = get_backend_name(deepl_api_key)
+    attempt = 0
+    while True:
+        try:
+            with TRANSLATE_SECONDS.time(backend=backend):
+                translated = translate_cues(
+                    api_key=deepl_api_key,
+                    cues=cues,
+                    from_lang="EN",
+                    to_lang=language.upper(),
+                    journal_path=journal_path,
+                    cancel_event=cancel_event,
+                )
+            TRANSLATIONS.inc(backend=backend, result="ok")
+            return translated
+        except Exception as err:  # pylint: disable=broad-except
+            print(err)
+            # print stack trace
+            traceback.print_exc()
+            attempt += 1
+            if attempt == attempts or cancel_event.is_set():
+                TRANSLATIONS.inc(backend=backend, result="failed")
+                raise
+        TRANSLATION_RETRIES.inc(backend=backend)
+        delay = backoff_delay(attempt)
+        print(f"Retrying in {delay:.1f}s...")
+        if cancel_event.wait(delay):
+            raise RuntimeError("Translation cancelled")
+
+
+def raise_translation_errors(exceptions: dict[str, BaseException]) -> None:
+    """Print the error of every language that failed and raise if any did."""
+    if not exceptions:
+        return
+    print("Exceptions:")
+    for language, exception in exceptions.items():
+        print(f"  {language}: {exception}")
+    raise RuntimeError(
+        f"Exceptions occurred during translation of: {', '.join(exceptions)}"
+    )
+
+
+def translate_changed(  # pylint: disable=too-many-arguments
+    deepl_api_key: str | None,
+    cues: Sequence[Cue],
+    language: str,
+    cancel_event: threading.Event,
+    outdir: str,
+    journal_path: str | None = None,
+) -> list[Cue]:
+    """Translate the cues that changed since the previous run in outdir.
+
+    Cues whose english text is unchanged, at about the same time, keep the
+    translation of the previous run, the rest are translated.
+    """
+    previous = previous_translations(cues, outdir, language)
+    changed = [cue for cue, text in zip(cues, previous) if text is None]
+    reused = len(cues) - len(changed)
+    REUSED_TRANSLATIONS.inc(reused, result="reused")
+    REUSED_TRANSLATIONS.inc(len(changed), result="translated")
+    if reused:
+        print(f"Reusing {reused}/{len(cues)} {language} translations from the previous run")
+    translated = iter(
+        translate_with_retries(
+            deepl_api_key, changed, language, cancel_event, journal_path=journal_path
+        )
+        if changed
+        else []
+    )
+    return [
+        cue._replace(text=text) if text is not None else next(translated)
+        for cue, text in zip(cues, previous)
+    ]
+
+
+def translate_transcript(  # pylint: disable=too-many-locals,too-many-arguments
+    transcript: Transcript,
+    deepl_api_key: str | None,
+    out_languages: list[str],
+    formats: list[str],
+    translation_workers: int | None = None,
+    cancel_event: threading.Event | None = None,
+    reuse_translations: bool = True,
+) -> str:
+    """Translate a transcript to every language and write the subtitle files.
+
+    Languages are translated concurrently by translation_workers threads,
+    which defaults to a per backend value. Every language is written to
+    <outdir>/<language>.<ext> for each of formats. With reuse_translations,
+    only the cues that changed since the outputs already in outdir are
+    translated. Setting cancel_event stops the translations early.
+    """
+    if deepl_api_key == "free":
+        deepl_api_key = None
+    out_languages = [language for language in out_languages if language != "en"]
+    print(f"Output languages: {out_languages}")
+    outdir = transcript.outdir
+    cancel_event = cancel_event or threading.Event()
+
+    def do_translation(language: str) -> None:
+        print(f"Translating to: {language}")
+        journal_path = os.path.join(outdir, f"{language}.journal.jsonl")
+        with span("translate", language=language):
+            if reuse_translations:
+                cues = translate_changed(
+                    deepl_api_key,
+                    transcript.cues,
+                    language,
+                    cancel_event,
+                    outdir,
+                    journal_path=journal_path,
+                )
+            else:
+                cues = translate_with_retries(
+                    deepl_api_key,
+                    transcript.cues,
+                    language,
+                    cancel_event,
+                    journal_path=journal_path,
+                )
+        with span("write_outputs", language=language):
+            out_files = emit(cues, os.path.join(outdir, language), language, formats)
+            write_sources(outdir, language, transcript.cues, cues)
+        print(f"Translated: {language} -> {', '.join(out_files)}")
+
+    if translation_workers is None:
+        translation_workers = get_default_workers(get_backend_name(deepl_api_key))
+    exceptions: dict[str, BaseException] = {}
+    if out_languages:
         print(
-            "Free version of translation api is slow, so translating in parallel: "
-            f"{len(tasks)} tasks"
+            f"Translating {len(out_languages)} languages with "
+            f"{translation_workers} workers"
+        )
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=translation_workers
+        )
+        futures = {
+            executor.submit(do_translation, language): language
+            for language in out_languages
+        }
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                err = future.exception()
+                if err is not None:
+                    exceptions[futures[future]] = err
+        except KeyboardInterrupt:
+            print("Keyboard interrupt detected, cancelling translations...")
+            cancel_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+    with span("write_outputs", language="en"):
+        emit(wrap_cues(transcript.cues), os.path.join(outdir, "en"), "en", formats)
+    # Only the transcript text was needed from transcribe's output folder.
+    with span("cleanup"):
+        shutil.rmtree(transcript.out_en_dir, ignore_errors=True)
+    print("########################\n# Done translating!\n########################\n")
+    raise_translation_errors(exceptions)
+    return outdir
+
+
+def stream_transcript(  # pylint: disable=too-many-arguments
+    file: str,
+    model: str,
+    device: str | None = None,
+    output_root: str | None = None,
+    scheduler: GpuScheduler | None = None,
+    cancel_event: threading.Event | None = None,
+    chunk_minutes: float = DEFAULT_STREAM_CHUNK_MINUTES,
+    chunk_workers: int | None = None,
+) -> tuple[str, Iterator[list[Cue]]]:
+    """Start transcribing a file a chunk at a time.
+
+    Returns the output folder and an iterator over the cues of each chunk,
+    in order, as they are transcribed. The full transcript is cached once
+    the iterator is exhausted; a cached transcript is yielded all at once.
+    """
+    from transcribe_anything.util import (  # pylint: disable=import-outside-toplevel
+        get_computing_device,
+    )
+
+    if file != file.strip():
+        raise RuntimeError(
+            f"File {os.path.basename(file)} cannot contain spaces at the beginning or end"
         )
-        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-            try:
-                executor.map(lambda x: x(), tasks)
-            except KeyboardInterrupt:
-                print("Keyboard interrupt detected, exiting...")
-                executor.shutdown(wait=False, cancel_futures=True)
-    srt_wrap(src_srt_file)
-    srt_files = find_srt_files(outdir)
-    print(f"Found {len(srt_files)} srt files")
-    for srt_file in srt_files:
-        language_name = os.path.basename(os.path.dirname(srt_file))
-        out_file = os.path.join(outdir, f"{language_name}.srt")
-        if os.path.exists(out_file):
-            os.remove(out_file)
-        shutil.move(srt_file, out_file)
-        shutil.rmtree(os.path.dirname(srt_file))
-    if convert_to_webvtt:
-        srt_files = find_srt_files(outdir)
-        for srt_file in srt_files:
-            webvtt_file = os.path.splitext(srt_file)[0] + ".vtt"
-            if os.path.exists(webvtt_file):
-                os.remove(webvtt_file)
-            convert_webvtt(srt_file, webvtt_file)
-            os.remove(srt_file)
-    atexit.register(cleanup, os.path.abspath("geckodriver.log"))
+    file = os.path.abspath(file)
+    print(f"Streaming transcription of {file} with model {model}")
+    key = get_transcription_key(file, model)
+    outdir = os.path.dirname(get_transcription_dir(file, output_root))
+    print(f"Output directory: {outdir}")
+    os.makedirs(outdir, exist_ok=True)
+
+    def segments() -> Iterator[list[Cue]]:
+        cache = DiskLRUCache(CACHE_FILE, 16)
+        with span("transcription_cache"):
+            cached_data = cache.get_json(key)
+        TRANSCRIPTION_CACHE.inc(result="hit" if cached_data else "miss")
+        if cached_data:
+            print("Using cached data")
+            srt_text = cached_data["srt_text"]
+            yield sort_and_reindex(parse_srt(srt_text.splitlines(keepends=True)))
+            return
+        cues: list[Cue] = []
+        for segment in iter_transcribe_chunked(
+            file,
+            model,
+            device or get_computing_device(),
+            chunk_minutes,
+            chunk_workers,
+            scheduler,
+            cancel_event,
+        ):
+            cues.extend(segment)
+            yield segment
+        cache.put_json(key, {"srt_text": "".join(format_srt(cues))})
+
+    return outdir, segments()
+
+
+def translate_stream(  # pylint: disable=too-many-arguments,too-many-locals,too-many-statements
+    segments: Iterator[list[Cue]],
+    outdir: str,
+    deepl_api_key: str | None,
+    out_languages: list[str],
+    formats: list[str],
+    translation_workers: int | None = None,
+    cancel_event: threading.Event | None = None,
+) -> str:
+    """Translate cues as they are transcribed and append them to the outputs.
+
+    Every language has a thread that translates the segments in order and
+    appends them to its files, with at most translation_workers segments
+    being translated at once. The files replace those of a previous run
+    only once complete, so an interrupted stream leaves the previous outputs
+    as they were. A language that fails has its unfinished files removed
+    while the others carry on.
+    """
+    if deepl_api_key == "free":
+        deepl_api_key = None
+    out_languages = [language for language in out_languages if language != "en"]
+    print(f"Output languages: {out_languages}")
+    cancel_event = cancel_event or threading.Event()
+    if translation_workers is None:
+        translation_workers = get_default_workers(get_backend_name(deepl_api_key))
+    slots = threading.Semaphore(translation_workers)
+    queues: dict[str, queue.Queue] = {language: queue.Queue() for language in out_languages}
+    exceptions: dict[str, BaseException] = {}
+
+    def language_worker(language: str) -> None:
+        try:
+            writer = SubtitleWriter(os.path.join(outdir, language), language, formats)
+        except BaseException as err:  # pylint: disable=broad-except
+            exceptions[language] = err
+            return
+        try:
+            while True:
+                segment = queues[language].get()
+                if segment is None or cancel_event.is_set():
+                    break
+                with slots, span("translate", language=language):
+                    cues = translate_with_retries(
+                        deepl_api_key, segment, language, cancel_event
+                    )
+                with span("write_outputs", language=language):
+                    writer.write(cues)
+            if cancel_event.is_set():
+                raise RuntimeError("Translation cancelled")
+        except BaseException as err:  # pylint: disable=broad-except
+            writer.abort()
+            exceptions[language] = err
+            return
+        out_files = writer.close()
+        print(f"Translated: {language} -> {', '.join(out_files)}")
+
+    threads = [
+        threading.Thread(target=language_worker, args=(language,), daemon=True)
+        for language in out_languages
+    ]
+    for thread in threads:
+        thread.start()
+    en_writer = SubtitleWriter(os.path.join(outdir, "en"), "en", formats)
+    try:
+        for segment in segments:
+            if cancel_event.is_set():
+                raise RuntimeError("Transcription cancelled")
+            with span("write_outputs", language="en"):
+                en_writer.write(wrap_cues(segment))
+            for language_queue in queues.values():
+                language_queue.put(segment)
+    except BaseException:
+        cancel_event.set()
+        en_writer.abort()
+        raise
+    else:
+        en_writer.close()
+    finally:
+        for language_queue in queues.values():
+            language_queue.put(None)
+        # Also on failure, so no language leaves its unfinished files behind.
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            print("Keyboard interrupt detected, cancelling translations...")
+            cancel_event.set()
+            raise
     print("########################\n# Done translating!\n########################\n")
-    if exceptions:
-        print("Exceptions:")
-        for exception in exceptions:
-            print(exception)
-        raise RuntimeError("Exceptions occurred during translation")
+    raise_translation_errors(exceptions)
     return outdir
+
+
+def run(  # pylint: disable=too-many-arguments,too-many-locals
+    file: str,
+    deepl_api_key: str | None,
+    out_languages: list[str],
+    model: str,
+    convert_to_webvtt: bool,
+    translation_workers: int | None = None,
+    formats: list[str] | None = None,
+    output_root: str | None = None,
+    cancel_event: threading.Event | None = None,
+    scheduler: GpuScheduler | None = None,
+    chunk_minutes: float | None = None,
+    chunk_workers: int | None = None,
+    stream: bool = False,
+    device: str | None = None,
+    reuse_translations: bool = True,
+) -> str:
+    """Run the program.
+
+    Every language is written to <outdir>/<language>.<ext> for each of
+    formats, which defaults to vtt or srt depending on convert_to_webvtt.
+    The output folder is created in output_root, or the current directory.
+    With stream, translation starts on each chunk of chunk_minutes as soon
+    as it is transcribed, and the outputs replace the previous ones once
+    the last chunk is done. The computing device is probed when not given.
+    With reuse_translations, cues unchanged since a previous run into the
+    same folder keep their translations; streaming always translates
+    everything.
+    """
+    if not formats:
+        formats = ["vtt"] if convert_to_webvtt else ["srt"]
+    with span("run", file=file, model=model, stream=stream):
+        if stream:
+            outdir, segments = stream_transcript(
+                file=file,
+                model=model,
+                device=device,
+                output_root=output_root,
+                scheduler=scheduler,
+                cancel_event=cancel_event,
+                chunk_minutes=chunk_minutes or DEFAULT_STREAM_CHUNK_MINUTES,
+                chunk_workers=chunk_workers,
+            )
+            return translate_stream(
+                segments=segments,
+                outdir=outdir,
+                deepl_api_key=deepl_api_key,
+                out_languages=out_languages,
+                formats=formats,
+                translation_workers=translation_workers,
+                cancel_event=cancel_event,
+            )
+        transcript = transcribe_file(
+            file=file,
+            model=model,
+            device=device,
+            output_root=output_root,
+            scheduler=scheduler,
+            cancel_event=cancel_event,
+            chunk_minutes=chunk_minutes,
+            chunk_workers=chunk_workers,
+        )
+        if cancel_event is not None and cancel_event.is_set():
+            raise RuntimeError(f"Cancelled: {file}")
+        return translate_transcript(
+            transcript=transcript,
+            deepl_api_key=deepl_api_key,
+            out_languages=out_languages,
+            formats=formats,
+            translation_workers=translation_workers,
+            cancel_event=cancel_event,
+            reuse_translations=reuse_translations,
+        )
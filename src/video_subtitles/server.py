@@ -0,0 +1,414 @@
+"""
+Job server: a long running process that takes subtitle jobs over a local
+HTTP API, so the translation stack, the video card scheduler and the
+translator sessions are set up once instead of once per file.
+
+    POST   /jobs        {"file": ..., "languages": ["es"], ...} -> {"id": ...}
+    GET    /jobs        every job
+    GET    /jobs/<id>   state, outputs and error of a job
+    DELETE /jobs/<id>   cancel a job
+    GET    /health      worker counts
+    GET    /metrics     Prometheus metrics
+"""
+
+# pylint: disable=import-outside-toplevel
+
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+from video_subtitles.metrics import REGISTRY
+from video_subtitles.subtitle_formats import check_formats
+from video_subtitles.thread_processor import (
+    DEFAULT_CONCURRENT_JOBS,
+    DONE,
+    Job,
+    ThreadProcessor,
+)
+from video_subtitles.util import MODELS, check_languages, check_workers
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Finished jobs kept for status queries, the oldest are forgotten first.
+MAX_FINISHED_JOBS = 1000
+
+
+@dataclass
+class JobRequest:  # pylint: disable=too-many-instance-attributes
+    """The parameters of a subtitle job."""
+
+    file: str
+    languages: list[str]
+    model: str = "large"
+    formats: list[str] = field(default_factory=lambda: ["srt"])
+    output_dir: str | None = None
+    chunk_minutes: float | None = None
+    stream: bool = False
+    priority: int = 0
+
+
+def _parse_list(
+    name: str, values: Any, check: Callable[[list[str]], list[str]]
+) -> list[str]:
+    if not isinstance(values, list) or not values:
+        raise ValueError(f"{name} must be a non-empty list")
+    return check([str(value) for value in values])
+
+
+def parse_job_request(data: Any) -> JobRequest:
+    """Validate a JSON job request, raises ValueError on bad input."""
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    unknown = set(data) - {item.name for item in fields(JobRequest)}
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    try:
+        request = JobRequest(**data)
+    except TypeError as err:
+        raise ValueError(str(err)) from err
+    if not isinstance(request.file, str) or not os.path.isfile(request.file):
+        raise ValueError(f"File does not exist: {request.file}")
+    request.file = os.path.abspath(request.file)
+    request.languages = _parse_list("languages", request.languages, check_languages)
+    if request.model not in MODELS:
+        raise ValueError(f"Unknown model: {request.model}")
+    request.formats = _parse_list("formats", request.formats, check_formats)
+    if request.chunk_minutes is not None and not (
+        isinstance(request.chunk_minutes, (int, float)) and request.chunk_minutes > 0
+    ):
+        raise ValueError("chunk_minutes must be positive")
+    if not isinstance(request.stream, bool):
+        raise ValueError("stream must be true or false")
+    if not isinstance(request.priority, int):
+        raise ValueError("priority must be an integer")
+    return request
+
+
+class JobServer:  # pylint: disable=too-many-instance-attributes
+    """Queues subtitle jobs and runs them in this process.
+
+    Jobs share the process wide translation backends, their connection
+    pools and browsers, the translation memory and one video card
+    scheduler, and the computing device is probed once.
+    """
+
+    def __init__(
+        self,
+        deepl_api_key: str | None,
+        workers: int = DEFAULT_CONCURRENT_JOBS,
+        translation_workers: int | None = None,
+        run_job: Callable[..., str] | None = None,
+    ) -> None:
+        self.deepl_api_key = deepl_api_key
+        self.translation_workers = translation_workers
+        self.processor = ThreadProcessor(workers)
+        self.jobs: dict[str, Job] = {}
+        self.requests: dict[str, JobRequest] = {}
+        self.submitted: dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.device: str | None = None
+        self.scheduler: Any = None
+        self.run_job = run_job
+
+    def start(self) -> None:
+        """Load the transcription and translation stack and start the workers."""
+        if self.run_job is None:
+            from transcribe_anything.util import get_computing_device
+
+            from video_subtitles.gpu_scheduler import GpuScheduler
+            from video_subtitles.run import run
+            from video_subtitles.translation_backends import get_backend
+            from video_subtitles.util import cached_cuda_video_cards
+
+            self.device = get_computing_device()
+            if self.device == "cuda":
+                self.scheduler = GpuScheduler(cached_cuda_video_cards())
+                print(f"Scheduling on video cards: {self.scheduler.status()}")
+            get_backend(self.deepl_api_key)
+            self.run_job = run
+        self.processor.start()
+
+    def stop(self) -> None:
+        """Cancel every job and stop the workers."""
+        self.processor.stop()
+
+    def _run(self, request: JobRequest, cancel_event: threading.Event) -> str:
+        assert self.run_job is not None
+        return self.run_job(
+            file=request.file,
+            deepl_api_key=self.deepl_api_key,
+            out_languages=request.languages,
+            model=request.model,
+            convert_to_webvtt=False,
+            translation_workers=self.translation_workers,
+            formats=request.formats,
+            output_root=request.output_dir or os.path.dirname(request.file),
+            cancel_event=cancel_event,
+            scheduler=self.scheduler,
+            chunk_minutes=request.chunk_minutes,
+            stream=request.stream,
+            device=self.device,
+        )
+
+    def submit(self, request: JobRequest) -> str:
+        """Queue a job and return its id."""
+        job_id = uuid.uuid4().hex
+        job = self.processor.submit(
+            self._run,
+            request,
+            priority=request.priority,
+            name=os.path.basename(request.file),
+        )
+        with self.lock:
+            self.jobs[job_id] = job
+            self.requests[job_id] = request
+            self.submitted[job_id] = time.time()
+            self._forget_finished()
+        print(f"Queued job {job_id}: {request.file}")
+        return job_id
+
+    def _forget_finished(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished()]
+        for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+            del self.requests[job_id]
+            del self.submitted[job_id]
+
+    def status(self, job_id: str) -> dict[str, Any] | None:
+        """The state of a job and its output files once done, None if unknown."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            request = self.requests[job_id]
+            submitted = self.submitted[job_id]
+        status: dict[str, Any] = {
+            "id": job_id,
+            "state": job.state,
+            "submitted": submitted,
+            "request": asdict(request),
+        }
+        if job.state == DONE:
+            outdir = job.result
+            languages = dict.fromkeys(["en"] + request.languages)
+            status["outdir"] = outdir
+            status["outputs"] = [
+                os.path.join(outdir, f"{language}.{fmt}")
+                for language in languages
+                for fmt in request.formats
+                if os.path.exists(os.path.join(outdir, f"{language}.{fmt}"))
+            ]
+        if job.error is not None:
+            status["error"] = str(job.error) or type(job.error).__name__
+        return status
+
+    def list_jobs(self) -> list[dict[str, Any]]:
+        """The status of every known job, oldest first."""
+        with self.lock:
+            job_ids = list(self.jobs)
+        statuses = [self.status(job_id) for job_id in job_ids]
+        return [status for status in statuses if status is not None]
+
+    def cancel(self, job_id: str) -> bool | None:
+        """Cancel a job, None if unknown and False if it already finished.
+
+        A running job stops before its next transcription chunk, video card
+        wait or translation request; a transcription without chunk_minutes
+        runs to the end first.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        return self.processor.cancel(job)
+
+    def health(self) -> dict[str, Any]:
+        """Worker counts."""
+        running, queued = self.processor.counts()
+        return {
+            "running": running,
+            "queued": queued,
+            "workers": self.processor.max_workers,
+            "device": self.device,
+        }
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Maps the HTTP API onto a JobServer."""
+
+    server_version = "videosubtitles"
+
+    @property
+    def job_server(self) -> JobServer:
+        """The JobServer behind the HTTP server."""
+        return self.server.job_server  # type: ignore
+
+    def address_string(self) -> str:
+        # Unix socket clients have no address.
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def send_json(self, code: int, data: Any) -> None:
+        """Send a JSON response."""
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def job_id(self) -> str | None:
+        """The job id of a /jobs/<id> path."""
+        parts = self.path.strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "jobs":
+            return parts[1]
+        return None
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Status of the server, its metrics, every job or one job."""
+        if self.path == "/health":
+            self.send_json(200, self.job_server.health())
+        elif self.path == "/metrics":
+            body = REGISTRY.exposition().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path.rstrip("/") == "/jobs":
+            self.send_json(200, self.job_server.list_jobs())
+        else:
+            job_id = self.job_id()
+            status = self.job_server.status(job_id) if job_id else None
+            if status is None:
+                self.send_json(404, {"error": "Unknown job"})
+            else:
+                self.send_json(200, status)
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """Queue a job."""
+        if self.path.rstrip("/") != "/jobs":
+            self.send_json(404, {"error": "Not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = parse_job_request(json.loads(self.rfile.read(length) or b"null"))
+        except ValueError as err:
+            self.send_json(400, {"error": str(err)})
+            return
+        job_id = self.job_server.submit(request)
+        self.send_json(202, self.job_server.status(job_id))
+
+    def do_DELETE(self) -> None:  # pylint: disable=invalid-name
+        """Cancel a job."""
+        job_id = self.job_id()
+        cancelled = self.job_server.cancel(job_id) if job_id else None
+        if cancelled is None:
+            self.send_json(404, {"error": "Unknown job"})
+        else:
+            self.send_json(200, {"id": job_id, "cancelled": cancelled})
+
+
+class JobHTTPServer(ThreadingHTTPServer):
+    """HTTP server for a job server."""
+
+    def __init__(self, address: tuple[str, int], job_server: JobServer) -> None:
+        self.job_server = job_server
+        super().__init__(address, RequestHandler)
+
+
+class UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    """HTTP server for a job server, listening on a unix socket."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, job_server: JobServer) -> None:
+        self.job_server = job_server
+        super().__init__(socket_path, RequestHandler)
+
+
+def make_http_server(
+    job_server: JobServer,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: str | None = None,
+) -> socketserver.BaseServer:
+    """Create the HTTP server, on a unix socket when socket_path is given."""
+    server: socketserver.BaseServer
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, job_server)
+    else:
+        server = JobHTTPServer((host, port), job_server)
+    return server
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Video Subtitles job server")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on.")
+    parser.add_argument(
+        "--socket",
+        default=None,
+        help="Listen on this unix socket instead of a port.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of jobs to run at the same time.",
+    )
+    parser.add_argument(
+        "--translation-workers",
+        type=int,
+        default=None,
+        help="Number of languages to translate at the same time per job.",
+    )
+    parser.add_argument("--api-key", default=None, help="Transcribe Anything API key.")
+    args = parser.parse_args()
+    check_workers(parser, args, ("workers", "translation_workers"))
+    return args
+
+
+def main() -> int:
+    """Main entry point for the job server."""
+    from video_subtitles.settings import Settings
+    from video_subtitles.translation_backends import get_backend_name
+
+    args = parse_args()
+    settings = Settings()
+    api_key = settings.api_key(args.api_key)
+    translation_workers = args.translation_workers or settings.translation_workers(
+        get_backend_name(api_key)
+    )
+    job_server = JobServer(
+        deepl_api_key=api_key,
+        workers=args.workers or settings.concurrent_jobs() or DEFAULT_CONCURRENT_JOBS,
+        translation_workers=translation_workers,
+    )
+    job_server.start()
+    server = make_http_server(job_server, args.host, args.port, args.socket)
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"Listening on {where} with {job_server.processor.max_workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Exiting due to keyboard interrupt.")
+    finally:
+        server.server_close()
+        job_server.stop()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
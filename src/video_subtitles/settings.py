@@ -32,6 +32,11 @@ class Settings:
         """Return the DeepL API key."""
         return self.data.get("deepl_key", None)  # type: ignore
 
+    def api_key(self, api_key: str | None = None) -> str | None:
+        """Return api_key or else the DeepL API key, None for the free DeepL page."""
+        api_key = api_key or self.deepl_key()
+        return None if api_key == "free" else api_key
+
     def set_deepl_key(self, key: str) -> None:
         """Set the DeepL API key."""
         self.data["deepl_key"] = key
@@ -64,6 +69,25 @@ class Settings:
         assert subtitle_format in ["WEBVTT", "SRT"]
         self.data["subtitle_format"] = subtitle_format
 
+    def translation_workers(self, backend: str) -> int | None:
+        """Return the number of concurrent translations for a backend."""
+        workers: dict = self.data.get("translation_workers", {})  # type: ignore
+        return workers.get(backend, None)
+
+    def set_translation_workers(self, backend: str, workers: int) -> None:
+        """Set the number of concurrent translations for a backend."""
+        assert workers > 0
+        self.data.setdefault("translation_workers", {})[backend] = workers  # type: ignore
+
+    def concurrent_jobs(self) -> int | None:
+        """Return the number of videos the gui processes at the same time."""
+        return self.data.get("concurrent_jobs", None)  # type: ignore
+
+    def set_concurrent_jobs(self, jobs: int) -> None:
+        """Set the number of videos the gui processes at the same time."""
+        assert jobs > 0
+        self.data["concurrent_jobs"] = jobs
+
     def save(self) -> None:
         """Save the settings."""
         # dump json to file
@@ -0,0 +1,141 @@
+"""
+Streaming srt parser and writer over a compact cue representation.
+"""
+
+import re
+from typing import Iterable, Iterator, NamedTuple
+
+from video_subtitles.atomic_file import atomic_open
+
+TIMING_RE = re.compile(
+    r"(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})"
+)
+TAG_RE = re.compile("<.*?>")
+
+
+class Cue(NamedTuple):
+    """Immutable subtitle with millisecond timestamps, safe to share across threads."""
+
+    number: int
+    start_ms: int
+    end_ms: int
+    text: str
+
+
+def _to_ms(hours: str, minutes: str, seconds: str, millis: str) -> int:
+    return (
+        (int(hours) * 60 + int(minutes)) * 60 + int(seconds)
+    ) * 1000 + int(millis.ljust(3, "0"))
+
+
+def format_timestamp(ms: int, sep: str = ",") -> str:
+    """Format milliseconds as a HH:MM:SS,mmm timestamp."""
+    seconds, millis = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{sep}{millis:03d}"
+
+
+def _make_cue(number: int, timing: tuple[int, int], content: list[str]) -> Cue:
+    text = "\n".join(line for line in content if line.strip())
+    return Cue(number, timing[0], timing[1], text)
+
+
+def parse_srt(lines: Iterable[str]) -> Iterator[Cue]:
+    """Parse srt lines into cues, one block at a time.
+
+    Cues are numbered in the order they appear, blank content lines are
+    dropped and the number line of each block is optional.
+    """
+    timing: tuple[int, int] | None = None
+    content: list[str] = []
+    number = 0
+    for line in lines:
+        line = line.rstrip("\r\n").lstrip("\ufeff")
+        match = TIMING_RE.search(line)
+        if match is None:
+            if timing is not None:
+                content.append(line)
+            continue
+        if timing is not None:
+            # A number after a blank line, right before the timing line, is
+            # the number of the next block.
+            if len(content) >= 2 and content[-1].strip().isdigit():
+                if not content[-2].strip():
+                    content.pop()
+            number += 1
+            yield _make_cue(number, timing, content)
+        groups = match.groups()
+        timing = (_to_ms(*groups[:4]), _to_ms(*groups[4:]))
+        content = []
+    if timing is not None:
+        number += 1
+        yield _make_cue(number, timing, content)
+
+
+def read_srt(path: str) -> Iterator[Cue]:
+    """Stream the cues of a srt file."""
+    with open(path, encoding="utf-8", errors="ignore", mode="r") as file:
+        yield from parse_srt(file)
+
+
+def sort_and_reindex(cues: Iterable[Cue]) -> list[Cue]:
+    """Sort cues by time, drop empty ones and renumber, like srtranslator does."""
+    kept = [cue for cue in cues if cue.text.strip() and cue.start_ms < cue.end_ms]
+    kept.sort(key=lambda cue: (cue.start_ms, cue.end_ms, cue.number))
+    return [cue._replace(number=i) for i, cue in enumerate(kept, start=1)]
+
+
+def load_srt(path: str) -> list[Cue]:
+    """Load a srt file, sorted and reindexed."""
+    return sort_and_reindex(read_srt(path))
+
+
+def format_srt(cues: Iterable[Cue]) -> Iterator[str]:
+    """Yield the srt block of each cue."""
+    for cue in cues:
+        yield (
+            f"{cue.number}\n{format_timestamp(cue.start_ms)} --> "
+            f"{format_timestamp(cue.end_ms)}\n{cue.text}\n\n"
+        )
+
+
+def write_srt(path: str, cues: Iterable[Cue]) -> None:
+    """Write cues to a srt file as they are produced, replacing it once complete."""
+    with atomic_open(path) as file:
+        file.writelines(format_srt(cues))
+
+
+def clean_text(text: str) -> str:
+    """Flatten cue text to one line for translation, as srtranslator does.
+
+    Tags are stripped and dialog cues, where every line starts with "-",
+    are joined with "_" so wrap_text() can split them back up.
+    """
+    text = TAG_RE.sub("", text)
+    text = "\n".join(line for line in text.split("\n") if line).strip()
+    if not text:
+        return "..."
+    if all(line.startswith("-") for line in text.split("\n")):
+        return text.replace("\n", "_")
+    return text.replace("\n", " ")
+
+
+def wrap_line(line: str, line_wrap_limit: int = 50) -> str:
+    """Wrap a line without breaking any word in half."""
+    wrapped: list[str] = []
+    for word in line.split():
+        if wrapped and len(wrapped[-1]) + len(word) < line_wrap_limit:
+            wrapped[-1] += f" {word}"
+        else:
+            wrapped.append(word)
+    return "\n".join(wrapped)
+
+
+def wrap_text(text: str, line_wrap_limit: int = 50) -> str:
+    """Wrap the lines of a cue, restoring dialog lines joined by clean_text()."""
+    lines = text.replace("_-", "\n-").split("\n")
+    return "\n".join(
+        wrap_line(line, line_wrap_limit) if len(line) > line_wrap_limit else line
+        for line in lines
+    )
@@ -0,0 +1,221 @@
+"""
+Serializes cues to every requested subtitle format in one pass.
+"""
+
+import json
+import os
+from html import escape
+from typing import Iterable
+
+from video_subtitles.atomic_file import AtomicFile
+from video_subtitles.convert_to_webvtt import STYLE_ELEMENT, format_webvtt_cue
+from video_subtitles.srt_cues import Cue, format_srt, format_timestamp
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+PlayResX: 384
+PlayResY: 288
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,16,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,1,0,2,10,10,10,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+class SubtitleFormat:
+    """Serializes cues to one subtitle format, a piece at a time."""
+
+    extension = ""
+
+    def header(self, language: str) -> str:  # pylint: disable=unused-argument
+        """Text written before the first cue."""
+        return ""
+
+    def cue(self, cue: Cue, first: bool) -> str:
+        """Text written for a cue."""
+        raise NotImplementedError
+
+    def footer(self, empty: bool) -> str:  # pylint: disable=unused-argument
+        """Text written after the last cue."""
+        return ""
+
+
+class SrtFormat(SubtitleFormat):
+    """SubRip."""
+
+    extension = "srt"
+
+    def cue(self, cue: Cue, first: bool) -> str:
+        return "".join(format_srt([cue]))
+
+
+class WebVttFormat(SubtitleFormat):
+    """WebVTT, with the STYLE block convert_to_webvtt() writes."""
+
+    extension = "vtt"
+
+    def header(self, language: str) -> str:
+        return "WEBVTT"
+
+    def cue(self, cue: Cue, first: bool) -> str:
+        if not cue.text:
+            return ""
+        separator = f"\n\n{STYLE_ELEMENT}" if first else "\n\n"
+        return separator + format_webvtt_cue(cue)
+
+
+class AssFormat(SubtitleFormat):
+    """Advanced SubStation Alpha."""
+
+    extension = "ass"
+
+    def header(self, language: str) -> str:
+        return ASS_HEADER
+
+    def cue(self, cue: Cue, first: bool) -> str:
+        start = format_ass_timestamp(cue.start_ms)
+        end = format_ass_timestamp(cue.end_ms)
+        # Braces would start an override block, like {\i1}.
+        text = cue.text.replace("{", "\\{").replace("}", "\\}").replace("\n", "\\N")
+        return f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}\n"
+
+
+class TtmlFormat(SubtitleFormat):
+    """Timed Text Markup Language."""
+
+    extension = "ttml"
+
+    def header(self, language: str) -> str:
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            f'<tt xmlns="http://www.w3.org/ns/ttml" xml:lang="{language}">\n'
+            "  <body>\n    <div>\n"
+        )
+
+    def cue(self, cue: Cue, first: bool) -> str:
+        start = format_timestamp(cue.start_ms, ".")
+        end = format_timestamp(cue.end_ms, ".")
+        lines = cue.text.split("\n")
+        text = "<br/>".join(escape(line, quote=False) for line in lines)
+        return f'      <p begin="{start}" end="{end}">{text}</p>\n'
+
+    def footer(self, empty: bool) -> str:
+        return "    </div>\n  </body>\n</tt>\n"
+
+
+class JsonFormat(SubtitleFormat):
+    """A JSON list of {number, start_ms, end_ms, text} objects."""
+
+    extension = "json"
+
+    def header(self, language: str) -> str:
+        return "["
+
+    def cue(self, cue: Cue, first: bool) -> str:
+        separator = "\n  " if first else ",\n  "
+        return separator + json.dumps(cue._asdict(), ensure_ascii=False)
+
+    def footer(self, empty: bool) -> str:
+        return "]\n" if empty else "\n]\n"
+
+
+def format_ass_timestamp(ms: int) -> str:
+    """Format milliseconds as a H:MM:SS.cc ASS timestamp."""
+    centis = ms // 10
+    seconds, centis = divmod(centis, 100)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}.{centis:02d}"
+
+
+SUBTITLE_FORMATS: dict[str, SubtitleFormat] = {
+    fmt.extension: fmt
+    for fmt in (SrtFormat(), WebVttFormat(), AssFormat(), TtmlFormat(), JsonFormat())
+}
+
+
+def check_formats(formats: Iterable[str]) -> list[str]:
+    """Normalize subtitle format names, raises ValueError on an unknown one."""
+    formats = [fmt.strip().lower() for fmt in formats]
+    for fmt in formats:
+        if fmt not in SUBTITLE_FORMATS:
+            raise ValueError(
+                f"Unknown subtitle format: {fmt}, expected one of {list(SUBTITLE_FORMATS)}"
+            )
+    return formats
+
+
+def parse_formats(formats_str: str) -> list[str]:
+    """Parse a comma-separated list of subtitle formats."""
+    return check_formats(fmt for fmt in formats_str.split(",") if fmt.strip())
+
+
+class SubtitleWriter:
+    """Writes cues to out_base.<ext> for every format as they arrive.
+
+    The files are written under temporary names and renamed into place by
+    close(), so a file at its final name is always complete. The footers
+    are written by close().
+    """
+
+    def __init__(self, out_base: str, language: str, formats: list[str]) -> None:
+        self.emitters = [SUBTITLE_FORMATS[fmt] for fmt in dict.fromkeys(formats)]
+        self.paths = [
+            os.path.abspath(f"{out_base}.{emitter.extension}") for emitter in self.emitters
+        ]
+        self.files: list[AtomicFile] = []
+        try:
+            for path in self.paths:
+                self.files.append(AtomicFile(path))
+        except OSError:
+            self.abort()
+            raise
+        # Per file, until it has a cue: some formats skip cues, like empty ones.
+        self.first = [True] * len(self.emitters)
+        for emitter, file in zip(self.emitters, self.files):
+            file.write(emitter.header(language))
+
+    def write(self, cues: Iterable[Cue]) -> None:
+        """Append cues to every file."""
+        for cue in cues:
+            for pos, (emitter, file) in enumerate(zip(self.emitters, self.files)):
+                text = emitter.cue(cue, self.first[pos])
+                if text:
+                    file.write(text)
+                    self.first[pos] = False
+
+    def close(self) -> list[str]:
+        """Finish every file, move it to its final name and return the paths."""
+        try:
+            for emitter, file, first in zip(self.emitters, self.files, self.first):
+                file.write(emitter.footer(first))
+        except BaseException:
+            self.abort()
+            raise
+        for file in self.files:
+            file.commit()
+        return self.paths
+
+    def abort(self) -> None:
+        """Close and delete the unfinished files."""
+        for file in self.files:
+            file.discard()
+
+
+def emit(cues: Iterable[Cue], out_base: str, language: str, formats: list[str]) -> list[str]:
+    """Write cues to out_base.<ext> for every format, iterating the cues once.
+
+    Returns the paths written.
+    """
+    writer = SubtitleWriter(out_base, language, formats)
+    try:
+        writer.write(cues)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
@@ -1,50 +1,202 @@
 """
-Processes threads one at a time.
+Runs queued jobs on a pool of worker threads, highest priority first.
 """
 
-import queue
+import heapq
+import itertools
+import os
 import threading
+import traceback
+from typing import Any, Callable
+
+from video_subtitles.metrics import counter, gauge
+
+DEFAULT_CONCURRENT_JOBS = max(1, min(4, (os.cpu_count() or 2) // 2))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+JOBS_QUEUED = gauge("videosubtitles_jobs_queued", "Jobs waiting for a worker.")
+JOBS_RUNNING = gauge("videosubtitles_jobs_running", "Jobs being run.")
+JOBS_FINISHED = counter(
+    "videosubtitles_jobs_total", "Finished jobs by final state.", ("state",)
+)
+
+
+class Job:  # pylint: disable=too-many-instance-attributes
+    """A queued call, its outcome and a cancel event it can watch."""
+
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        args: tuple,
+        kwargs: dict,
+        priority: int,
+        name: str,
+    ) -> None:
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.name = name
+        self.state = QUEUED
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+        self.callbacks: list[Callable[["Job"], None]] = []
+
+    def finished(self) -> bool:
+        """True once the job is done, failed or cancelled."""
+        return self.done_event.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for the job to finish."""
+        return self.done_event.wait(timeout)
 
 
 # Can't use futures because it doesn't have a daemon option so we have to
 # impliment our own thread processor.
-class ThreadProcessor(threading.Thread):
-    """Thread processor."""
-
-    def __init__(self) -> None:
-        super().__init__(daemon=True)
-        self.pending_tasks: queue.Queue = queue.Queue()
-        self.processing_task: threading.Thread | None = None
-        self.event = threading.Event()
-        self.update_status_cb = lambda _: None
-
-    def set_status_callback(self, callback) -> None:
-        """Sets the status callback."""
+class ThreadProcessor:  # pylint: disable=too-many-instance-attributes
+    """Runs up to max_workers jobs at the same time on daemon threads.
+
+    Workers sleep on a condition until a job is queued, nothing polls.
+    Queued jobs start in priority order, higher first, then in the order
+    they were submitted.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_CONCURRENT_JOBS) -> None:
+        assert max_workers > 0
+        self.max_workers = max_workers
+        self.pending_tasks: list[tuple[int, int, Job]] = []
+        self.running: set[Job] = set()
+        self.condition = threading.Condition()
+        self.counter = itertools.count()
+        self.stopped = False
+        self.workers: list[threading.Thread] = []
+        self.update_status_cb: Callable[[int, int], None] = lambda _running, _queued: None
+
+    def set_status_callback(self, callback: Callable[[int, int], None]) -> None:
+        """Sets the callback told the number of running and queued jobs on every change."""
         self.update_status_cb = callback
 
-    def run(self) -> None:
-        """Process each thread in the queue."""
-        while not self.event.wait(0.1):
-            if self.processing_task is not None:
-                self.update_status_cb(True)
-                if not self.processing_task.is_alive():
-                    self.processing_task.join()
-                    self.processing_task = None
-            else:
-                self.update_status_cb(False)
-            if self.processing_task is not None:
-                continue
-            if self.pending_tasks.empty():
-                continue
-            self.processing_task = self.pending_tasks.get()
-            self.processing_task.start()
-
-    def add(self, thread: threading.Thread) -> None:
-        """Queues a thread to be executed."""
-        assert thread.daemon is True
-        self.pending_tasks.put(thread)
+    def start(self) -> None:
+        """Starts the worker threads."""
+        for i in range(self.max_workers):
+            worker = threading.Thread(
+                target=self._work, name=f"ThreadProcessor-{i}", daemon=True
+            )
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(
+        self,
+        func: Callable[..., Any],
+        *args,
+        priority: int = 0,
+        name: str = "",
+        **kwargs,
+    ) -> Job:
+        """Queues func(*args, cancel_event=job.cancel_event, **kwargs).
+
+        Long running jobs should check cancel_event and stop early once it
+        is set.
+        """
+        job = Job(func, args, kwargs, priority, name or getattr(func, "__name__", ""))
+        with self.condition:
+            if self.stopped:
+                raise RuntimeError("ThreadProcessor is stopped")
+            heapq.heappush(self.pending_tasks, (-priority, next(self.counter), job))
+            self.condition.notify()
+        self._notify_status()
+        return job
+
+    def add_done_callback(self, job: Job, callback: Callable[[Job], None]) -> None:
+        """Calls callback(job) from a worker thread when the job finishes."""
+        with self.condition:
+            if not job.finished():
+                job.callbacks.append(callback)
+                return
+        callback(job)
+
+    def cancel(self, job: Job) -> bool:
+        """Cancels a job. Queued jobs never start, running jobs are asked to stop.
+
+        Returns False if the job had already finished.
+        """
+        with self.condition:
+            if job.finished():
+                return False
+            job.cancel_event.set()
+            if job.state != QUEUED:
+                return True
+            self.pending_tasks = [
+                entry for entry in self.pending_tasks if entry[2] is not job
+            ]
+            heapq.heapify(self.pending_tasks)
+            job.state = CANCELLED
+        self._finish(job)
+        return True
+
+    def cancel_all(self) -> None:
+        """Cancels every queued and running job."""
+        with self.condition:
+            jobs = [entry[2] for entry in self.pending_tasks] + list(self.running)
+        for job in jobs:
+            self.cancel(job)
+
+    def counts(self) -> tuple[int, int]:
+        """The number of running and queued jobs."""
+        with self.condition:
+            return len(self.running), len(self.pending_tasks)
 
     def stop(self) -> None:
-        """Stops the thread executor."""
-        self.event.set()
-        self.join()
+        """Cancels all jobs and stops the workers once their jobs return."""
+        self.cancel_all()
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def _work(self) -> None:
+        while True:
+            with self.condition:
+                while not self.pending_tasks and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                _, _, job = heapq.heappop(self.pending_tasks)
+                job.state = RUNNING
+                self.running.add(job)
+            self._notify_status()
+            try:
+                job.result = job.func(
+                    *job.args, cancel_event=job.cancel_event, **job.kwargs
+                )
+                job.state = CANCELLED if job.cancel_event.is_set() else DONE
+            except Exception as err:  # pylint: disable=broad-except
+                job.error = err
+                job.state = CANCELLED if job.cancel_event.is_set() else FAILED
+            with self.condition:
+                self.running.discard(job)
+            self._finish(job)
+
+    def _finish(self, job: Job) -> None:
+        with self.condition:
+            job.done_event.set()
+            callbacks, job.callbacks = job.callbacks, []
+        JOBS_FINISHED.inc(state=job.state)
+        for callback in callbacks:
+            try:
+                callback(job)
+            except Exception:  # pylint: disable=broad-except
+                traceback.print_exc()
+        self._notify_status()
+
+    def _notify_status(self) -> None:
+        running, queued = self.counts()
+        JOBS_RUNNING.set(running)
+        JOBS_QUEUED.set(queued)
+        self.update_status_cb(running, queued)
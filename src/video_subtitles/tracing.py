@@ -0,0 +1,136 @@
+"""
+Timing spans of the pipeline stages, exported as a Chrome trace.
+
+Tracing is off unless enable_tracing() is called, span() then returns a
+shared no-op context manager so instrumented code pays nothing.
+"""
+
+import argparse
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Iterator
+
+# Path of the trace file, turns tracing on like --trace.
+TRACE_ENV = "VIDEO_SUBTITLES_TRACE"
+
+_NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    """Records complete spans with the thread they ran on."""
+
+    def __init__(self) -> None:
+        self.events: list[dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.origin_ns = time.perf_counter_ns()
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        """Time the with block."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.origin_ns) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+            if args:
+                event["args"] = args
+            with self.lock:
+                self.events.append(event)
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Write the spans as Chrome trace events, for chrome://tracing or Perfetto."""
+        import json  # pylint: disable=import-outside-toplevel
+
+        with self.lock:
+            events = list(self.events)
+        with open(path, encoding="utf-8", mode="w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def summary(self) -> str:
+        """Format a table of the count and total, mean and max seconds per stage."""
+        stages: dict[str, list[float]] = {}
+        with self.lock:
+            for event in self.events:
+                stages.setdefault(event["name"], []).append(event["dur"] / 1e6)
+        lines = [f"{'STAGE':<24} {'COUNT':>6} {'TOTAL':>10} {'MEAN':>10} {'MAX':>10}"]
+        for name, durations in sorted(stages.items(), key=lambda item: -sum(item[1])):
+            total = sum(durations)
+            lines.append(
+                f"{name:<24} {len(durations):>6} {total:>9.3f}s "
+                f"{total / len(durations):>9.3f}s {max(durations):>9.3f}s"
+            )
+        return "\n".join(lines)
+
+
+_TRACER: Tracer | None = None
+
+
+def enable_tracing() -> Tracer:
+    """Start recording spans, returns the tracer."""
+    global _TRACER  # pylint: disable=global-statement
+    if _TRACER is None:
+        _TRACER = Tracer()
+    return _TRACER
+
+
+def disable_tracing() -> Tracer | None:
+    """Stop recording spans, returns the tracer that was recording."""
+    global _TRACER  # pylint: disable=global-statement
+    tracer, _TRACER = _TRACER, None
+    return tracer
+
+
+def span(name: str, **args: Any) -> ContextManager[None]:
+    """Time a stage when tracing is enabled."""
+    if _TRACER is None:
+        return _NULL_SPAN
+    return _TRACER.span(name, **args)
+
+
+def get_trace_path(trace: str | None = None) -> str | None:
+    """The trace file from the command line, or else the environment."""
+    return trace or os.environ.get(TRACE_ENV) or None
+
+
+def add_trace_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the --trace option read by trace_to()."""
+    parser.add_argument(
+        "--trace",
+        default=None,
+        help="Time every stage and write a Chrome trace to this file, "
+        f"or set {TRACE_ENV}.",
+    )
+
+
+def finish_tracing(path: str) -> None:
+    """Stop tracing, write the trace file and print the summary."""
+    tracer = disable_tracing()
+    if tracer is None:
+        return
+    tracer.write_chrome_trace(path)
+    print(tracer.summary())
+    print(f"Trace written to {os.path.abspath(path)}")
+
+
+@contextmanager
+def trace_to(trace: str | None = None) -> Iterator[None]:
+    """Trace the with block to the file from the command line or the environment."""
+    path = get_trace_path(trace)
+    if path is None:
+        yield
+        return
+    enable_tracing()
+    try:
+        yield
+    finally:
+        finish_tracing(path)
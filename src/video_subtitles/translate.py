@@ -2,47 +2,242 @@
 Handles srt translation and wrapping.
 """
 
-# pylint: disable=import-error
+import threading
+from typing import Any, Iterator, Sequence
 
-from srtranslator import SrtFile
-from srtranslator.translators.deepl_api import DeeplApi
-from srtranslator.translators.deepl_scrap import DeeplTranslator as FreeTranslator
-from srtranslator.translators.translatepy import TranslatePy as GoogleTranslator
+from video_subtitles.metrics import counter, histogram
+from video_subtitles.rate_limit import AdaptiveLimiter
+from video_subtitles.srt_cues import Cue, clean_text, load_srt, wrap_text, write_srt
+from video_subtitles.tracing import span
+from video_subtitles.translation_backends import (
+    BACKENDS,
+    BatchLimits,
+    SrtranslatorBackend,
+    TranslationBackend,
+    get_backend,
+)
+from video_subtitles.translation_memory import (
+    TranslationJournal,
+    TranslationMemory,
+    normalize_text,
+)
+
+BACKEND_REQUEST_SECONDS = histogram(
+    "videosubtitles_backend_request_seconds",
+    "Latency of requests to translation backends.",
+    ("backend",),
+)
+BACKEND_CHARACTERS = counter(
+    "videosubtitles_backend_characters_total",
+    "Characters sent to translation backends.",
+    ("backend",),
+)
+BACKEND_ERRORS = counter(
+    "videosubtitles_backend_errors_total",
+    "Failed requests to translation backends.",
+    ("backend",),
+)
+TRANSLATION_MEMORY = counter(
+    "videosubtitles_translation_memory_total",
+    "Translation memory lookups of unique subtitles by result.",
+    ("result",),
+)
+
+
+def wrap_cues(cues: Sequence[Cue]) -> list[Cue]:
+    """Return the cues with their lines wrapped."""
+    return [cue._replace(text=wrap_text(clean_text(cue.text))) for cue in cues]
 
 
 def srt_wrap(srt_file: str) -> None:
     """Wrap lines in a srt file."""
-    srt = SrtFile(srt_file)
-    srt.wrap_lines()
-    srt.save(srt_file)
+    with span("srt_wrap"):
+        write_srt(srt_file, wrap_cues(load_srt(srt_file)))
+
+
+_LIMITERS: dict[str, AdaptiveLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(backend: str) -> AdaptiveLimiter:
+    """Get the process wide rate limiter of a backend."""
+    with _LIMITERS_LOCK:
+        if backend not in _LIMITERS:
+            _LIMITERS[backend] = AdaptiveLimiter(
+                rate=BACKENDS[backend].default_rate,
+                max_concurrency=BACKENDS[backend].default_workers,
+            )
+        return _LIMITERS[backend]
+
+
+def iter_batches(texts: list[str], limits: BatchLimits) -> Iterator[list[int]]:
+    """Yield indices of texts, grouped so each newline joined group fits the limits."""
+    portion: list[int] = []
+    n_char = 0
+    for i, text in enumerate(texts):
+        too_long = n_char + len(text) + 1 >= limits.max_chars
+        if portion and (too_long or len(portion) >= limits.max_texts):
+            yield portion
+            portion = []
+            n_char = 0
+        portion.append(i)
+        n_char += len(text) + 1
+    if portion:
+        yield portion
+
 
+def translate_texts(  # pylint: disable=too-many-arguments,too-many-locals
+    translator: TranslationBackend | Any,
+    texts: list[str],
+    from_lang: str,
+    to_lang: str,
+    on_chunk=lambda _: None,
+    cancel_event: threading.Event | None = None,
+    limiter: AdaptiveLimiter | None = None,
+) -> list[str]:
+    """Translate single line texts, packed into as few requests as possible.
 
-def convert_deepl_language_codes_to_google(lang: str) -> str:
-    """Some Google language codes are different from Deepl's, non-exhaustive list."""
-    if "PT-" in lang:  # Portuguese dialects not supported by google.
-        lang = "PT"
-    if "NB" in lang:
-        lang = "NO"
-    return lang.lower()
+    Repeated texts are only sent once and the result is scattered back to
+    every position they occur at. on_chunk is called with a
+    {source: translation} dict after every batch so that partial progress
+    survives a failure later on. Setting cancel_event stops before the next
+    batch. With a limiter, requests are rate limited and throttled requests
+    are retried on their own. A srtranslator Translator can be passed in
+    place of a backend.
+    """
+    if not isinstance(translator, TranslationBackend):
+        translator = SrtranslatorBackend(translator)
+    backend = translator.name or type(translator).__name__
 
+    def request(sources: list[str], from_lang: str, to_lang: str) -> list[str]:
+        BACKEND_CHARACTERS.inc(sum(len(text) for text in sources), backend=backend)
+        try:
+            with BACKEND_REQUEST_SECONDS.time(backend=backend):
+                return translator.translate_batch(sources, from_lang, to_lang)
+        except Exception:
+            BACKEND_ERRORS.inc(backend=backend)
+            raise
 
-def translate(
-    api_key: str | None, in_srt: str, out_srt: str, from_lang: str, to_lang: str
+    unique = list(dict.fromkeys(texts))
+    translated: dict[str, str] = {}
+    done = 0
+    for batch in iter_batches(unique, translator.limits):
+        if cancel_event is not None and cancel_event.is_set():
+            raise RuntimeError("Translation cancelled")
+        sources = [unique[i] for i in batch]
+        with span("backend_request", backend=translator.name, texts=len(sources)):
+            if limiter is None:
+                print(f"... Translating batch. {int(100 * done / len(unique))} %")
+                translations = request(sources, from_lang, to_lang)
+            else:
+                print(
+                    f"... Translating batch. {int(100 * done / len(unique))} %"
+                    f" ({limiter.status()})"
+                )
+                translations = limiter.call(request, sources, from_lang, to_lang)
+        pairs = dict(zip(sources, translations))
+        translated.update(pairs)
+        on_chunk(pairs)
+        done += len(batch)
+    return [translated[text] for text in texts]
+
+
+def get_journal_path(out_srt: str) -> str:
+    """Get the path of the translation journal of an output file."""
+    return out_srt + ".journal.jsonl"
+
+
+def translate(  # pylint: disable=too-many-arguments
+    api_key: str | None,
+    in_srt: str,
+    out_srt: str,
+    from_lang: str,
+    to_lang: str,
+    memory: TranslationMemory | None = None,
+    cancel_event: threading.Event | None = None,
 ) -> None:
     """Translate a srt file."""
-    if api_key is None:
-        translator = FreeTranslator()
-        from_lang = from_lang.lower()
-        to_lang = to_lang.lower()
-    elif api_key.lower() == "google":
-        from_lang = convert_deepl_language_codes_to_google(from_lang)
-        to_lang = convert_deepl_language_codes_to_google(to_lang)
-        translator = GoogleTranslator()
-    else:
-        from_lang = from_lang.lower()
-        to_lang = to_lang.lower()
-        translator = DeeplApi(api_key=api_key)
-    srt = SrtFile(in_srt)
-    srt.translate(translator, from_lang, to_lang)
-    srt.wrap_lines()
-    srt.save(out_srt)
+    with span("translate_file", language=to_lang):
+        cues = translate_cues(
+            api_key=api_key,
+            cues=load_srt(in_srt),
+            from_lang=from_lang,
+            to_lang=to_lang,
+            journal_path=get_journal_path(out_srt),
+            memory=memory,
+            cancel_event=cancel_event,
+        )
+        write_srt(out_srt, cues)
+
+
+def translate_cues(  # pylint: disable=too-many-arguments,too-many-locals
+    api_key: str | None,
+    cues: Sequence[Cue],
+    from_lang: str,
+    to_lang: str,
+    journal_path: str | None = None,
+    memory: TranslationMemory | None = None,
+    cancel_event: threading.Event | None = None,
+) -> list[Cue]:
+    """Translate parsed cues and return the translated, wrapped cues.
+
+    The input cues are not modified, so one parsed transcript can be shared
+    by every language. Subtitles already in the translation memory are not
+    sent to the backend. With a journal_path, translated subtitles are
+    journaled until the translation is complete, so a failed or interrupted
+    translation resumes where it stopped.
+    """
+    translator = get_backend(api_key)
+    backend = translator.name
+    from_lang = translator.map_language(from_lang)
+    to_lang = translator.map_language(to_lang)
+    journal = (
+        TranslationJournal(journal_path, from_lang, to_lang, backend)
+        if journal_path
+        else None
+    )
+    owns_memory = memory is None
+    memory = memory or TranslationMemory()
+    try:
+        texts = [clean_text(cue.text) for cue in cues]
+        with span("translation_memory", language=to_lang):
+            known = journal.load() if journal else {}
+            if known:
+                print(f"Resuming from journal: {len(known)} translated")
+            known.update(memory.get_many(texts, from_lang, to_lang, backend))
+        # Whisper output repeats cues like "[Music]" a lot, send each text once.
+        unique = list(dict.fromkeys(normalize_text(text) for text in texts))
+        missing = [text for text in unique if text not in known]
+        TRANSLATION_MEMORY.inc(len(unique) - len(missing), result="hit")
+        TRANSLATION_MEMORY.inc(len(missing), result="miss")
+        print(
+            f"Translation memory: {len(unique) - len(missing)}/{len(unique)} hits"
+            f" ({len(texts)} subtitles)"
+        )
+        if missing:
+
+            def on_chunk(pairs: dict[str, str]) -> None:
+                if journal:
+                    journal.append(pairs)
+                memory.put_many(pairs, from_lang, to_lang, backend)  # type: ignore
+
+            translations = translate_texts(
+                translator,
+                missing,
+                from_lang,
+                to_lang,
+                on_chunk=on_chunk,
+                cancel_event=cancel_event,
+                limiter=get_limiter(backend),
+            )
+            known.update(zip(missing, translations))
+    finally:
+        if owns_memory:
+            memory.close()
+    out = [
+        cue._replace(text=wrap_text(known[normalize_text(text)]))
+        for cue, text in zip(cues, texts)
+    ]
+    if journal:
+        journal.remove()
+    return out
@@ -0,0 +1,279 @@
+"""
+Registry of translation backends, each a long-lived instance shared by every
+language and job in the process.
+"""
+
+# pylint: disable=import-outside-toplevel
+
+import atexit
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from video_subtitles.browser_pool import BrowserPool
+
+
+@dataclass
+class BatchLimits:
+    """Size limits of a single translation request."""
+
+    max_chars: int
+    max_texts: int
+
+
+class TranslationBackend:
+    """Translates batches of single line texts.
+
+    Instances are created once per api key by get_backend() and shared by
+    every thread, so clients and their connections are reused.
+    """
+
+    name = ""
+    limits = BatchLimits(max_chars=5000, max_texts=1000)
+    # How many languages are translated at the same time.
+    default_workers = 4
+    # Starting requests per second, adapted at runtime.
+    default_rate = 2.0
+
+    def __init__(self, api_key: str | None = None) -> None:
+        self.api_key = api_key
+
+    def map_language(self, lang: str) -> str:
+        """Map a DeepL style language code, like "PT-BR", to this backend's code."""
+        return lang.lower()
+
+    def translate_batch(self, texts: list[str], from_lang: str, to_lang: str) -> list[str]:
+        """Translate texts in one request, returning one translation per text."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release clients and connections."""
+
+
+class LineJoinedBackend(TranslationBackend):
+    """A backend that translates one newline joined text per request."""
+
+    def translate_text(self, text: str, from_lang: str, to_lang: str) -> str:
+        """Translate a multi line text."""
+        raise NotImplementedError
+
+    def translate_batch(self, texts: list[str], from_lang: str, to_lang: str) -> list[str]:
+        """Translate newline joined texts.
+
+        If the translation comes back with a different number of lines the
+        batch is split in half and retried, so results always line up with
+        texts.
+        """
+        lines = self.translate_text("\n".join(texts), from_lang, to_lang).splitlines()
+        if len(lines) == len(texts):
+            return lines
+        if len(texts) == 1:
+            return [" ".join(line.strip() for line in lines)]
+        print(f"... Got {len(lines)} lines back for {len(texts)}, splitting batch")
+        half = len(texts) // 2
+        return self.translate_batch(
+            texts[:half], from_lang, to_lang
+        ) + self.translate_batch(texts[half:], from_lang, to_lang)
+
+
+class SrtranslatorBackend(LineJoinedBackend):
+    """Adapts a srtranslator Translator to the backend interface."""
+
+    def __init__(self, translator: Any) -> None:
+        super().__init__()
+        self.translator = translator
+        self.limits = BatchLimits(max_chars=int(translator.max_char), max_texts=1000)
+
+    def translate_text(self, text: str, from_lang: str, to_lang: str) -> str:
+        return self.translator.translate(text, from_lang, to_lang)
+
+    def close(self) -> None:
+        self.translator.quit()
+
+
+BACKENDS: dict[str, type[TranslationBackend]] = {}
+
+
+def register_backend(cls: type[TranslationBackend]) -> type[TranslationBackend]:
+    """Class decorator that makes a backend selectable by its name."""
+    BACKENDS[cls.name] = cls
+    return cls
+
+
+@register_backend
+class DeeplBackend(TranslationBackend):
+    """The DeepL API, texts are sent as a list."""
+
+    name = "deepl"
+    # DeepL takes up to 50 texts per request and a 128 KiB body.
+    limits = BatchLimits(max_chars=30000, max_texts=50)
+    default_workers = 8
+    default_rate = 10.0
+
+    def __init__(self, api_key: str | None = None) -> None:
+        super().__init__(api_key)
+        self.lock = threading.Lock()
+        self.client: Any = None
+
+    def get_client(self) -> Any:
+        """The deepl.Translator, its requests session keeps connections alive."""
+        with self.lock:
+            if self.client is None:
+                import deepl  # type: ignore
+
+                self.client = deepl.Translator(self.api_key)
+            return self.client
+
+    def translate_batch(self, texts: list[str], from_lang: str, to_lang: str) -> list[str]:
+        results = self.get_client().translate_text(
+            texts, source_lang=from_lang, target_lang=to_lang
+        )
+        return [result.text for result in results]
+
+    def close(self) -> None:
+        with self.lock:
+            if self.client is not None:
+                self.client.close()
+                self.client = None
+
+
+@register_backend
+class GoogleBackend(LineJoinedBackend):
+    """Google translate through translatepy."""
+
+    name = "google"
+    limits = BatchLimits(max_chars=5000, max_texts=1000)
+    default_workers = 4
+    default_rate = 2.0
+
+    def __init__(self, api_key: str | None = None) -> None:
+        super().__init__(api_key)
+        self.lock = threading.Lock()
+        self.translator: Any = None
+
+    def map_language(self, lang: str) -> str:
+        """Some Google language codes are different from Deepl's, non-exhaustive list."""
+        if "PT-" in lang:  # Portuguese dialects not supported by google.
+            lang = "PT"
+        if "NB" in lang:
+            lang = "NO"
+        return lang.lower()
+
+    def translate_text(self, text: str, from_lang: str, to_lang: str) -> str:
+        with self.lock:
+            if self.translator is None:
+                from srtranslator.translators.translatepy import (  # type: ignore
+                    TranslatePy,
+                )
+
+                self.translator = TranslatePy()
+        return self.translator.translate(text, from_lang, to_lang)
+
+
+@register_backend
+class DeeplFreeBackend(LineJoinedBackend):
+    """The free DeepL web page, driven by headless browsers.
+
+    Launching a browser takes seconds, so they come from a pool shared by
+    every language and file and are only quit at exit.
+    """
+
+    name = "deepl-free"
+    # The web page takes one text box.
+    limits = BatchLimits(max_chars=3000, max_texts=1000)
+    default_workers = 2
+    default_rate = 0.5
+
+    def __init__(self, api_key: str | None = None) -> None:
+        super().__init__(api_key)
+        self.pool = BrowserPool(self.launch_browser, max_size=self.default_workers)
+
+    @staticmethod
+    def launch_browser() -> Any:
+        """Open a browser on the DeepL page."""
+        from srtranslator.translators.deepl_scrap import (  # type: ignore
+            DeeplTranslator,
+        )
+
+        print("Launching a browser for the free DeepL translator")
+        return DeeplTranslator()
+
+    def translate_text(self, text: str, from_lang: str, to_lang: str) -> str:
+        with self.pool.lease() as translator:
+            return translator.translate(text, from_lang, to_lang)
+
+    def close(self) -> None:
+        print(f"Closing the free DeepL browsers: {self.pool.status()}")
+        self.pool.close()
+
+
+class LocalBackend(LineJoinedBackend):
+    """Offline backend for tests, tags every line with the target language.
+
+    Not registered, so an api key can not select it in production; tests
+    call register_backend(LocalBackend).
+    """
+
+    name = "local"
+    default_workers = 8
+    default_rate = 1000.0
+    # Seconds every request takes, to simulate a remote backend.
+    latency = 0.0
+
+    def __init__(self, api_key: str | None = None) -> None:
+        super().__init__(api_key)
+        self.requests = 0
+
+    def translate_text(self, text: str, from_lang: str, to_lang: str) -> str:
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return "\n".join(f"[{to_lang}] {line}" for line in text.split("\n"))
+
+
+_INSTANCES: dict[tuple[str, str | None], TranslationBackend] = {}
+_INSTANCES_LOCK = threading.Lock()
+
+
+def get_backend_name(api_key: str | None) -> str:
+    """Get the name of the translation backend selected by the api key.
+
+    No key selects the free DeepL page, a key that names a registered
+    backend selects it and any other key is a DeepL API key.
+    """
+    if api_key is None:
+        return "deepl-free"
+    if api_key.lower() in BACKENDS:
+        return api_key.lower()
+    return "deepl"
+
+
+def get_backend(api_key: str | None) -> TranslationBackend:
+    """Get the process wide instance of the backend selected by the api key."""
+    name = get_backend_name(api_key)
+    key = (name, api_key if name == "deepl" else None)
+    with _INSTANCES_LOCK:
+        if key not in _INSTANCES:
+            _INSTANCES[key] = BACKENDS[name](api_key)
+        return _INSTANCES[key]
+
+
+def get_default_workers(name: str) -> int:
+    """How many languages a backend translates at the same time by default."""
+    return BACKENDS[name].default_workers
+
+
+def close_backends() -> None:
+    """Close every backend instance, called at exit."""
+    with _INSTANCES_LOCK:
+        backends = list(_INSTANCES.values())
+        _INSTANCES.clear()
+    for backend in backends:
+        try:
+            backend.close()
+        except Exception as err:  # pylint: disable=broad-except
+            print(f"Error closing translation backend {backend.name}: {err}")
+
+
+atexit.register(close_backends)
@@ -0,0 +1,141 @@
+"""
+Persistent translation memory, shared across runs, videos and languages.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+from appdirs import user_config_dir  # type: ignore
+
+TRANSLATION_MEMORY_FILE = (
+    user_config_dir("video-subtitles", "cache", roaming=True) + "-translations"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    source TEXT NOT NULL,
+    from_lang TEXT NOT NULL,
+    to_lang TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    PRIMARY KEY (source, from_lang, to_lang, backend)
+)
+"""
+
+# Keeps each query well under sqlite's bound parameter limit.
+_QUERY_BATCH = 500
+
+
+def normalize_text(text: str) -> str:
+    """Normalize source text so trivially different cues share an entry."""
+    return " ".join(text.split())
+
+
+class TranslationMemory:
+    """Maps (source text, from lang, to lang, backend) to a translation."""
+
+    def __init__(self, db_path: str = TRANSLATION_MEMORY_FILE) -> None:
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=60.0)
+        with self.lock:
+            if db_path != ":memory:":
+                self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(_SCHEMA)
+            self.conn.commit()
+
+    def get_many(
+        self, texts: list[str], from_lang: str, to_lang: str, backend: str
+    ) -> dict[str, str]:
+        """Returns the known translations, keyed by normalized source text."""
+        sources = list({normalize_text(text) for text in texts})
+        out: dict[str, str] = {}
+        with self.lock:
+            for i in range(0, len(sources), _QUERY_BATCH):
+                batch = sources[i : i + _QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    "SELECT source, translation FROM translations "
+                    "WHERE from_lang = ? AND to_lang = ? AND backend = ? "
+                    f"AND source IN ({placeholders})",
+                    [from_lang, to_lang, backend, *batch],
+                )
+                out.update(rows)
+        return out
+
+    def put_many(
+        self, pairs: dict[str, str], from_lang: str, to_lang: str, backend: str
+    ) -> None:
+        """Stores translations, keyed by source text."""
+        rows = [
+            (normalize_text(source), from_lang, to_lang, backend, translation)
+            for source, translation in pairs.items()
+        ]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self.conn.commit()
+
+    def close(self) -> None:
+        """Closes the database."""
+        with self.lock:
+            self.conn.close()
+
+
+class TranslationJournal:
+    """Append-only JSONL record of the cues translated for one output file.
+
+    The first line records the languages and backend, every other line is a
+    {"source": ..., "translation": ...} pair. A retry, crash or re-run loads
+    it back and only translates what is left.
+    """
+
+    def __init__(self, path: str, from_lang: str, to_lang: str, backend: str) -> None:
+        self.path = path
+        self.header = {"from_lang": from_lang, "to_lang": to_lang, "backend": backend}
+        self.mode = "w"
+
+    def load(self) -> dict[str, str]:
+        """Returns the journaled translations, keyed by normalized source text."""
+        out: dict[str, str] = {}
+        self.mode = "w"
+        if not os.path.exists(self.path):
+            return out
+        with open(self.path, encoding="utf-8", mode="r") as f:
+            lines = f.read().split("\n")
+        try:
+            if json.loads(lines[0]) != self.header:
+                return out
+        except ValueError:
+            return out
+        self.mode = "a"
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:  # Blank last line or a torn write from a crash.
+                continue
+            out[normalize_text(entry["source"])] = entry["translation"]
+        if lines[-1]:
+            with open(self.path, encoding="utf-8", mode="a") as f:
+                f.write("\n")
+        return out
+
+    def append(self, pairs: dict[str, str]) -> None:
+        """Records translated cues, starting a new journal if none was loaded."""
+        with open(self.path, encoding="utf-8", mode=self.mode) as f:
+            if self.mode == "w":
+                f.write(json.dumps(self.header) + "\n")
+                self.mode = "a"
+            for source, translation in pairs.items():
+                entry = {"source": source, "translation": translation}
+                f.write(json.dumps(entry) + "\n")
+
+    def remove(self) -> None:
+        """Deletes the journal once the output is complete."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -2,17 +2,26 @@
 
 # pylint: disable=line-too-long
 
+import argparse
+import json
 import os
 import subprocess
 import tempfile
-from dataclasses import dataclass
+import time
+from dataclasses import asdict, dataclass
 from shutil import which
+from typing import Iterable
 
-from download import download  # type: ignore
+from appdirs import user_config_dir  # type: ignore
 
 INSTALL_TRANSCRIBE_ANYTHING_CUDA = (
     "https://raw.githubusercontent.com/zackees/transcribe-anything/main/install_cuda.py"
 )
+# A sibling of the transcription cache, which is a file and not a folder.
+GPU_CACHE_FILE = (
+    user_config_dir("video-subtitles", "cache", roaming=True) + "-gpus.json"
+)
+GPU_CACHE_TTL = 60 * 60
 
 
 @dataclass
@@ -52,15 +61,47 @@ def query_cuda_video_cards() -> list[GraphicsInfo]:
         return []
     cmd = "nvidia-smi --query-gpu=name,memory.total --format=csv,noheader"
     text = subprocess.check_output(cmd.split(" "), universal_newlines=True)
+    return parse_nvidia_smi(text)
+
+
+def parse_nvidia_smi(text: str) -> list[GraphicsInfo]:
+    """Parse the name,memory.total csv output of nvidia-smi."""
     lines = [line.strip() for line in text.split("\n") if line.strip() != ""]
     out: list[GraphicsInfo] = []
     for i, line in enumerate(lines):
-        name, memory = line.split(",")
+        name, memory = line.rsplit(",", 1)
         memory_gb = int(memory.strip().split(" ")[0]) / 1024.0
-        out.append(GraphicsInfo(name, memory_gb, i))
+        out.append(GraphicsInfo(name.strip(), memory_gb, i))
     return out
 
 
+def cached_cuda_video_cards(
+    ttl: float = GPU_CACHE_TTL, cache_file: str = GPU_CACHE_FILE
+) -> list[GraphicsInfo]:
+    """Query the video cards, reusing the answer for ttl seconds.
+
+    nvidia-smi takes a noticeable fraction of a second, too slow to run on
+    every invocation of the command line tool.
+    """
+    try:
+        with open(cache_file, encoding="utf-8", mode="r") as file:
+            data = json.load(file)
+        if 0 <= time.time() - data["time"] < ttl:
+            return [GraphicsInfo(**card) for card in data["cards"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    cards = query_cuda_video_cards()
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        write_utf8(
+            cache_file,
+            json.dumps({"time": time.time(), "cards": [asdict(card) for card in cards]}),
+        )
+    except OSError as err:
+        print(f"Could not cache video cards in {cache_file}: {err}")
+    return cards
+
+
 def ensure_transcribe_anything_installed() -> None:
     """Ensure that transcribe_anything is installed."""
     print("Checking that transcribe_anything is installed...")
@@ -70,6 +111,10 @@ def ensure_transcribe_anything_installed() -> None:
         return
     except Exception:  # pylint: disable=broad-except
         print("transcribe_anything is not installed, installing now...")
+        from download import (  # type: ignore  # pylint: disable=import-outside-toplevel
+            download,
+        )
+
         with tempfile.TemporaryDirectory() as tempdir:
             download(
                 INSTALL_TRANSCRIBE_ANYTHING_CUDA,
@@ -82,14 +127,46 @@ def ensure_transcribe_anything_installed() -> None:
                 )  # pylint: disable=raise-missing-from
 
 
+def check_languages(languages: Iterable[str]) -> list[str]:
+    """Normalize language codes, raises ValueError on an unknown one."""
+    codes = [language.strip().lower() for language in languages]
+    for code in codes:
+        if code not in LANGUAGE_CODES:
+            raise ValueError(f"Unknown language: {code}")
+    return codes
+
+
 def parse_languages(languages_str: str) -> list[str]:
     """Parse a comma-separated list of languages and return a list of language codes."""
-    languages = languages_str.split(",")
-    languages = [language.strip().lower() for language in languages]
-    for language in languages:
-        if language not in LANGUAGE_CODES:
-            raise ValueError(f"Unknown language: {language}")
-    return languages
+    return check_languages(languages_str.split(","))
+
+
+def check_workers(
+    parser: argparse.ArgumentParser, args: argparse.Namespace, names: Iterable[str]
+) -> None:
+    """Exit with a usage error when one of the worker counts is below 1."""
+    for name in names:
+        value = getattr(args, name)
+        if value is not None and value < 1:
+            parser.error(f"--{name.replace('_', '-')} must be at least 1")
+
+
+def add_transcription_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --languages and --model arguments of the command line tools."""
+    parser.add_argument(
+        "--languages",
+        type=parse_languages,
+        help="Output languages as a comma-separated list.",
+        metavar="{en,es,fr,de,it,ru,zh}",
+        required=True,
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        help="Model to use.",
+        default="large",
+        choices=MODELS.keys(),
+    )
 
 
 LANGUAGE_CODES = {
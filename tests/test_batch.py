@@ -0,0 +1,114 @@
+"""
+Unit test file.
+"""
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from video_subtitles import run as run_module
+from video_subtitles.batch import (
+    FileStatus,
+    assign_output_names,
+    collect_inputs,
+    format_summary,
+    run_batch,
+)
+
+
+def touch(path: str) -> str:
+    """Create an empty file and its folders."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, encoding="utf-8", mode="w"):
+        pass
+    return os.path.abspath(path)
+
+
+class BatchTester(unittest.TestCase):
+    """Tests batch input collection and reporting."""
+
+    def test_collect_inputs(self) -> None:
+        """Directories, globs and manifests expand to unique media files."""
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            a_mp4 = touch(os.path.join(tmpdirname, "videos", "a.mp4"))
+            b_mkv = touch(os.path.join(tmpdirname, "videos", "nested", "b.MKV"))
+            touch(os.path.join(tmpdirname, "videos", "notes.txt"))
+            c_wav = touch(os.path.join(tmpdirname, "audio", "c.wav"))
+            manifest = os.path.join(tmpdirname, "manifest.txt")
+            with open(manifest, encoding="utf-8", mode="w") as file:
+                file.write("# lectures\naudio/*.wav\n\nvideos/a.mp4  # again\n")
+            files = collect_inputs([os.path.join(tmpdirname, "videos")], manifest)
+            self.assertEqual([a_mp4, b_mkv, c_wav], files)
+            with self.assertRaises(FileNotFoundError):
+                collect_inputs([os.path.join(tmpdirname, "missing", "*.mp4")])
+
+    def test_format_summary(self) -> None:
+        """The summary counts failures and shows their errors."""
+        summary = format_summary(
+            [
+                FileStatus(file="a.mp4", status="ok", transcribe_seconds=2.0),
+                FileStatus(file="b.mp4", status="failed", error="boom"),
+            ]
+        )
+        self.assertIn("boom", summary)
+        self.assertTrue(summary.endswith("1 succeeded, 1 failed"))
+
+    def test_assign_output_names(self) -> None:
+        """Files with the same name get their own output folders."""
+        files = [os.path.join("a", "ep01.mp4"), os.path.join("b", "ep01.mp4"), "ep01_2.mkv"]
+        self.assertEqual(
+            {files[0]: "ep01", files[1]: "ep01_2", files[2]: "ep01_2_2"},
+            assign_output_names(files, "out"),
+        )
+
+    def test_run_batch(self) -> None:
+        """Translation overlaps the next transcription and failures do not stop the batch."""
+        files = [
+            os.path.join("a", "ep01.mp4"),
+            os.path.join("b", "ep01.mp4"),
+            os.path.join("c", "broken.mp4"),
+        ]
+        events: list[str] = []
+        first_translated = threading.Event()
+        output_names: list[str] = []
+
+        def transcribe_file(file: str, output_name: str, **_) -> str:
+            if file == files[1]:
+                # Only reached when the first translation runs in parallel.
+                self.assertTrue(first_translated.wait(timeout=10))
+            if file == files[2]:
+                raise RuntimeError("cannot decode")
+            events.append(f"transcribe {file}")
+            output_names.append(output_name)
+            return file
+
+        def translate_transcript(transcript: str, *_args) -> str:
+            events.append(f"translate {transcript}")
+            first_translated.set()
+            return f"out_{transcript}"
+
+        with mock.patch.object(
+            run_module, "transcribe_file", transcribe_file
+        ), mock.patch.object(run_module, "translate_transcript", translate_transcript):
+            statuses = run_batch(
+                files,
+                deepl_api_key=None,
+                out_languages=["es"],
+                model="large",
+                formats=["srt"],
+                transcription_workers=1,
+                file_workers=1,
+                device="cpu",
+            )
+        self.assertEqual(
+            [f"transcribe {files[0]}", f"translate {files[0]}"], events[:2]
+        )
+        self.assertEqual(["ep01", "ep01_2"], output_names)
+        self.assertEqual(["ok", "ok", "failed"], [status.status for status in statuses])
+        self.assertEqual(f"out_{files[1]}", statuses[1].outdir)
+        self.assertEqual("cannot decode", statuses[2].error)
+
+
+if __name__ == "__main__":
+    unittest.main()
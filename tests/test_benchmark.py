@@ -0,0 +1,236 @@
+"""
+Benchmarks of the subtitle pipeline on synthetic subtitles.
+
+The baselines in benchmark_baselines.json are wall clock times of one
+machine, so the benchmarks only run with VIDEO_SUBTITLES_BENCHMARK=1.
+
+Every stage is timed on 1k and 10k cue files, and 100k cue files with
+VIDEO_SUBTITLES_BENCHMARK_FULL=1, aligning reruns always on 100k cues,
+and compared against the baselines. A stage fails when it gets more than
+VIDEO_SUBTITLES_BENCHMARK_TOLERANCE (default 3) times slower. Run with
+VIDEO_SUBTITLES_BENCHMARK_UPDATE=1 to record new baselines after an
+intended change.
+"""
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import unittest
+from typing import Callable
+from unittest import mock
+
+from video_subtitles.convert_to_webvtt import convert_to_webvtt
+from video_subtitles.incremental import align_cues
+from video_subtitles.srt_cues import Cue, format_timestamp, load_srt, parse_srt
+from video_subtitles.subtitle_formats import SUBTITLE_FORMATS, emit
+from video_subtitles.translate import srt_wrap, translate, wrap_cues
+from video_subtitles.translation_backends import LocalBackend, register_backend
+from video_subtitles.translation_memory import TranslationMemory
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+BASELINES_FILE = os.path.join(HERE, "benchmark_baselines.json")
+UPDATE = os.environ.get("VIDEO_SUBTITLES_BENCHMARK_UPDATE", "") == "1"
+ENABLED = UPDATE or os.environ.get("VIDEO_SUBTITLES_BENCHMARK", "") == "1"
+FULL = os.environ.get("VIDEO_SUBTITLES_BENCHMARK_FULL", "") == "1"
+SIZES = (1_000, 10_000, 100_000) if FULL else (1_000, 10_000)
+# Aligning a rerun is always timed at the size of a long recording.
+ALIGN_SIZES = (10_000, 100_000)
+TOLERANCE = float(os.environ.get("VIDEO_SUBTITLES_BENCHMARK_TOLERANCE", "3"))
+# Timings this short are mostly noise, they are allowed to grow this much.
+SLACK_SECONDS = 0.05
+# Latency of every request to the stub translation backend.
+STUB_LATENCY_SECONDS = 0.001
+
+WORDS = (
+    "the a we you they it government vaccine program people doctors said "
+    "should could would never always nation outbreak shot every man woman "
+    "child disease control center homes harmless humans animals killer"
+).split()
+
+
+def make_srt(num_cues: int, seed: int = 0) -> str:
+    """Make a deterministic srt with whisper-like repeats, dialog and long lines."""
+    rng = random.Random(seed)
+    blocks: list[str] = []
+    start = 0
+    for i in range(1, num_cues + 1):
+        roll = rng.random()
+        if roll < 0.15:
+            text = rng.choice(["[Music]", "[Applause]", "Thank you.", "Okay."])
+        elif roll < 0.25:
+            text = "- " + " ".join(rng.choices(WORDS, k=4))
+            text += "\n- " + " ".join(rng.choices(WORDS, k=5))
+        else:
+            text = " ".join(rng.choices(WORDS, k=rng.randint(4, 24)))
+        end = start + rng.randint(800, 6000)
+        blocks.append(
+            f"{i}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n"
+        )
+        start = end + rng.randint(0, 500)
+    return "\n".join(blocks) + "\n"
+
+
+@register_backend
+class StubBackend(LocalBackend):
+    """Deterministic offline backend that takes a fixed time per request."""
+
+    name = "benchmark-stub"
+    # High enough that the rate limiter never waits.
+    default_rate = 1e6
+    latency = STUB_LATENCY_SECONDS
+
+
+def time_best(func: Callable[[], None], repeat: int) -> float:
+    """Best wall time of running func repeat times."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@unittest.skipUnless(ENABLED, "set VIDEO_SUBTITLES_BENCHMARK=1 to run the benchmarks")
+class BenchmarkTester(unittest.TestCase):
+    """Times every stage and fails on regressions against the baselines."""
+
+    tmpdir = ""
+    srt_files: dict[int, str] = {}
+    baselines: dict[str, float] = {}
+    results: dict[str, float] = {}
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.srt_files = {}
+        for size in SIZES:
+            path = os.path.join(cls.tmpdir, f"{size}.srt")
+            with open(path, encoding="utf-8", mode="w") as file:
+                file.write(make_srt(size))
+            cls.srt_files[size] = path
+        cls.baselines = {}
+        if os.path.exists(BASELINES_FILE):
+            with open(BASELINES_FILE, encoding="utf-8", mode="r") as file:
+                cls.baselines = json.load(file)
+        cls.results = {}
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+        print("\nBenchmark                     seconds   baseline")
+        for name, seconds in sorted(cls.results.items()):
+            baseline = cls.baselines.get(name)
+            baseline_str = f"{baseline:9.4f}" if baseline is not None else "        -"
+            print(f"{name:<28} {seconds:9.4f}  {baseline_str}")
+        if UPDATE:
+            results = {name: round(sec, 4) for name, sec in cls.results.items()}
+            baselines = dict(cls.baselines, **results)
+            with open(BASELINES_FILE, encoding="utf-8", mode="w") as file:
+                json.dump(dict(sorted(baselines.items())), file, indent=2)
+                file.write("\n")
+
+    def check(self, stage: str, size: int, func: Callable[[], None]) -> None:
+        """Time a stage and compare it against its baseline."""
+        name = f"{stage}/{size}"
+        seconds = time_best(func, repeat=1 if size >= 100_000 else 3)
+        self.results[name] = seconds
+        baseline = self.baselines.get(name)
+        if UPDATE or baseline is None:
+            return
+        limit = baseline * TOLERANCE + SLACK_SECONDS
+        self.assertLess(
+            seconds,
+            limit,
+            f"{name} took {seconds:.4f}s, baseline {baseline:.4f}s (limit {limit:.4f}s)",
+        )
+
+    def test_parse(self) -> None:
+        """Parsing, sorting and renumbering."""
+        for size, path in self.srt_files.items():
+
+            def run(path=path) -> None:
+                load_srt(path)
+
+            self.check("parse", size, run)
+            self.assertEqual(size, len(load_srt(path)))
+
+    def test_srt_wrap(self) -> None:
+        """Wrapping a srt file in place."""
+        for size, path in self.srt_files.items():
+            copy = os.path.join(self.tmpdir, f"wrap_{size}.srt")
+
+            def run(path=path, copy=copy) -> None:
+                shutil.copyfile(path, copy)
+                srt_wrap(copy)
+
+            self.check("srt_wrap", size, run)
+
+    def test_convert_to_webvtt(self) -> None:
+        """Converting a srt file to webvtt."""
+        for size, path in self.srt_files.items():
+            out = os.path.join(self.tmpdir, f"{size}.vtt")
+
+            def run(path=path, out=out) -> None:
+                convert_to_webvtt(path, out)
+
+            self.check("convert_to_webvtt", size, run)
+
+    def test_output(self) -> None:
+        """Writing every output format, as run() finishes a language."""
+        for size, path in self.srt_files.items():
+            cues = load_srt(path)
+            out_base = os.path.join(self.tmpdir, f"out_{size}")
+
+            def run(cues=cues, out_base=out_base) -> None:
+                emit(wrap_cues(cues), out_base, "en", list(SUBTITLE_FORMATS))
+
+            self.check("output", size, run)
+
+    def test_align(self) -> None:
+        """Matching the cues of a rerun to the previous run, as reused translations do."""
+        for size in ALIGN_SIZES:
+            old = tuple(parse_srt(make_srt(size).splitlines(keepends=True)))
+            # Re-transcribed: shifted a bit, with every 50th cue changed.
+            new = tuple(
+                cue._replace(
+                    start_ms=cue.start_ms + 300,
+                    end_ms=cue.end_ms + 300,
+                    text=cue.text if cue.number % 50 else f"{cue.text} again",
+                )
+                for cue in old
+            )
+
+            def run(old=old, new=new) -> None:
+                align_cues(old, new)
+
+            self.check("align", size, run)
+            self.assertEqual(size - size // 50, len(align_cues(old, new)))
+
+    def test_translate(self) -> None:
+        """Translating a srt file against the stub backend, cold memory each run."""
+        for size, path in self.srt_files.items():
+            out = os.path.join(self.tmpdir, f"{size}.es.srt")
+
+            def run(path=path, out=out) -> None:
+                db_path = os.path.join(self.tmpdir, "memory.db")
+                memory = TranslationMemory(db_path)
+                try:
+                    translate(StubBackend.name, path, out, "EN", "ES", memory=memory)
+                finally:
+                    memory.close()
+                    for suffix in ("", "-wal", "-shm"):
+                        if os.path.exists(db_path + suffix):
+                            os.remove(db_path + suffix)
+
+            with mock.patch("builtins.print"):
+                self.check("translate", size, run)
+            cues: list[Cue] = load_srt(out)
+            self.assertEqual(size, len(cues))
+            self.assertTrue(cues[0].text.startswith("[es] "))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+Unit test file.
+"""
+import threading
+import unittest
+from unittest import mock
+
+from video_subtitles.browser_pool import BrowserPool
+from video_subtitles.translation_backends import DeeplFreeBackend
+
+
+class FakeBrowser:
+    """Stands in for a srtranslator DeeplTranslator."""
+
+    def __init__(self) -> None:
+        self.alive = True
+        self.quit_calls = 0
+
+    def translate(self, text: str, from_lang: str, to_lang: str) -> str:  # pylint: disable=unused-argument
+        """Tags every line, or fails once the browser crashed."""
+        if not self.alive:
+            raise RuntimeError("browser crashed")
+        return "\n".join(f"{to_lang}:{line}" for line in text.split("\n"))
+
+    def quit(self) -> None:
+        """Counts the calls."""
+        self.quit_calls += 1
+
+
+def make_pool(**kwargs) -> tuple[BrowserPool, list[FakeBrowser]]:
+    """A pool of fake browsers and the list of browsers it launched."""
+    launched: list[FakeBrowser] = []
+
+    def factory() -> FakeBrowser:
+        launched.append(FakeBrowser())
+        return launched[-1]
+
+    kwargs.setdefault("max_size", 2)
+    pool = BrowserPool(factory, health_check=lambda browser: browser.alive, **kwargs)
+    return pool, launched
+
+
+class BrowserPoolTester(unittest.TestCase):
+    """Tests leasing, recycling and closing browsers."""
+
+    def test_reuses_browsers(self) -> None:
+        """Sequential leases share one browser."""
+        pool, launched = make_pool()
+        for _ in range(5):
+            with pool.lease() as browser:
+                browser.translate("hi", "en", "es")
+        self.assertEqual(1, len(launched))
+        pool.close()
+        self.assertEqual(1, launched[0].quit_calls)
+
+    def test_waits_at_max_size(self) -> None:
+        """No more than max_size browsers are launched or leased at once."""
+        pool, launched = make_pool(max_size=2)
+        lock = threading.Lock()
+        in_use: list[FakeBrowser] = []
+        most_in_use = [0]
+
+        def work() -> None:
+            for _ in range(20):
+                with pool.lease() as browser:
+                    with lock:
+                        in_use.append(browser)
+                        most_in_use[0] = max(most_in_use[0], len(in_use))
+                    browser.translate("hi", "en", "es")
+                    with lock:
+                        in_use.remove(browser)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        self.assertLessEqual(len(launched), 2)
+        self.assertLessEqual(most_in_use[0], 2)
+        pool.close()
+
+    def test_recycles_unhealthy_and_failed(self) -> None:
+        """Dead browsers are replaced and a failed request quits its browser."""
+        pool, launched = make_pool()
+        with pool.lease() as browser:
+            pass
+        browser.alive = False
+        with pool.lease() as replacement:
+            self.assertIsNot(browser, replacement)
+        self.assertEqual(1, browser.quit_calls)
+        with self.assertRaises(RuntimeError):
+            with pool.lease() as failing:
+                failing.alive = False
+                failing.translate("hi", "en", "es")
+        self.assertEqual(1, failing.quit_calls)
+        self.assertEqual(0, pool.size)
+        self.assertEqual(2, len(launched))
+        pool.close()
+
+    def test_recycles_after_max_uses(self) -> None:
+        """A browser is replaced once it has served max_uses requests."""
+        pool, launched = make_pool(max_uses=3)
+        for _ in range(7):
+            with pool.lease():
+                pass
+        self.assertEqual(3, len(launched))
+        self.assertEqual([1, 1, 0], [browser.quit_calls for browser in launched])
+        pool.close()
+
+    def test_close(self) -> None:
+        """Leased browsers are quit when returned to a closed pool."""
+        pool, launched = make_pool()
+        with pool.lease():
+            pool.close()
+            self.assertEqual(0, launched[0].quit_calls)
+        self.assertEqual(1, launched[0].quit_calls)
+        with self.assertRaises(RuntimeError):
+            with pool.lease():
+                pass
+
+    def test_deepl_free_backend(self) -> None:
+        """The free DeepL backend translates through its pool."""
+        with mock.patch.object(DeeplFreeBackend, "launch_browser", FakeBrowser):
+            backend = DeeplFreeBackend()
+            backend.pool.health_check = lambda browser: browser.alive
+            with mock.patch("builtins.print"):
+                self.assertEqual(
+                    ["es:a", "es:b"], backend.translate_batch(["a", "b"], "en", "es")
+                )
+                backend.translate_batch(["c"], "en", "fr")
+                self.assertEqual(1, backend.pool.launched)
+                backend.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Unit test file.
+"""
+import array
+import math
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import wave
+from unittest import mock
+
+from video_subtitles import run as run_module
+from video_subtitles.chunking import (
+    Chunk,
+    find_split_points,
+    split_wav,
+    stitch,
+    transcribe_chunks,
+)
+from video_subtitles.srt_cues import Cue, write_srt
+
+RATE = 8000
+
+
+def write_wav(path: str, segments: list[tuple[float, bool]]) -> None:
+    """Write a mono wav of (seconds, loud) segments, a tone or silence."""
+    samples = array.array("h")
+    for seconds, loud in segments:
+        for i in range(int(seconds * RATE)):
+            samples.append(int(8000 * math.sin(i / 5.0)) if loud else 0)
+    if sys.byteorder == "big":
+        samples.byteswap()
+    with wave.Wave_write(path) as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(samples.tobytes())
+
+
+def fake_extract_audio(file: str, out_wav: str) -> None:  # pylint: disable=unused-argument
+    """Offline extract_audio, writes an empty wav."""
+    write_wav(out_wav, [])
+
+
+def fake_split_wav(wav_path: str, points: list[int], out_dir: str) -> list[Chunk]:  # pylint: disable=unused-argument
+    """Offline split_wav, three one second chunks."""
+    return [Chunk(os.path.join(out_dir, f"{i}.wav"), i * 1000, (i + 1) * 1000) for i in range(3)]
+
+
+class ChunkingTester(unittest.TestCase):
+    """Tests splitting audio and stitching the subtitles back together."""
+
+    def test_split_at_silence(self) -> None:
+        """Splits land in the pauses near each boundary."""
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            wav_path = os.path.join(tmpdirname, "audio.wav")
+            # Pauses at 8-9s and 21-22s, chunks of about 10s.
+            write_wav(
+                wav_path,
+                [(8, True), (1, False), (12, True), (1, False), (8, True)],
+            )
+            points = find_split_points(wav_path, 10, search_seconds=3)
+            self.assertEqual(2, len(points))
+            self.assertTrue(8 * RATE <= points[0] <= 9 * RATE, points)
+            self.assertTrue(21 * RATE <= points[1] <= 22 * RATE, points)
+            chunks = split_wav(wav_path, points, tmpdirname)
+            self.assertEqual(3, len(chunks))
+            self.assertEqual(0, chunks[0].start_ms)
+            self.assertEqual(30000, chunks[-1].end_ms)
+            for previous, chunk in zip(chunks, chunks[1:]):
+                self.assertEqual(previous.end_ms, chunk.start_ms)
+            with wave.open(chunks[1].path, "rb") as wav:
+                self.assertEqual(points[1] - points[0], wav.getnframes())
+
+    def test_short_audio_is_one_chunk(self) -> None:
+        """Audio shorter than one and a half chunks is not split."""
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            wav_path = os.path.join(tmpdirname, "audio.wav")
+            write_wav(wav_path, [(14, True)])
+            self.assertEqual([], find_split_points(wav_path, 10))
+
+    def test_stitch(self) -> None:
+        """Cues are shifted by their chunk offset, clipped and renumbered."""
+        chunks = [Chunk("a.wav", 0, 10000), Chunk("b.wav", 10000, 20000)]
+        results = {
+            "a.wav": [Cue(1, 0, 4000, "one"), Cue(2, 9000, 10500, "two")],
+            "b.wav": [Cue(1, 500, 2000, "three")],
+        }
+        cues = transcribe_chunks(chunks, lambda chunk: results[chunk.path], workers=2)
+        self.assertEqual(
+            [
+                Cue(1, 0, 4000, "one"),
+                Cue(2, 9000, 10000, "two"),
+                Cue(3, 10500, 12000, "three"),
+            ],
+            cues,
+        )
+        self.assertEqual([], stitch([]))
+
+    @mock.patch.object(run_module, "extract_audio", fake_extract_audio)
+    @mock.patch.object(run_module, "find_split_points", lambda *_args: [])
+    @mock.patch.object(run_module, "split_wav", fake_split_wav)
+    def test_cancel_between_chunks(self) -> None:
+        """A cancelled chunked transcription stops before the next chunk."""
+        cancel_event = threading.Event()
+        transcribed: list[str] = []
+
+        def fake_transcribe(file, output_dir, *_args) -> str:
+            transcribed.append(os.path.basename(file))
+            os.makedirs(output_dir)
+            write_srt(os.path.join(output_dir, "out.srt"), [Cue(1, 0, 500, "one")])
+            cancel_event.set()
+            return output_dir
+
+        with mock.patch.object(run_module, "transcribe_on_device", fake_transcribe):
+            with mock.patch("builtins.print"):
+                segments = run_module.iter_transcribe_chunked(
+                    "video.mp4", "tiny", "cpu", 1.0, 1, cancel_event=cancel_event
+                )
+                self.assertEqual([Cue(1, 0, 500, "one")], next(segments))
+                with self.assertRaises(RuntimeError):
+                    next(segments)
+        self.assertEqual(["0.wav"], transcribed)
+
+
+if __name__ == "__main__":
+    unittest.main()
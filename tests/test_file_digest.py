@@ -0,0 +1,49 @@
+"""
+Unit test file.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from disklru import DiskLRUCache  # type: ignore
+
+from video_subtitles.file_digest import file_digest, hash_file
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+TEST_SRT = os.path.join(HERE, "test.srt")
+
+
+class FileDigestTester(unittest.TestCase):
+    """Tests the content digest used for the transcription cache."""
+
+    def test_digest_follows_content(self) -> None:
+        """A renamed copy shares a digest, a rewritten file does not."""
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            copy = os.path.join(tmpdirname, "renamed.srt")
+            shutil.copy(TEST_SRT, copy)
+            self.assertEqual(file_digest(TEST_SRT), file_digest(copy))
+            with open(copy, encoding="utf-8", mode="a") as f:
+                f.write("\n")
+            self.assertNotEqual(file_digest(TEST_SRT), file_digest(copy))
+
+    def test_cached_digest(self) -> None:
+        """The cached digest is reused until size or mtime changes."""
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            cache = DiskLRUCache(os.path.join(tmpdirname, "digests.db"), 16)
+            path = os.path.join(tmpdirname, "media.bin")
+            with open(path, mode="wb") as f:
+                f.write(b"a" * 1000)
+            first = file_digest(path, cache)
+            self.assertEqual(first, hash_file(path))
+            self.assertEqual(first, file_digest(path, cache))
+            with open(path, mode="wb") as f:
+                f.write(b"b" * 2000)
+            self.assertEqual(hash_file(path), file_digest(path, cache))
+            self.assertNotEqual(first, file_digest(path, cache))
+            cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Unit test file.
+"""
+import threading
+import unittest
+from unittest import mock
+
+from video_subtitles import util
+from video_subtitles.gpu_scheduler import GpuScheduler
+
+NVIDIA_SMI_OUTPUT = """NVIDIA GeForce RTX 3060, 12288 MiB
+NVIDIA GeForce RTX 4090, 24564 MiB
+NVIDIA T400, 2048 MiB
+"""
+
+
+def mocked_cards() -> list[util.GraphicsInfo]:
+    """Query the video cards against canned nvidia-smi output."""
+    with mock.patch.object(util, "which", return_value="/usr/bin/nvidia-smi"):
+        with mock.patch.object(
+            util.subprocess, "check_output", return_value=NVIDIA_SMI_OUTPUT
+        ):
+            return util.query_cuda_video_cards()
+
+
+class GpuSchedulerTester(unittest.TestCase):
+    """Tests packing transcription jobs onto video cards."""
+
+    def test_query(self) -> None:
+        """nvidia-smi output is parsed into cards."""
+        cards = mocked_cards()
+        self.assertEqual(
+            ["NVIDIA GeForce RTX 3060", "NVIDIA GeForce RTX 4090", "NVIDIA T400"],
+            [card.name for card in cards],
+        )
+        self.assertEqual([12.0, 23.98828125, 2.0], [card.memory_gb for card in cards])
+        self.assertEqual([0, 1, 2], [card.idx for card in cards])
+
+    def test_bin_packing(self) -> None:
+        """Jobs go to the fullest card that fits and overflow waits."""
+        scheduler = GpuScheduler(mocked_cards())
+        # 11.5 GB usable on the 12 GB card fits two medium jobs, the 24 GB
+        # card four, the 2 GB card none.
+        self.assertEqual(6, scheduler.capacity("medium"))
+        self.assertEqual(3, scheduler.capacity("large"))
+        small = scheduler.try_acquire("tiny")
+        assert small is not None
+        self.assertEqual(2, small.idx)
+        placed: list[util.GraphicsInfo] = []
+        for _ in range(6):
+            medium = scheduler.try_acquire("medium")
+            assert medium is not None
+            placed.append(medium)
+        self.assertEqual([0, 0, 1, 1, 1, 1], [card.idx for card in placed])
+        self.assertIsNone(scheduler.try_acquire("medium"))
+        with self.assertRaises(ValueError):
+            GpuScheduler(mocked_cards()[2:]).acquire("large")
+
+        acquired: list[int] = []
+
+        def wait_for_card() -> None:
+            card = scheduler.acquire("medium")
+            acquired.append(card.idx)
+
+        waiter = threading.Thread(target=wait_for_card)
+        waiter.start()
+        waiter.join(0.2)
+        self.assertEqual([], acquired)
+        scheduler.release(placed[0], "medium")
+        waiter.join(5)
+        self.assertEqual([0], acquired)
+
+    def test_model_larger_than_card(self) -> None:
+        """A model that only fits without the reserve is refused instead of waiting forever."""
+        card = util.GraphicsInfo(name="NVIDIA GeForce RTX 3080", memory_gb=10.0, idx=0)
+        scheduler = GpuScheduler([card])
+        self.assertFalse(scheduler.fits("large"))
+        self.assertTrue(scheduler.fits("medium"))
+        self.assertEqual(0, scheduler.capacity("large"))
+        with self.assertRaises(ValueError):
+            scheduler.acquire("large")
+        self.assertFalse(GpuScheduler([]).fits("tiny"))
+
+    def test_cancel_while_waiting(self) -> None:
+        """A queued job gives up when it is cancelled."""
+        scheduler = GpuScheduler(mocked_cards()[:1])
+        with scheduler.reserve("large"):
+            cancel_event = threading.Event()
+            cancel_event.set()
+            with self.assertRaises(RuntimeError):
+                scheduler.acquire("large", cancel_event)
+        self.assertEqual(11.5, scheduler.free_gb[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Unit test file.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from video_subtitles import run as run_module
+from video_subtitles.incremental import (
+    align_cues,
+    get_sources_path,
+    previous_translations,
+    write_sources,
+)
+from video_subtitles.srt_cues import Cue, load_srt, write_srt
+
+
+class FakeTranslator:  # pylint: disable=too-few-public-methods
+    """Offline translate_cues that records the cues it was sent."""
+
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+
+    def __call__(self, api_key, cues, from_lang, to_lang, **_kwargs) -> list[Cue]:  # pylint: disable=unused-argument
+        self.sent.extend(cue.text for cue in cues)
+        return [cue._replace(text=f"[{to_lang}] {cue.text}") for cue in cues]
+
+
+def make_transcript(outdir: str, texts: list[tuple[int, str]]) -> run_module.Transcript:
+    """A transcript of one second cues starting at the given seconds."""
+    cues = tuple(
+        Cue(i, start * 1000, start * 1000 + 900, text)
+        for i, (start, text) in enumerate(texts, start=1)
+    )
+    return run_module.Transcript(
+        file="video.mp4", outdir=outdir, out_en_dir=os.path.join(outdir, "en"), cues=cues
+    )
+
+
+class IncrementalTester(unittest.TestCase):
+    """Tests reusing the translations of a previous run."""
+
+    def test_align_cues(self) -> None:
+        """Cues match in order by text when they start close together."""
+        old = [
+            Cue(1, 0, 900, "Hello there."),
+            Cue(2, 1000, 1900, "How are you?"),
+            Cue(3, 2000, 2900, "[Music]"),
+            Cue(4, 9000, 9900, "[Music]"),
+        ]
+        new = [
+            Cue(1, 100, 900, "Hello  there."),
+            Cue(2, 1000, 1900, "How are you doing?"),
+            Cue(3, 2500, 2900, "[Music]"),
+            Cue(4, 30000, 30900, "[Music]"),
+        ]
+        self.assertEqual({0: 0, 2: 2}, align_cues(old, new))
+
+    @mock.patch.object(run_module, "backoff_delay", lambda _attempt: 0.0)
+    def test_translate_transcript(self) -> None:
+        """Only changed cues are sent again and the outputs keep every cue."""
+        translator = FakeTranslator()
+        with tempfile.TemporaryDirectory() as outdir, mock.patch.object(
+            run_module, "translate_cues", translator
+        ), mock.patch("builtins.print"):
+            first = make_transcript(outdir, [(0, "one"), (1, "two"), (2, "three")])
+            run_module.translate_transcript(first, "key", ["es"], ["srt", "json"])
+            self.assertEqual(["one", "two", "three"], translator.sent)
+            translator.sent.clear()
+            second = make_transcript(
+                outdir, [(0, "one"), (1, "TWO"), (2, "three"), (3, "four")]
+            )
+            run_module.translate_transcript(second, "key", ["es"], ["srt", "json"])
+            self.assertEqual(["TWO", "four"], translator.sent)
+            self.assertEqual(
+                ["[ES] one", "[ES] TWO", "[ES] three", "[ES] four"],
+                [cue.text for cue in load_srt(os.path.join(outdir, "es.srt"))],
+            )
+            translator.sent.clear()
+            run_module.translate_transcript(
+                second, "key", ["es"], ["srt"], reuse_translations=False
+            )
+            self.assertEqual(["one", "TWO", "three", "four"], translator.sent)
+
+    @mock.patch.object(run_module, "backoff_delay", lambda _attempt: 0.0)
+    def test_failed_translation(self) -> None:
+        """A translation left over from before a failed run is not reused for new text."""
+        translator = FakeTranslator()
+        with tempfile.TemporaryDirectory() as outdir, mock.patch.object(
+            run_module, "translate_cues", translator
+        ), mock.patch("builtins.print"):
+            first = make_transcript(outdir, [(0, "one"), (1, "two")])
+            run_module.translate_transcript(first, "key", ["es"], ["srt"])
+            # Same timings, new text, and the translation fails: en.srt is
+            # replaced but es.srt is still the first run's.
+            second = make_transcript(outdir, [(0, "one"), (1, "TWO")])
+            with mock.patch.object(
+                run_module, "translate_cues", mock.Mock(side_effect=RuntimeError("down"))
+            ), self.assertRaises(RuntimeError):
+                run_module.translate_transcript(second, "key", ["es"], ["srt"])
+            self.assertEqual(
+                ["one", "TWO"], [cue.text for cue in load_srt(os.path.join(outdir, "en.srt"))]
+            )
+            translator.sent.clear()
+            run_module.translate_transcript(second, "key", ["es"], ["srt"])
+            self.assertEqual(["TWO"], translator.sent)
+            self.assertEqual(
+                ["[ES] one", "[ES] TWO"],
+                [cue.text for cue in load_srt(os.path.join(outdir, "es.srt"))],
+            )
+
+    def test_sources(self) -> None:
+        """Translations pair with their sources, nothing is reused without them."""
+        cues = [Cue(1, 0, 900, "one"), Cue(2, 1000, 1900, "two")]
+        with tempfile.TemporaryDirectory() as outdir, mock.patch("builtins.print"):
+            self.assertEqual([None, None], previous_translations(cues, outdir, "es"))
+            write_srt(os.path.join(outdir, "es.srt"), [cue._replace(text="x") for cue in cues])
+            self.assertEqual([None, None], previous_translations(cues, outdir, "es"))
+            write_sources(
+                outdir, "es", cues, [cues[0]._replace(text="uno"), cues[1]._replace(text="dos")]
+            )
+            self.assertEqual(["uno", "dos"], previous_translations(cues, outdir, "es"))
+            with open(get_sources_path(outdir, "es"), encoding="utf-8", mode="w") as file:
+                file.write("[{")
+            self.assertEqual([None, None], previous_translations(cues, outdir, "es"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Unit test file.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from video_subtitles.metrics import Counter, Gauge, Histogram, Registry, metrics_to
+from video_subtitles.srt_cues import Cue
+from video_subtitles.thread_processor import JOBS_FINISHED, ThreadProcessor
+from video_subtitles.translate import (
+    BACKEND_CHARACTERS,
+    BACKEND_REQUEST_SECONDS,
+    TRANSLATION_MEMORY,
+    translate_cues,
+)
+from video_subtitles.translation_backends import BACKENDS, LocalBackend
+from video_subtitles.translation_memory import TranslationMemory
+
+
+class MetricsTester(unittest.TestCase):
+    """Tests the metrics and their exposition."""
+
+    def test_exposition(self) -> None:
+        """Metrics render in the Prometheus text format."""
+        registry = Registry()
+        hits = registry.register(Counter("hits_total", "Cache hits.", ("result",)))
+        depth = registry.register(Gauge("queue_depth", "Queued jobs."))
+        latency = registry.register(
+            Histogram("latency_seconds", "Latency.", ("backend",), buckets=(0.1, 1.0))
+        )
+        hits.inc(result="hit")  # type: ignore
+        hits.inc(2, result="miss")  # type: ignore
+        depth.set(3)  # type: ignore
+        depth.dec()  # type: ignore
+        for value in (0.05, 0.5, 5.0):
+            latency.observe(value, backend='say "hi"')  # type: ignore
+        self.assertEqual(
+            "# HELP hits_total Cache hits.\n"
+            "# TYPE hits_total counter\n"
+            'hits_total{result="hit"} 1\n'
+            'hits_total{result="miss"} 2\n'
+            "# HELP latency_seconds Latency.\n"
+            "# TYPE latency_seconds histogram\n"
+            'latency_seconds_bucket{backend="say \\"hi\\"",le="0.1"} 1\n'
+            'latency_seconds_bucket{backend="say \\"hi\\"",le="1"} 2\n'
+            'latency_seconds_bucket{backend="say \\"hi\\"",le="+Inf"} 3\n'
+            'latency_seconds_sum{backend="say \\"hi\\""} 5.55\n'
+            'latency_seconds_count{backend="say \\"hi\\""} 3\n'
+            "# HELP queue_depth Queued jobs.\n"
+            "# TYPE queue_depth gauge\n"
+            "queue_depth 2\n",
+            registry.exposition(),
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "metrics.prom")
+            registry.write(path)
+            with open(path, encoding="utf-8", mode="r") as file:
+                self.assertEqual(registry.exposition(), file.read())
+            self.assertEqual(["metrics.prom"], os.listdir(tmpdir))
+
+    def test_registration(self) -> None:
+        """A name registers once, labels are checked."""
+        registry = Registry()
+        first = registry.register(Counter("jobs_total", "Jobs."))
+        self.assertIs(first, registry.register(Counter("jobs_total", "Jobs.")))
+        with self.assertRaises(ValueError):
+            registry.register(Gauge("jobs_total", "Jobs."))
+        with self.assertRaises(ValueError):
+            first.inc(state="done")  # type: ignore
+        with self.assertRaises(ValueError):
+            first.inc(-1)  # type: ignore
+
+    @mock.patch.dict(BACKENDS, {"local": LocalBackend})
+    def test_translation_metrics(self) -> None:
+        """Translations count characters, requests and memory lookups."""
+        cues = [Cue(1, 0, 1000, "Hello"), Cue(2, 1000, 2000, "World")]
+        chars = BACKEND_CHARACTERS.get(backend="local")
+        requests = BACKEND_REQUEST_SECONDS.count(backend="local")
+        hits = TRANSLATION_MEMORY.get(result="hit")
+        misses = TRANSLATION_MEMORY.get(result="miss")
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch("builtins.print"):
+            memory = TranslationMemory(os.path.join(tmpdir, "memory.db"))
+            try:
+                translate_cues("local", cues, "EN", "ES", memory=memory)
+                translate_cues("local", cues, "EN", "ES", memory=memory)
+            finally:
+                memory.close()
+        self.assertEqual(
+            chars + len("Hello") + len("World"), BACKEND_CHARACTERS.get(backend="local")
+        )
+        self.assertEqual(requests + 1, BACKEND_REQUEST_SECONDS.count(backend="local"))
+        self.assertEqual(misses + 2, TRANSLATION_MEMORY.get(result="miss"))
+        self.assertEqual(hits + 2, TRANSLATION_MEMORY.get(result="hit"))
+
+    def test_metrics_to(self) -> None:
+        """The metrics are written when the with block ends, even when it fails."""
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch("builtins.print"):
+            path = os.path.join(tmpdir, "metrics.prom")
+            with self.assertRaises(ValueError):
+                with metrics_to(path):
+                    self.assertFalse(os.path.exists(path))
+                    raise ValueError("boom")
+            with open(path, encoding="utf-8", mode="r") as file:
+                self.assertIn("# TYPE ", file.read())
+
+    def test_job_metrics(self) -> None:
+        """Finished jobs are counted by state."""
+        done = JOBS_FINISHED.get(state="done")
+        failed = JOBS_FINISHED.get(state="failed")
+        processor = ThreadProcessor(max_workers=1)
+        processor.start()
+
+        def fail(cancel_event) -> None:
+            raise ValueError("boom")
+
+        jobs = [
+            processor.submit(lambda cancel_event: None),
+            processor.submit(fail),
+        ]
+        for job in jobs:
+            self.assertTrue(job.wait(timeout=5))
+        processor.stop()
+        self.assertEqual(done + 1, JOBS_FINISHED.get(state="done"))
+        self.assertEqual(failed + 1, JOBS_FINISHED.get(state="failed"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Unit test file.
+"""
+import unittest
+from types import SimpleNamespace
+
+from video_subtitles.rate_limit import AdaptiveLimiter, get_throttle_info
+
+
+class ThrottledError(Exception):
+    """Looks like a requests HTTPError for a 429 response."""
+
+    def __init__(self, retry_after: str) -> None:
+        super().__init__("429 Client Error")
+        self.response = SimpleNamespace(
+            status_code=429, headers={"Retry-After": retry_after}
+        )
+
+
+class RateLimitTester(unittest.TestCase):
+    """Tests the adaptive backend rate limiter."""
+
+    def test_throttle_info(self) -> None:
+        """Throttles are recognized from status codes and Retry-After."""
+        self.assertEqual((True, 2.0), get_throttle_info(ThrottledError("2")))
+        self.assertEqual((True, None), get_throttle_info(ThrottledError("soon")))
+        self.assertEqual((False, None), get_throttle_info(ValueError("bad input")))
+        err = Exception("Too many requests, DeepL servers are currently busy")
+        self.assertEqual((True, None), get_throttle_info(err))
+
+    def test_retries_only_throttled_calls(self) -> None:
+        """Throttled calls are retried and back the limiter off."""
+        limiter = AdaptiveLimiter(rate=100.0, max_concurrency=4)
+        calls = []
+
+        def flaky() -> str:
+            calls.append(1)
+            if len(calls) < 3:
+                raise ThrottledError("0.01")
+            return "ok"
+
+        self.assertEqual("ok", limiter.call(flaky))
+        self.assertEqual(3, len(calls))
+        self.assertEqual(2, limiter.throttled)
+        self.assertLess(limiter.rate, 100.0)
+        self.assertLess(limiter.concurrency, 4)
+
+        def broken() -> None:
+            calls.append(1)
+            raise ValueError("bad input")
+
+        calls.clear()
+        with self.assertRaises(ValueError):
+            limiter.call(broken)
+        self.assertEqual(1, len(calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Unit test file.
+"""
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
+
+from video_subtitles.server import JobServer, make_http_server, parse_job_request
+
+
+class FakeRun:  # pylint: disable=too-few-public-methods
+    """Stands in for run(), writes one file per language and format."""
+
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, **kwargs) -> str:
+        self.calls.append(kwargs)
+        self.started.set()
+        self.release.wait(timeout=5)
+        if kwargs["cancel_event"].is_set():
+            raise RuntimeError("Cancelled")
+        name = os.path.splitext(os.path.basename(kwargs["file"]))[0]
+        outdir = os.path.join(kwargs["output_root"], f"text_{name}")
+        os.makedirs(outdir, exist_ok=True)
+        for language in ["en"] + kwargs["out_languages"]:
+            for fmt in kwargs["formats"]:
+                path = os.path.join(outdir, f"{language}.{fmt}")
+                with open(path, encoding="utf-8", mode="w") as file:
+                    file.write("")
+        return outdir
+
+
+class JobServerTester(unittest.TestCase):
+    """Tests the job server over HTTP."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.media = os.path.join(self.tmpdir.name, "clip.mp4")
+        with open(self.media, mode="wb") as file:
+            file.write(b"\0")
+        self.fake_run = FakeRun()
+        self.job_server = JobServer("local", workers=1, run_job=self.fake_run)
+        self.job_server.start()
+        self.http = make_http_server(self.job_server, port=0)
+        self.url = f"http://127.0.0.1:{self.http.server_address[1]}"  # type: ignore
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+        self.print_patch = mock.patch("builtins.print")
+        self.print_patch.start()
+
+    def tearDown(self) -> None:
+        self.print_patch.stop()
+        self.fake_run.release.set()
+        self.http.shutdown()
+        self.http.server_close()
+        self.job_server.stop()
+        self.tmpdir.cleanup()
+
+    def call(self, method: str, path: str, data=None) -> tuple[int, object]:
+        """Send a request, return the status code and decoded JSON."""
+        body = json.dumps(data).encode("utf-8") if data is not None else None
+        request = urllib.request.Request(self.url + path, data=body, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as err:
+            return err.code, json.loads(err.read())
+
+    def wait_done(self, job_id: str) -> dict:
+        """Wait for a job to finish and return its status."""
+        self.assertTrue(self.job_server.jobs[job_id].wait(timeout=5))
+        code, status = self.call("GET", f"/jobs/{job_id}")
+        self.assertEqual(200, code)
+        return status  # type: ignore
+
+    def test_job(self) -> None:
+        """A job is queued, run and reports its outputs."""
+        code, status = self.call(
+            "POST",
+            "/jobs",
+            {"file": self.media, "languages": ["es"], "formats": ["srt", "vtt"]},
+        )
+        self.assertEqual(202, code)
+        status = self.wait_done(status["id"])  # type: ignore
+        self.assertEqual("done", status["state"])
+        self.assertEqual(4, len(status["outputs"]))
+        call = self.fake_run.calls[0]
+        self.assertEqual("local", call["deepl_api_key"])
+        self.assertEqual(self.tmpdir.name, call["output_root"])
+        code, jobs = self.call("GET", "/jobs")
+        self.assertEqual([status["id"]], [job["id"] for job in jobs])  # type: ignore
+        code, health = self.call("GET", "/health")
+        self.assertEqual(0, health["running"])  # type: ignore
+        self.assertEqual(0, health["queued"])  # type: ignore
+        with urllib.request.urlopen(self.url + "/metrics", timeout=5) as response:
+            self.assertIn("videosubtitles_jobs_total", response.read().decode("utf-8"))
+
+    def test_cancel(self) -> None:
+        """Queued and running jobs can be cancelled."""
+        self.fake_run.release.clear()
+        _, running = self.call("POST", "/jobs", {"file": self.media, "languages": ["es"]})
+        self.assertTrue(self.fake_run.started.wait(timeout=5))
+        _, queued = self.call("POST", "/jobs", {"file": self.media, "languages": ["fr"]})
+        for job in (queued, running):
+            code, result = self.call("DELETE", f"/jobs/{job['id']}")  # type: ignore
+            self.assertEqual(200, code)
+            self.assertTrue(result["cancelled"])  # type: ignore
+        self.fake_run.release.set()
+        self.assertEqual("cancelled", self.wait_done(queued["id"])["state"])  # type: ignore
+        self.assertEqual("cancelled", self.wait_done(running["id"])["state"])  # type: ignore
+        self.assertEqual(1, len(self.fake_run.calls))
+
+    def test_bad_requests(self) -> None:
+        """Invalid jobs and unknown ids are rejected."""
+        code, _ = self.call("POST", "/jobs", {"file": self.media, "languages": ["xx"]})
+        self.assertEqual(400, code)
+        code, _ = self.call("GET", "/jobs/missing")
+        self.assertEqual(404, code)
+        code, _ = self.call("DELETE", "/jobs/missing")
+        self.assertEqual(404, code)
+
+    def test_parse_job_request(self) -> None:
+        """Job requests are validated and normalized."""
+        request = parse_job_request({"file": self.media, "languages": ["ES"]})
+        self.assertEqual(["es"], request.languages)
+        self.assertEqual(["srt"], request.formats)
+        invalid: list[object] = [
+            [],
+            {"languages": ["es"]},
+            {"file": self.media + ".missing", "languages": ["es"]},
+            {"file": self.media, "languages": []},
+            {"file": self.media, "languages": ["es"], "model": "huge"},
+            {"file": self.media, "languages": ["es"], "formats": ["doc"]},
+            {"file": self.media, "languages": ["es"], "chunk_minutes": 0},
+            {"file": self.media, "languages": ["es"], "bogus": 1},
+        ]
+        for data in invalid:
+            with self.assertRaises(ValueError):
+                parse_job_request(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
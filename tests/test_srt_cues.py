@@ -0,0 +1,67 @@
+"""
+Unit test file.
+"""
+import os
+import unittest
+
+from video_subtitles.srt_cues import (
+    Cue,
+    clean_text,
+    format_srt,
+    format_timestamp,
+    parse_srt,
+    read_srt,
+    wrap_text,
+)
+from video_subtitles.util import read_utf8
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+TEST_SRT = os.path.join(HERE, "test.srt")
+
+MESSY_SRT = (
+    "\ufeff1\r\n"
+    "00:00:01,500 --> 00:00:02,000\r\n"
+    "First line\r\n"
+    "\r\n"
+    "\r\n"
+    "00:00:03.250 --> 00:00:04,000 X1:0\r\n"
+    "- Dialog one\r\n"
+    "- Dialog two\r\n"
+    "\r\n"
+    "3\r\n"
+    "01:02:03,004 --> 01:02:04,000\r\n"
+    "42\r\n"
+)
+
+
+class SrtCuesTester(unittest.TestCase):
+    """Tests the srt parser and writer."""
+
+    def test_round_trip(self) -> None:
+        """Parsing and writing a well formed file gives the same text back."""
+        self.assertEqual(read_utf8(TEST_SRT), "".join(format_srt(read_srt(TEST_SRT))))
+
+    def test_messy_input(self) -> None:
+        """BOM, CRLF, missing number lines and dot separators are accepted."""
+        cues = list(parse_srt(MESSY_SRT.splitlines(keepends=True)))
+        self.assertEqual(
+            [
+                Cue(1, 1500, 2000, "First line"),
+                Cue(2, 3250, 4000, "- Dialog one\n- Dialog two"),
+                Cue(3, 3723004, 3724000, "42"),
+            ],
+            cues,
+        )
+        self.assertEqual("01:02:03,004", format_timestamp(3723004))
+
+    def test_clean_and_wrap(self) -> None:
+        """Dialog cues survive flattening for translation and wrapping."""
+        self.assertEqual("- Dialog one_- Dialog two", clean_text("- Dialog one\n- Dialog two"))
+        self.assertEqual("- Dialog one\n- Dialog two", wrap_text("- Dialog one_- Dialog two"))
+        self.assertEqual("Bold text", clean_text("<b>Bold</b>\ntext"))
+        self.assertEqual("a b\nc", wrap_text("a b c", line_wrap_limit=4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,6 +24,15 @@ class SrtToWebvtt(unittest.TestCase):
             convert_to_webvtt(TEST_SRT, out_file)
             content = read_utf8(out_file)
             print(content)
+        self.assertTrue(
+            content.startswith(
+                "WEBVTT\n\nSTYLE\n::::cue {\n  line: 80%;\n}\n\n"
+                "00:00:00.000 --> 00:00:07.000\n"
+                "I don't have to remind many Americans that the\n"
+            )
+        )
+        self.assertIn("\n\n00:00:07.000 --> 00:00:11.000\n", content)
+        self.assertTrue(content.endswith("our public health."))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+"""
+Unit test file.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from video_subtitles import util
+from video_subtitles.util import GraphicsInfo, cached_cuda_video_cards
+
+# Cumulative import time of video_subtitles.cli, generous so that slow CI
+# machines pass but an eager import of the translation stack does not.
+IMPORT_BUDGET_MS = 250
+
+HEAVY_MODULES = [
+    "disklru",
+    "srtranslator",
+    "transcribe_anything",
+    "gtts",
+    "video_subtitles.run",
+    "video_subtitles.settings",
+    "video_subtitles.translate",
+]
+
+
+def import_times(module: str) -> dict[str, float]:
+    """Import a module in a fresh interpreter, return ms per imported module."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    times: dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1000.0
+    return times
+
+
+class StartupTester(unittest.TestCase):
+    """Guards the startup time of the command line tool."""
+
+    def test_cli_import_budget(self) -> None:
+        """Importing the cli stays cheap and leaves heavy modules unloaded."""
+        times = import_times("video_subtitles.cli")
+        heavy = [name for name in HEAVY_MODULES if name in times]
+        self.assertEqual([], heavy)
+        self.assertLess(times["video_subtitles.cli"], IMPORT_BUDGET_MS)
+
+    def test_cached_video_cards(self) -> None:
+        """nvidia-smi is only queried when the cache is missing or stale."""
+        card = GraphicsInfo("RTX", 24.0, 0)
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            cache_file = os.path.join(tmpdirname, "gpus.json")
+            with mock.patch.object(
+                util, "query_cuda_video_cards", return_value=[card]
+            ) as query:
+                self.assertEqual([card], cached_cuda_video_cards(cache_file=cache_file))
+                self.assertEqual([card], cached_cuda_video_cards(cache_file=cache_file))
+                self.assertEqual(1, query.call_count)
+                with open(cache_file, encoding="utf-8", mode="w") as file:
+                    json.dump({"time": time.time() - 10, "cards": []}, file)
+                self.assertEqual([card], cached_cuda_video_cards(ttl=5, cache_file=cache_file))
+                self.assertEqual(2, query.call_count)
+
+    def test_default_cache_paths(self) -> None:
+        """The video card cache does not get in the way of the transcription cache."""
+        script = (
+            "from unittest import mock\n"
+            "from disklru import DiskLRUCache\n"
+            "from video_subtitles import util\n"
+            "from video_subtitles.run import CACHE_FILE\n"
+            "card = util.GraphicsInfo('RTX', 24.0, 0)\n"
+            "with mock.patch.object(util, 'query_cuda_video_cards', return_value=[card]):\n"
+            "    assert util.cached_cuda_video_cards() == [card]\n"
+            "cache = DiskLRUCache(CACHE_FILE, 16)\n"
+            "cache.put_json('key', {'srt_text': 'hello'})\n"
+            "assert cache.get_json('key') == {'srt_text': 'hello'}\n"
+            "assert util.cached_cuda_video_cards() == [card]\n"
+        )
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            env = dict(
+                os.environ,
+                PYTHONPATH=os.pathsep.join(sys.path),
+                XDG_CONFIG_HOME=tmpdirname,
+                APPDATA=tmpdirname,
+                HOME=tmpdirname,
+            )
+            proc = subprocess.run(
+                [sys.executable, "-c", script],
+                capture_output=True,
+                text=True,
+                env=env,
+                check=False,
+            )
+            self.assertEqual(0, proc.returncode, proc.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
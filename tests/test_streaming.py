@@ -0,0 +1,102 @@
+"""
+Unit test file.
+"""
+import os
+import tempfile
+import time
+import unittest
+from typing import Iterator
+from unittest import mock
+
+from video_subtitles import run as run_module
+from video_subtitles.srt_cues import Cue, load_srt, write_srt
+
+# Every text fake_translate_cues translated.
+TRANSLATED: list[str] = []
+
+
+def fake_translate_cues(api_key, cues, from_lang, to_lang, **_kwargs) -> list[Cue]:  # pylint: disable=unused-argument
+    """Offline translation that tags every cue with the language."""
+    if to_lang == "FR":
+        raise ValueError("fr is down")
+    translated = [cue._replace(text=f"[{to_lang}] {cue.text}") for cue in cues]
+    TRANSLATED.extend(cue.text for cue in translated)
+    return translated
+
+
+def wait_for_translation(text: str, timeout: float = 5.0) -> bool:
+    """Wait for a text to be translated."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if text in TRANSLATED:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class StreamingTester(unittest.TestCase):
+    """Tests translating cues while they are still being transcribed."""
+
+    @mock.patch.object(run_module, "backoff_delay", lambda _attempt: 0.0)
+    @mock.patch.object(run_module, "translate_cues", fake_translate_cues)
+    def test_translate_stream(self) -> None:
+        """Segments are translated before the next is transcribed."""
+        TRANSLATED.clear()
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            es_srt = os.path.join(tmpdirname, "es.srt")
+            seen_first: list[bool] = []
+
+            def segments() -> Iterator[list[Cue]]:
+                yield [Cue(1, 0, 1000, "one"), Cue(2, 1000, 2000, "two")]
+                seen_first.append(wait_for_translation("[ES] two"))
+                yield [Cue(3, 5000, 6000, "three")]
+
+            with self.assertRaises(RuntimeError) as ctx:
+                run_module.translate_stream(
+                    segments(),
+                    tmpdirname,
+                    "key",
+                    ["es", "fr"],
+                    ["srt", "vtt"],
+                    translation_workers=2,
+                )
+            self.assertIn("fr", str(ctx.exception))
+            self.assertEqual([True], seen_first)
+            self.assertEqual(
+                ["en.srt", "en.vtt", "es.srt", "es.vtt"], sorted(os.listdir(tmpdirname))
+            )
+            self.assertEqual(
+                ["[ES] one", "[ES] two", "[ES] three"],
+                [cue.text for cue in load_srt(es_srt)],
+            )
+            self.assertEqual([1, 2, 3], [cue.number for cue in load_srt(es_srt)])
+
+    @mock.patch.object(run_module, "backoff_delay", lambda _attempt: 0.0)
+    @mock.patch.object(run_module, "translate_cues", fake_translate_cues)
+    def test_interrupted_stream(self) -> None:
+        """An interrupted stream keeps the outputs of the previous run."""
+        TRANSLATED.clear()
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            previous = [Cue(1, 0, 1000, "previous")]
+            for language in ("en", "es"):
+                write_srt(os.path.join(tmpdirname, f"{language}.srt"), previous)
+
+            def segments() -> Iterator[list[Cue]]:
+                yield [Cue(1, 0, 1000, "one")]
+                self.assertTrue(wait_for_translation("[ES] one"))
+                raise KeyboardInterrupt
+
+            with self.assertRaises(KeyboardInterrupt):
+                run_module.translate_stream(
+                    segments(), tmpdirname, "key", ["es"], ["srt"]
+                )
+            self.assertEqual(["en.srt", "es.srt"], sorted(os.listdir(tmpdirname)))
+            for language in ("en", "es"):
+                self.assertEqual(
+                    ["previous"],
+                    [cue.text for cue in load_srt(os.path.join(tmpdirname, f"{language}.srt"))],
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Unit test file.
+"""
+import json
+import os
+import tempfile
+import unittest
+from xml.etree import ElementTree
+
+from video_subtitles.convert_to_webvtt import (
+    STYLE_ELEMENT,
+    convert_to_webvtt,
+    format_webvtt,
+)
+from video_subtitles.srt_cues import load_srt
+from video_subtitles.subtitle_formats import (
+    SUBTITLE_FORMATS,
+    SubtitleWriter,
+    emit,
+    parse_formats,
+)
+from video_subtitles.util import read_utf8
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+TEST_SRT = os.path.join(HERE, "test.srt")
+
+
+class SubtitleFormatsTester(unittest.TestCase):
+    """Tests writing every subtitle format in one pass."""
+
+    def test_emit_all_formats(self) -> None:
+        """Each format is written and srt/vtt match the existing writers."""
+        cues = load_srt(TEST_SRT)
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            paths = emit(cues, os.path.join(tmpdirname, "en"), "en", list(SUBTITLE_FORMATS))
+            self.assertEqual(
+                sorted(f"en.{ext}" for ext in SUBTITLE_FORMATS),
+                sorted(os.listdir(tmpdirname)),
+            )
+            self.assertEqual(len(SUBTITLE_FORMATS), len(paths))
+            base = os.path.join(tmpdirname, "en")
+            self.assertEqual(read_utf8(TEST_SRT), read_utf8(f"{base}.srt"))
+            vtt_file = os.path.join(tmpdirname, "expected.vtt")
+            convert_to_webvtt(TEST_SRT, vtt_file)
+            self.assertEqual(read_utf8(vtt_file), read_utf8(f"{base}.vtt"))
+            data = json.loads(read_utf8(f"{base}.json"))
+            self.assertEqual(len(cues), len(data))
+            self.assertEqual(7000, data[0]["end_ms"])
+            root = ElementTree.parse(f"{base}.ttml").getroot()
+            self.assertEqual(len(cues), len(root.findall(".//{http://www.w3.org/ns/ttml}p")))
+            ass = read_utf8(f"{base}.ass")
+            self.assertEqual(len(cues), ass.count("\nDialogue: "))
+            self.assertIn("Dialogue: 0,0:00:00.00,0:00:07.00,Default,,0,0,0,,", ass)
+
+    def test_empty_first_cue(self) -> None:
+        """A skipped empty first cue does not lose the WebVTT STYLE block."""
+        cues = load_srt(TEST_SRT)
+        cues = [cues[0]._replace(text="")] + cues[1:]
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            base = os.path.join(tmpdirname, "en")
+            emit(cues, base, "en", ["vtt", "json"])
+            vtt = read_utf8(f"{base}.vtt")
+            self.assertEqual("".join(format_webvtt(cues)), vtt)
+            self.assertEqual(1, vtt.count(STYLE_ELEMENT))
+            self.assertEqual(len(cues), len(json.loads(read_utf8(f"{base}.json"))))
+
+    def test_ass_escapes(self) -> None:
+        """Braces in ASS text are escaped so they do not start an override block."""
+        cue = load_srt(TEST_SRT)[0]._replace(text="{\\i1}not italic}\nnext")
+        self.assertTrue(
+            SUBTITLE_FORMATS["ass"].cue(cue, True).endswith(
+                ",\\{\\i1\\}not italic\\}\\Nnext\n"
+            )
+        )
+
+    def test_atomic_writes(self) -> None:
+        """Outputs appear complete under their final names, failures keep the old ones."""
+        cues = load_srt(TEST_SRT)
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            base = os.path.join(tmpdirname, "es")
+            writer = SubtitleWriter(base, "es", ["srt", "vtt"])
+            writer.write(cues[:3])
+            self.assertFalse(os.path.exists(f"{base}.srt"))
+            writer.write(cues[3:])
+            writer.close()
+            self.assertEqual(["es.srt", "es.vtt"], sorted(os.listdir(tmpdirname)))
+            self.assertEqual(read_utf8(TEST_SRT), read_utf8(f"{base}.srt"))
+
+            def failing_cues():
+                yield from cues[:3]
+                raise ValueError("boom")
+
+            with self.assertRaises(ValueError):
+                emit(failing_cues(), base, "es", ["srt", "vtt"])
+            self.assertEqual(["es.srt", "es.vtt"], sorted(os.listdir(tmpdirname)))
+            self.assertEqual(read_utf8(TEST_SRT), read_utf8(f"{base}.srt"))
+
+    def test_parse_formats(self) -> None:
+        """Format lists are validated."""
+        self.assertEqual(["srt", "vtt"], parse_formats("SRT, vtt"))
+        with self.assertRaises(ValueError):
+            parse_formats("srt,docx")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Unit test file.
+"""
+import threading
+import unittest
+
+from video_subtitles.thread_processor import (
+    CANCELLED,
+    DONE,
+    FAILED,
+    ThreadProcessor,
+)
+
+
+class ThreadProcessorTester(unittest.TestCase):
+    """Tests the job executor."""
+
+    def test_concurrency_and_results(self) -> None:
+        """Jobs run side by side and report results and errors."""
+        processor = ThreadProcessor(max_workers=3)
+        barrier = threading.Barrier(3, timeout=5)
+
+        def job(value: int, cancel_event: threading.Event) -> int:
+            assert not cancel_event.is_set()
+            barrier.wait()
+            if value < 0:
+                raise ValueError("negative")
+            return value * 2
+
+        processor.start()
+        jobs = [processor.submit(job, value) for value in (1, 2, -1)]
+        for item in jobs:
+            self.assertTrue(item.wait(5))
+        self.assertEqual([DONE, DONE, FAILED], [item.state for item in jobs])
+        self.assertEqual([2, 4], [item.result for item in jobs[:2]])
+        self.assertIsInstance(jobs[2].error, ValueError)
+        self.assertEqual((0, 0), processor.counts())
+        processor.stop()
+
+    def test_priority_and_cancel(self) -> None:
+        """Queued jobs start by priority and cancelled ones never start."""
+        processor = ThreadProcessor(max_workers=1)
+        started = threading.Event()
+        order: list[str] = []
+
+        def blocker(cancel_event: threading.Event) -> None:
+            started.set()
+            cancel_event.wait(5)
+
+        def record(name: str, cancel_event: threading.Event) -> None:  # pylint: disable=unused-argument
+            order.append(name)
+
+        statuses: list[tuple[int, int]] = []
+        processor.set_status_callback(lambda running, queued: statuses.append((running, queued)))
+        processor.start()
+        running = processor.submit(blocker)
+        self.assertTrue(started.wait(5))
+        low = processor.submit(record, "low", priority=-1)
+        skipped = processor.submit(record, "skipped")
+        high = processor.submit(record, "high", priority=1)
+        finished: list[str] = []
+        processor.add_done_callback(skipped, lambda job: finished.append(job.state))
+        self.assertTrue(processor.cancel(skipped))
+        self.assertEqual([CANCELLED], finished)
+        self.assertTrue(processor.cancel(running))
+        for item in (running, low, high):
+            self.assertTrue(item.wait(5))
+        self.assertEqual(CANCELLED, running.state)
+        self.assertEqual(["high", "low"], order)
+        self.assertFalse(processor.cancel(low))
+        self.assertEqual((0, 0), statuses[-1])
+        self.assertIn((1, 3), statuses)
+        processor.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
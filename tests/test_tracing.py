@@ -0,0 +1,127 @@
+"""
+Unit test file.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from video_subtitles import tracing
+from video_subtitles.convert_to_webvtt import convert_to_webvtt
+from video_subtitles.tracing import disable_tracing, enable_tracing, span
+from video_subtitles.translate import srt_wrap, translate
+from video_subtitles.translation_backends import BACKENDS, LocalBackend
+from video_subtitles.translation_memory import TranslationMemory
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TEST_SRT = os.path.join(HERE, "test.srt")
+
+
+class TracingTester(unittest.TestCase):
+    """Tests the timing spans and their export."""
+
+    def tearDown(self) -> None:
+        disable_tracing()
+
+    def test_disabled(self) -> None:
+        """Without tracing every span is the same no-op."""
+        self.assertIs(span("a"), span("b", language="es"))
+        with span("a"):
+            pass
+
+    def test_spans(self) -> None:
+        """Spans from every thread are recorded and exported."""
+        tracer = enable_tracing()
+
+        def work() -> None:
+            with span("worker"):
+                pass
+
+        with span("outer", file="x.mp4"):
+            with span("inner"):
+                pass
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        with self.assertRaises(ValueError):
+            with span("failing"):
+                raise ValueError("boom")
+        self.assertEqual(
+            ["inner", "worker", "outer", "failing"],
+            [event["name"] for event in tracer.events],
+        )
+        inner, worker, outer = tracer.events[0], tracer.events[1], tracer.events[2]
+        self.assertEqual({"file": "x.mp4"}, outer["args"])
+        self.assertNotEqual(outer["tid"], worker["tid"])
+        self.assertLessEqual(outer["ts"], inner["ts"])
+        self.assertGreaterEqual(outer["dur"], inner["dur"])
+        summary = tracer.summary()
+        self.assertIn("outer", summary)
+        self.assertIn("failing", summary)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "trace.json")
+            with mock.patch("builtins.print"):
+                tracing.finish_tracing(path)
+            with open(path, encoding="utf-8", mode="r") as file:
+                trace = json.load(file)
+        self.assertEqual(4, len(trace["traceEvents"]))
+        self.assertTrue(all(event["ph"] == "X" for event in trace["traceEvents"]))
+        self.assertIs(span("after"), span("after"))
+
+    def test_trace_path(self) -> None:
+        """The command line wins over the environment."""
+        with mock.patch.dict(os.environ, {tracing.TRACE_ENV: "env.json"}):
+            self.assertEqual("cli.json", tracing.get_trace_path("cli.json"))
+            self.assertEqual("env.json", tracing.get_trace_path(None))
+        with mock.patch.dict(os.environ, {tracing.TRACE_ENV: ""}):
+            self.assertIsNone(tracing.get_trace_path(None))
+
+    def test_trace_to(self) -> None:
+        """The trace is written when the with block ends, even when it fails."""
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch("builtins.print"):
+            path = os.path.join(tmpdir, "trace.json")
+            with self.assertRaises(ValueError):
+                with tracing.trace_to(path):
+                    with span("failing"):
+                        raise ValueError("boom")
+            with open(path, encoding="utf-8", mode="r") as file:
+                self.assertEqual(1, len(json.load(file)["traceEvents"]))
+            self.assertIs(span("after"), span("after"))
+            with mock.patch.dict(os.environ, {tracing.TRACE_ENV: ""}):
+                with tracing.trace_to(None):
+                    self.assertIs(span("off"), span("off"))
+
+    @mock.patch.dict(BACKENDS, {"local": LocalBackend})
+    def test_instrumented_stages(self) -> None:
+        """The srt stages record their spans."""
+        tracer = enable_tracing()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            srt = os.path.join(tmpdir, "en.srt")
+            shutil.copyfile(TEST_SRT, srt)
+            srt_wrap(srt)
+            convert_to_webvtt(srt, os.path.join(tmpdir, "en.vtt"))
+            memory = TranslationMemory(os.path.join(tmpdir, "memory.db"))
+            try:
+                with mock.patch("builtins.print"):
+                    out = os.path.join(tmpdir, "es.srt")
+                    translate("local", srt, out, "EN", "ES", memory)
+            finally:
+                memory.close()
+        names = {event["name"] for event in tracer.events}
+        self.assertLessEqual(
+            {
+                "srt_wrap",
+                "convert_to_webvtt",
+                "translate_file",
+                "translation_memory",
+                "backend_request",
+            },
+            names,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Unit test file.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from video_subtitles import run as run_module
+from video_subtitles.srt_cues import Cue, load_srt
+
+
+def fake_translate_cues(api_key, cues, from_lang, to_lang, **_kwargs) -> list[Cue]:  # pylint: disable=unused-argument
+    """Offline translate_cues, french is always down."""
+    if to_lang == "FR":
+        raise RuntimeError("french is down")
+    return [cue._replace(text=f"[{to_lang}] {cue.text}") for cue in cues]
+
+
+class TranslateTranscriptTester(unittest.TestCase):
+    """Tests translating a transcript to several languages."""
+
+    @mock.patch.object(run_module, "backoff_delay", lambda _attempt: 0.0)
+    @mock.patch.object(run_module, "translate_cues", fake_translate_cues)
+    def test_failed_language(self) -> None:
+        """A failing language does not stop the others, its error is raised at the end."""
+        with tempfile.TemporaryDirectory() as outdir, mock.patch("builtins.print"):
+            transcript = run_module.Transcript(
+                file="video.mp4",
+                outdir=outdir,
+                out_en_dir=os.path.join(outdir, "en"),
+                cues=(Cue(1, 0, 900, "one"), Cue(2, 1000, 1900, "two")),
+            )
+            with self.assertRaises(RuntimeError) as context:
+                run_module.translate_transcript(
+                    transcript,
+                    "key",
+                    ["es", "fr", "de"],
+                    ["srt"],
+                    translation_workers=3,
+                    reuse_translations=False,
+                )
+            self.assertTrue(str(context.exception).endswith(": fr"))
+            for language in ("es", "de"):
+                self.assertEqual(
+                    [f"[{language.upper()}] one", f"[{language.upper()}] two"],
+                    [cue.text for cue in load_srt(os.path.join(outdir, f"{language}.srt"))],
+                )
+            self.assertTrue(os.path.exists(os.path.join(outdir, "en.srt")))
+            self.assertFalse(os.path.exists(os.path.join(outdir, "fr.srt")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Unit test file.
+"""
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from video_subtitles.srt_cues import Cue
+from video_subtitles.translate import translate_cues
+from video_subtitles.translation_backends import (
+    BACKENDS,
+    DeeplBackend,
+    GoogleBackend,
+    LocalBackend,
+    close_backends,
+    get_backend,
+    get_backend_name,
+)
+from video_subtitles.translation_memory import TranslationMemory
+
+
+class FakeDeeplClient:
+    """Stands in for deepl.Translator, counting clients and requests."""
+
+    instances = 0
+
+    def __init__(self, api_key: str) -> None:
+        FakeDeeplClient.instances += 1
+        self.api_key = api_key
+        self.requests = 0
+
+    def translate_text(self, texts, source_lang, target_lang):  # pylint: disable=unused-argument
+        """Prefix every text with the target language."""
+        self.requests += 1
+        return [SimpleNamespace(text=f"{target_lang}:{text}") for text in texts]
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+class TranslationBackendsTester(unittest.TestCase):
+    """Tests the backend registry and the offline backend."""
+
+    def tearDown(self) -> None:
+        close_backends()
+
+    @mock.patch.dict(BACKENDS, {"local": LocalBackend})
+    def test_registry(self) -> None:
+        """Api keys select backends and instances are shared."""
+        self.assertEqual("deepl-free", get_backend_name(None))
+        self.assertEqual("google", get_backend_name("Google"))
+        self.assertEqual("local", get_backend_name("local"))
+        self.assertEqual("deepl", get_backend_name("0123-abcd:fx"))
+        self.assertIsInstance(get_backend("local"), LocalBackend)
+        self.assertIs(get_backend("local"), get_backend("local"))
+        self.assertIsNot(get_backend("key-a"), get_backend("key-b"))
+        self.assertLessEqual({"deepl", "deepl-free", "google", "local"}, set(BACKENDS))
+
+    def test_local_not_registered(self) -> None:
+        """The offline test backend is not selectable unless a test registers it."""
+        self.assertNotIn("local", BACKENDS)
+        self.assertEqual("deepl", get_backend_name("local"))
+
+    def test_language_mapping(self) -> None:
+        """Backends map DeepL style language codes to their own."""
+        self.assertEqual("pt", GoogleBackend().map_language("PT-BR"))
+        self.assertEqual("no", GoogleBackend().map_language("NB"))
+        self.assertEqual("pt-br", DeeplBackend("key").map_language("PT-BR"))
+
+    @mock.patch.dict(BACKENDS, {"local": LocalBackend})
+    def test_local_translate_cues(self) -> None:
+        """The offline backend runs the whole translation path."""
+        cues = [Cue(1, 0, 1000, "Hello there."), Cue(2, 1000, 2000, "Hello there.")]
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            memory = TranslationMemory(os.path.join(tmpdirname, "memory.db"))
+            out = translate_cues("local", cues, "EN", "ES", memory=memory)
+            memory.close()
+        self.assertEqual(
+            ["[es] Hello there.", "[es] Hello there."], [cue.text for cue in out]
+        )
+        backend = get_backend("local")
+        assert isinstance(backend, LocalBackend)
+        self.assertEqual(1, backend.requests)
+
+    def test_deepl_client_is_reused(self) -> None:
+        """Every language and call shares one DeepL client and its connections."""
+        FakeDeeplClient.instances = 0
+        fake_deepl = SimpleNamespace(Translator=FakeDeeplClient)
+        cues = [Cue(1, 0, 1000, "Good morning.")]
+        with mock.patch.dict("sys.modules", {"deepl": fake_deepl}):
+            with tempfile.TemporaryDirectory() as tmpdirname:
+                memory = TranslationMemory(os.path.join(tmpdirname, "memory.db"))
+                for lang in ("ES", "FR", "DE"):
+                    out = translate_cues("secret-key", cues, "EN", lang, memory=memory)
+                    self.assertEqual(f"{lang.lower()}:Good morning.", out[0].text)
+                memory.close()
+        self.assertEqual(1, FakeDeeplClient.instances)
+        backend = get_backend("secret-key")
+        assert isinstance(backend, DeeplBackend)
+        self.assertEqual(3, backend.get_client().requests)
+
+
+if __name__ == "__main__":
+    unittest.main()
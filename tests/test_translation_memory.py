@@ -0,0 +1,109 @@
+"""
+Unit test file.
+"""
+import os
+import tempfile
+import unittest
+
+from srtranslator.translators.base import Translator  # type: ignore
+
+from video_subtitles.translate import translate_texts
+from video_subtitles.translation_memory import TranslationJournal, TranslationMemory
+
+
+class UpperTranslator(Translator):
+    """Offline translator that upper cases every line."""
+
+    max_char = 40
+
+    def __init__(self) -> None:
+        self.requests: list[str] = []
+
+    def translate(self, text: str, source_language: str, destination_language: str):
+        self.requests.append(text)
+        return text.upper()
+
+
+class MergingTranslator(UpperTranslator):
+    """Offline translator that merges lines of requests with more than two."""
+
+    max_char = 3000
+
+    def translate(self, text: str, source_language: str, destination_language: str):
+        self.requests.append(text)
+        lines = text.upper().splitlines()
+        if len(lines) > 2:
+            return " ".join(lines)
+        return "\n".join(lines)
+
+
+class TranslationMemoryTester(unittest.TestCase):
+    """Tests the persistent translation memory."""
+
+    def test_round_trip(self) -> None:
+        """Translations persist across instances and are keyed per backend."""
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            db_path = os.path.join(tmpdirname, "memory.db")
+            memory = TranslationMemory(db_path)
+            memory.put_many({"Thank  you.": "Gracias."}, "en", "es", "deepl")
+            memory.close()
+            memory = TranslationMemory(db_path)
+            self.assertEqual(
+                {"Thank you.": "Gracias."},
+                memory.get_many(["Thank you. "], "en", "es", "deepl"),
+            )
+            self.assertEqual({}, memory.get_many(["Thank you."], "en", "es", "google"))
+            self.assertEqual({}, memory.get_many(["Thank you."], "en", "fr", "deepl"))
+            memory.close()
+
+    def test_journal_resume(self) -> None:
+        """A journal survives a torn write and is ignored for another language."""
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "out.srt.journal.jsonl")
+            journal = TranslationJournal(path, "en", "es", "deepl")
+            self.assertEqual({}, journal.load())
+            journal.append({"Hello.": "Hola."})
+            with open(path, encoding="utf-8", mode="a") as f:
+                f.write('{"source": "Bye.", "transl')
+            journal = TranslationJournal(path, "en", "es", "deepl")
+            self.assertEqual({"Hello.": "Hola."}, journal.load())
+            journal.append({"Bye.": "Adios."})
+            self.assertEqual(
+                {"Hello.": "Hola.", "Bye.": "Adios."},
+                TranslationJournal(path, "en", "es", "deepl").load(),
+            )
+            self.assertEqual({}, TranslationJournal(path, "en", "fr", "deepl").load())
+            journal.remove()
+            self.assertFalse(os.path.exists(path))
+
+    def test_translate_texts_chunks(self) -> None:
+        """Texts are packed into requests no larger than max_char."""
+        translator = UpperTranslator()
+        texts = [f"line number {i}" for i in range(10)]
+        chunks: list[dict[str, str]] = []
+        out = translate_texts(translator, texts, "en", "es", on_chunk=chunks.append)
+        self.assertEqual([text.upper() for text in texts], out)
+        self.assertGreater(len(translator.requests), 1)
+        for request in translator.requests:
+            self.assertLess(len(request), translator.max_char)
+        self.assertEqual(len(texts), sum(len(chunk) for chunk in chunks))
+
+    def test_translate_texts_dedupes(self) -> None:
+        """Repeated texts are translated once and scattered back."""
+        translator = UpperTranslator()
+        texts = ["[Music]", "Thank you.", "[Music]", "[Music]", "Thank you."]
+        out = translate_texts(translator, texts, "en", "es")
+        self.assertEqual([text.upper() for text in texts], out)
+        self.assertEqual(["[Music]\nThank you."], translator.requests)
+
+    def test_translate_batch_realigns(self) -> None:
+        """A batch whose line count comes back wrong is split until it lines up."""
+        translator = MergingTranslator()
+        texts = [f"cue {i}" for i in range(8)]
+        out = translate_texts(translator, texts, "en", "es")
+        self.assertEqual([text.upper() for text in texts], out)
+        self.assertEqual(8, len(translator.requests[0].splitlines()))
+
+
+if __name__ == "__main__":
+    unittest.main()